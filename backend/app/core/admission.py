@@ -0,0 +1,198 @@
+"""
+Admission Control - Per-Route Concurrency Limits & Per-Client Token-Bucket Rate Limits
+"""
+
+from datetime import datetime, timedelta
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import math
+import time
+import os
+
+from app.core.database import get_database
+from app.core.deadlines import DeadlineRoute
+from app.core.metrics import registry
+from app.core.monitoring import untracked
+
+# Configuration from Environment Variables
+ADMISSION_ENABLED = os.environ.get("ADMISSION_ENABLED", "true").lower() == "true"
+RATE_LIMIT_STORE = os.environ.get("RATE_LIMIT_STORE", "memory").lower()  # memory (per worker) or mongo (shared)
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", 100000))
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", 0))
+
+RATE_LIMIT_COLLECTION = "rate_limits"
+
+admission_rejected_total = registry.counter(
+    "admission_rejected_total", "Requests turned away before reaching their handler", ["route", "reason"]
+)
+admission_in_flight = registry.gauge(
+    "admission_in_flight", "Requests running on a concurrency-limited route", ["route"]
+)
+
+class AdmissionPolicy(NamedTuple):
+    max_concurrent: Optional[int]
+    rate: Optional[float]  # requests per second per client
+    burst: int
+
+def admission_limit(
+    max_concurrent: Optional[int] = None,
+    per_minute: Optional[float] = None,
+    burst: Optional[int] = None
+) -> Callable:
+    """Cap a route's concurrent requests per worker and each client's request rate
+
+    Place it below the router decorator:
+
+    @router.post("/submit")
+    @admission_limit(max_concurrent=32, per_minute=10, burst=5)
+    async def submit_testimonial(): ...
+    """
+    rate = per_minute / 60 if per_minute else None
+    policy = AdmissionPolicy(max_concurrent, rate, burst or max(1, math.ceil(per_minute or 1)))
+    
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.admission = policy
+        return endpoint
+    return decorator
+
+def client_ip(request: Request) -> str:
+    """Client address, taken from X-Forwarded-For when behind trusted proxies"""
+    if TRUSTED_PROXY_HOPS:
+        forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+class MemoryBuckets:
+    """Token buckets held by this worker"""
+    
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, updated)
+    
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Spend one token; 0 if allowed, else seconds until one is available"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+        
+        if key not in self._buckets and len(self._buckets) >= self.max_keys:
+            self._evict(now, rate, burst)
+        self._buckets[key] = (tokens - 1, now)
+        return 0
+    
+    def _evict(self, now: float, rate: float, burst: int):
+        """Forget clients whose buckets have refilled; they'd start full anyway"""
+        idle = burst / rate
+        for key in [k for k, (_, updated) in self._buckets.items() if now - updated >= idle]:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_keys:
+            del self._buckets[next(iter(self._buckets))]
+
+class MongoBuckets:
+    """Token buckets shared by every worker through one atomic update per request"""
+    
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = datetime.utcnow()
+        refilled = {"$add": [
+            {"$ifNull": ["$tokens", burst]},
+            {"$multiply": [{"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}, rate]}
+        ]}
+        pipeline = [
+            {"$set": {"tokens": {"$min": [burst, refilled]}, "updated_at": now}},
+            {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+            {"$set": {
+                "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                "expires_at": now + timedelta(seconds=burst / rate)
+            }}
+        ]
+        
+        collection = get_database()[RATE_LIMIT_COLLECTION]
+        with untracked():
+            try:
+                bucket = await collection.find_one_and_update(
+                    {"_id": key}, pipeline, upsert=True, return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                # Another worker created the bucket first; apply to theirs
+                bucket = await collection.find_one_and_update(
+                    {"_id": key}, pipeline, return_document=ReturnDocument.AFTER
+                )
+        
+        if bucket["allowed"]:
+            return 0
+        return (1 - bucket["tokens"]) / rate
+
+class AdmissionController:
+    """Concurrency counters per route and the configured rate-limit store"""
+    
+    def __init__(self):
+        self.in_flight: Dict[str, int] = {}
+        self.buckets = MongoBuckets() if RATE_LIMIT_STORE == "mongo" else MemoryBuckets(RATE_LIMIT_MAX_KEYS)
+    
+    async def check_rate(self, route: str, request: Request, policy: AdmissionPolicy):
+        """Reject with 429 when the client has used up its bucket"""
+        key = f"{route}|{client_ip(request)}"
+        try:
+            wait = await self.buckets.take(key, policy.rate, policy.burst)
+        except Exception as e:
+            # A failing shared store must not take the endpoint down with it
+            print(f"⚠️ Rate limit store unavailable, admitting request: {e}")
+            return
+        
+        if wait:
+            admission_rejected_total.inc(route=route, reason="rate_limited")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))}
+            )
+    
+    def enter(self, route: str, policy: AdmissionPolicy):
+        """Claim a concurrency slot or reject with 503"""
+        if self.in_flight.get(route, 0) >= policy.max_concurrent:
+            admission_rejected_total.inc(route=route, reason="concurrency")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry shortly",
+                headers={"Retry-After": "1"}
+            )
+        self.in_flight[route] = self.in_flight.get(route, 0) + 1
+        admission_in_flight.inc(route=route)
+    
+    def leave(self, route: str):
+        self.in_flight[route] -= 1
+        admission_in_flight.dec(route=route)
+
+admission = AdmissionController()
+
+class AdmissionRoute(DeadlineRoute):
+    """Deadline route that turns excess load away before any work is done"""
+    
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        policy: Optional[AdmissionPolicy] = getattr(self.endpoint, "admission", None)
+        if not ADMISSION_ENABLED or policy is None:
+            return handler
+        
+        route = self.path
+        
+        async def admission_handler(request: Request):
+            if policy.rate:
+                await admission.check_rate(route, request, policy)
+            if not policy.max_concurrent:
+                return await handler(request)
+            
+            admission.enter(route, policy)
+            try:
+                return await handler(request)
+            finally:
+                admission.leave(route)
+        
+        return admission_handler
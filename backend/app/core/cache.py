@@ -0,0 +1,270 @@
+"""
+Cache Utilities - In-Process TTL Caches for Hot Read Paths
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Set
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+import asyncio
+import json
+import time
+import os
+
+from app.core.compression import COMPRESSION_MINIMUM_SIZE, choose_encoding, compress
+from app.core.metrics import registry
+from app.core.singleflight import SingleFlight
+from app.core.tracing import span
+
+# Configuration from Environment Variables
+PUBLIC_CACHE_TTL = float(os.environ.get("PUBLIC_CACHE_TTL", 30))
+PUBLIC_CACHE_STALE_SECONDS = float(os.environ.get("PUBLIC_CACHE_STALE_SECONDS", 60))
+PUBLIC_CACHE_MAX_AGE = float(os.environ.get("PUBLIC_CACHE_MAX_AGE", 300))
+PUBLIC_CACHE_MAX_ENTRIES = int(os.environ.get("PUBLIC_CACHE_MAX_ENTRIES", 256))
+PROJECT_CACHE_TTL = float(os.environ.get("PROJECT_CACHE_TTL", 60))
+PROJECT_CACHE_MAX_ENTRIES = int(os.environ.get("PROJECT_CACHE_MAX_ENTRIES", 1024))
+
+class CacheEntry(NamedTuple):
+    value: Any
+    stored_at: float
+    fresh_until: float
+
+class CacheLookup(NamedTuple):
+    value: Any
+    age: float
+    stale: bool
+
+class TTLCache:
+    """Dict-backed cache whose entries expire after a fixed time-to-live
+
+    With `stale_seconds` set, an expired entry may still be served for that
+    long while a single background task refreshes it, but never once it is
+    older than `max_age`.
+    """
+    
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int = 256,
+        stale_seconds: float = 0,
+        max_age: Optional[float] = None
+    ):
+        self.ttl = ttl
+        self.stale_seconds = stale_seconds
+        self.max_age = max_age if max_age is not None else ttl + stale_seconds
+        self.max_entries = max_entries
+        self.generation = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.flight = SingleFlight()
+        self._entries: Dict[Hashable, CacheEntry] = {}
+    
+    def lookup(self, key: Hashable) -> Optional[CacheLookup]:
+        """Return a fresh or still-servable stale entry, or None"""
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        
+        if entry is None or not self._servable(entry, now):
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        
+        stale = entry.fresh_until <= now
+        if stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        
+        return CacheLookup(entry.value, now - entry.stored_at, stale)
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh entry or None"""
+        found = self.lookup(key)
+        if found is None or found.stale:
+            return None
+        return found.value
+    
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """Store a value unless the cache was invalidated since `generation`"""
+        if generation is not None and generation != self.generation:
+            return
+        
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            self._evict()
+        
+        now = time.monotonic()
+        self._entries[key] = CacheEntry(value, now, now + self.ttl)
+    
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or everything when no key is given"""
+        if key is None:
+            self._entries.clear()
+            self.generation += 1
+        else:
+            self._entries.pop(key, None)
+    
+    def _servable(self, entry: CacheEntry, now: float) -> bool:
+        if now - entry.stored_at >= self.max_age:
+            return False
+        return now < entry.fresh_until + self.stale_seconds
+    
+    def _evict(self):
+        """Make room by dropping unservable entries, then the oldest one"""
+        now = time.monotonic()
+        for key in [k for k, entry in self._entries.items() if not self._servable(entry, now)]:
+            del self._entries[key]
+        
+        if len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+    
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "generation": self.generation,
+            "single_flight": self.flight.stats()
+        }
+
+# Rendered JSON bodies of the public endpoints
+public_cache = TTLCache(
+    PUBLIC_CACHE_TTL,
+    PUBLIC_CACHE_MAX_ENTRIES,
+    stale_seconds=PUBLIC_CACHE_STALE_SECONDS,
+    max_age=PUBLIC_CACHE_MAX_AGE
+)
+
+# Project documents looked up by invite validation
+project_cache = TTLCache(PROJECT_CACHE_TTL, PROJECT_CACHE_MAX_ENTRIES)
+
+cache_entries = registry.gauge("cache_entries", "Entries held by an in-process cache", ["cache"])
+cache_lookups_total = registry.counter("cache_lookups_total", "Cache lookups by result", ["cache", "result"])
+cache_refreshes_total = registry.counter("cache_refreshes_total", "Background refreshes of stale entries", ["cache", "outcome"])
+single_flight_calls_total = registry.counter(
+    "single_flight_calls_total", "Cache fills run or coalesced onto an in-flight one", ["cache", "group", "outcome"]
+)
+
+def _collect_cache_metrics():
+    """Mirror the public cache counters into the metrics registry"""
+    stats = public_cache.stats()
+    cache_entries.set(stats["entries"], cache="public")
+    for result, count in (("hit", stats["hits"]), ("stale", stats["stale_hits"]), ("miss", stats["misses"])):
+        cache_lookups_total.set(count, cache="public", result=result)
+    cache_refreshes_total.set(stats["refreshes"] - stats["refresh_errors"], cache="public", outcome="success")
+    cache_refreshes_total.set(stats["refresh_errors"], cache="public", outcome="failure")
+    single_flight_calls_total.set(stats["single_flight"]["executions"], cache="public", group="", outcome="executed")
+    for group, count in stats["single_flight"]["coalesced_by_group"].items():
+        single_flight_calls_total.set(count, cache="public", group=group, outcome="coalesced")
+
+registry.add_collector(_collect_cache_metrics)
+
+class CachedBody:
+    """A rendered response body plus its compressed variants, each made once"""
+    
+    __slots__ = ("body", "encoded")
+    
+    def __init__(self, body: bytes):
+        self.body = body
+        self.encoded: Dict[str, bytes] = {}
+    
+    def encode(self, encoding: str) -> bytes:
+        if encoding not in self.encoded:
+            self.encoded[encoding] = compress(self.body, encoding)
+        return self.encoded[encoding]
+
+class CachedJSONResponse(Response):
+    """JSON response that picks a stored compressed variant per request"""
+    
+    media_type = "application/json"
+    
+    def __init__(self, entry: CachedBody, headers: Optional[dict] = None):
+        self.entry = entry
+        super().__init__(content=entry.body, headers=headers)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if len(self.entry.body) >= COMPRESSION_MINIMUM_SIZE:
+            encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+            if encoding:
+                self.body = self.entry.encode(encoding)
+                self.headers["Content-Encoding"] = encoding
+                self.headers["Content-Length"] = str(len(self.body))
+            self.headers.add_vary_header("Accept-Encoding")
+        
+        await super().__call__(scope, receive, send)
+
+# Keep strong references to background refreshes until they finish
+_background_refreshes: Set[asyncio.Task] = set()
+
+def render_json(data: Any) -> bytes:
+    """Serialize a response payload the same way FastAPI's JSONResponse does"""
+    with span("serialize.json") as serialize:
+        body = json.dumps(
+            jsonable_encoder(data),
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":")
+        ).encode("utf-8")
+        if serialize:
+            serialize.set_attribute("response.bytes", len(body))
+        return body
+
+def cache_control(cache: TTLCache, age: float = 0) -> str:
+    """Cache-Control header matching the cache's own freshness rules"""
+    max_age = max(0, int(cache.ttl - age))
+    stale = int(min(cache.stale_seconds, max(0, cache.max_age - cache.ttl)))
+    
+    if not stale:
+        return f"public, max-age={max_age}"
+    return f"public, max-age={max_age}, stale-while-revalidate={stale}"
+
+async def cached_json_response(
+    cache: TTLCache,
+    key: Hashable,
+    producer: Callable[[], Awaitable[Any]]
+) -> Response:
+    """Serve a rendered JSON body from cache, producing it once per concurrent miss"""
+    found = cache.lookup(key)
+    
+    if found is None:
+        entry = await cache.flight.do(key, lambda: _render_into(cache, key, producer))
+        age = 0
+    else:
+        entry, age = found.value, found.age
+        if found.stale and not cache.flight.pending(key):
+            task = asyncio.ensure_future(_refresh(cache, key, producer))
+            _background_refreshes.add(task)
+            task.add_done_callback(_background_refreshes.discard)
+    
+    return CachedJSONResponse(entry, headers={"Cache-Control": cache_control(cache, age)})
+
+async def _render_into(
+    cache: TTLCache,
+    key: Hashable,
+    producer: Callable[[], Awaitable[Any]]
+) -> CachedBody:
+    """Produce, render and store one cache entry"""
+    generation = cache.generation
+    entry = CachedBody(render_json(await producer()))
+    cache.set(key, entry, generation)
+    return entry
+
+async def _refresh(
+    cache: TTLCache,
+    key: Hashable,
+    producer: Callable[[], Awaitable[Any]]
+):
+    """Re-render a stale entry in the background"""
+    cache.refreshes += 1
+    try:
+        await cache.flight.do(key, lambda: _render_into(cache, key, producer))
+    except Exception as e:
+        cache.refresh_errors += 1
+        print(f"⚠️ Background cache refresh failed for {key}: {e}")
@@ -0,0 +1,177 @@
+"""
+Compression Utilities - gzip/brotli Encoding, Negotiation & Middleware
+"""
+
+from typing import List, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import asyncio
+import gzip
+import zlib
+import os
+
+try:
+    import brotli
+except ImportError:  # optional - fall back to gzip only
+    brotli = None
+
+# Configuration from Environment Variables
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", 5))
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get("COMPRESSION_MINIMUM_SIZE", 1024))
+
+# Bodies above this size are compressed off the event loop
+COMPRESSION_THREAD_SIZE = 256 * 1024
+
+# Content types that must be flushed as produced, or are already compressed
+SKIPPED_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/zip", "application/gzip")
+
+def available_encodings() -> List[str]:
+    """Encodings this worker can produce, most preferred first"""
+    return ["br", "gzip"] if brotli else ["gzip"]
+
+def compress(body: bytes, encoding: str, precompress: bool = False) -> bytes:
+    """Compress a body; `precompress` trades CPU for size on write-once files"""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if precompress else BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9 if precompress else GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+def choose_encoding(accept_encoding: str, offered: Optional[List[str]] = None) -> Optional[str]:
+    """Pick the best offered encoding the client accepts, or None for identity"""
+    offered = offered if offered is not None else available_encodings()
+    accepted = {}
+    
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip()] = quality
+    
+    for encoding in offered:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+class _BrotliStream:
+    """Give brotli's incremental compressor the zlib compressobj interface"""
+    
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+    
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+def stream_compressor(encoding: str):
+    """Incremental compressor for bodies sent in several chunks"""
+    if encoding == "br":
+        return _BrotliStream()
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+class CompressionMiddleware:
+    """Compress responses above a size threshold with the client's preferred encoding
+    
+    Responses that already carry a Content-Encoding (cached entries and
+    snapshots ship precompressed bytes) and event streams pass through untouched.
+    """
+    
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        await self.app(scope, receive, _CompressingSend(send, encoding, self.minimum_size))
+
+class _CompressingSend:
+    """ASGI send wrapper that compresses the response body on the way out"""
+    
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.compressor = None
+    
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if (
+                "content-encoding" in headers
+                or message["status"] < 200
+                or message["status"] in (204, 304)
+                or content_type.startswith(SKIPPED_CONTENT_TYPES)
+            ):
+                self.passthrough = True
+                await self.send(message)
+            else:
+                self.start_message = message
+            return
+        
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+        
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        
+        if self.compressor is not None:
+            chunk = self.compressor.compress(body)
+            if not more_body:
+                chunk += self.compressor.flush()
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            return
+        
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        
+        if not more_body:
+            # Whole body in a single message
+            if len(body) < self.minimum_size:
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            
+            if len(body) >= COMPRESSION_THREAD_SIZE:
+                body = await asyncio.to_thread(compress, body, self.encoding)
+            else:
+                body = compress(body, self.encoding)
+            
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await self.send(self.start_message)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+        
+        # Streaming body - compress chunk by chunk
+        self.compressor = stream_compressor(self.encoding)
+        del headers["Content-Length"]
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        await self.send(self.start_message)
+        await self.send({
+            "type": "http.response.body",
+            "body": self.compressor.compress(body),
+            "more_body": True
+        })
@@ -6,6 +6,8 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from typing import Optional
 import os
 
+from app.core.monitoring import command_monitor, pool_monitor
+
 class Database:
     client: Optional[AsyncIOMotorClient] = None
     db = None
@@ -15,23 +17,22 @@ db = Database()
 # Environment Variables
 MONGODB_URL = os.environ.get("MONGODB_URL", "")
 DATABASE_NAME = os.environ.get("DATABASE_NAME", "testimonial_system")
+MONGODB_MIN_POOL_SIZE = int(os.environ.get("MONGODB_MIN_POOL_SIZE", 5))  # connections opened ahead of traffic
+TOKEN_RETENTION_MODE = os.environ.get("TOKEN_RETENTION_MODE", "archive").lower()  # archive | ttl | off
+TOKEN_RETENTION_DAYS = float(os.environ.get("TOKEN_RETENTION_DAYS", 90))
 
 async def connect_to_mongo():
     """Connect to MongoDB Atlas"""
     if not MONGODB_URL:
         raise ValueError("MONGODB_URL environment variable is not set")
     
-    db.client = AsyncIOMotorClient(MONGODB_URL)
+    db.client = AsyncIOMotorClient(
+        MONGODB_URL,
+        minPoolSize=MONGODB_MIN_POOL_SIZE,
+        event_listeners=[command_monitor, pool_monitor]
+    )
     db.db = db.client[DATABASE_NAME]
     
-    # Create indexes for better performance
-    await db.db.projects.create_index("created_at")
-    await db.db.tokens.create_index("token", unique=True)
-    await db.db.tokens.create_index("expires_at")
-    await db.db.testimonials.create_index("project_id")
-    await db.db.testimonials.create_index("created_at")
-    await db.db.admins.create_index("username", unique=True)
-    
     print("✅ Connected to MongoDB Atlas")
 
 async def close_mongo_connection():
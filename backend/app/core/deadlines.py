@@ -0,0 +1,103 @@
+"""
+Request Deadlines - Per-Route Time Limits Propagated to MongoDB as maxTimeMS
+"""
+
+from typing import Awaitable, Callable, Optional, Set, TypeVar
+from fastapi import HTTPException, Request, status
+from pymongo.errors import PyMongoError
+import asyncio
+import pymongo
+import time
+import os
+
+from app.core.metrics import registry
+from app.core.tracing import TracedRoute
+
+# Configuration from Environment Variables
+REQUEST_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", 10))  # 0 disables the default
+
+request_deadline_exceeded_total = registry.counter(
+    "request_deadline_exceeded_total",
+    "Requests cut off at their deadline, by where the time ran out",
+    ["method", "route", "source"]
+)
+
+T = TypeVar("T")
+
+_uninterrupted: Set[asyncio.Task] = set()
+
+def _forget(task: asyncio.Task):
+    _uninterrupted.discard(task)
+    if not task.cancelled():
+        task.exception()  # already reported to the request if it was still waiting
+
+async def uninterrupted(work: Awaitable[T]) -> T:
+    """Run writes that must complete together, even if the request deadline passes
+
+    The work is shielded from the deadline's cancellation and runs without its
+    MongoDB time limit. The client may still get a 503, but the writes finish
+    (or undo themselves) instead of stopping halfway.
+    """
+    async def run() -> T:
+        # timeout(None) lifts the request's client-side timeout for these commands
+        with pymongo.timeout(None):
+            return await work
+    
+    task = asyncio.ensure_future(run())
+    _uninterrupted.add(task)
+    task.add_done_callback(_forget)
+    return await asyncio.shield(task)
+
+def deadline(seconds: Optional[float]) -> Callable:
+    """Override the request deadline of a route; None lets it run unbounded
+
+    Place it below the router decorator:
+
+    @router.get("/stats")
+    @deadline(3)
+    async def get_public_stats(): ...
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.deadline = seconds
+        return endpoint
+    return decorator
+
+def route_deadline(route) -> Optional[float]:
+    """The deadline declared on a route's endpoint, else the configured default"""
+    seconds = getattr(getattr(route, "endpoint", None), "deadline", REQUEST_DEADLINE_SECONDS)
+    return seconds or None
+
+class DeadlineRoute(TracedRoute):
+    """Traced route whose handler runs under the route's deadline
+
+    The remaining time reaches every MongoDB operation through pymongo's
+    client-side timeout, which sets maxTimeMS on each command, so the server
+    stops work the client has given up on. If the time runs out the handler
+    is cancelled and the request answered with 503.
+    """
+    
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        seconds = route_deadline(self)
+        if seconds is None:
+            return handler
+        
+        async def deadline_handler(request: Request):
+            started = time.monotonic()
+            try:
+                # Set the Mongo timeout first: the handler's task copies the context it runs in
+                with pymongo.timeout(seconds):
+                    return await asyncio.wait_for(handler(request), seconds)
+            except Exception as e:
+                # Handlers that catch broadly may turn the timeout into another error
+                source = "mongo" if isinstance(e, PyMongoError) and e.timeout else "handler"
+                if source == "handler" and time.monotonic() - started < seconds:
+                    raise
+                
+                request_deadline_exceeded_total.inc(method=request.method, route=self.path, source=source)
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Request deadline exceeded"
+                ) from e
+        
+        return deadline_handler
@@ -0,0 +1,212 @@
+"""
+Event Utilities - MongoDB Change Streams & In-Process Event Broker
+"""
+
+from typing import Callable, List, Optional, Set
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+import asyncio
+import os
+
+from app.core.database import get_database
+from app.schemas.schemas import PublicTestimonialResponse
+
+# Configuration from Environment Variables
+CHANGE_STREAMS_ENABLED = os.environ.get("CHANGE_STREAMS_ENABLED", "true").lower() == "true"
+CHANGE_STREAM_RETRY_SECONDS = float(os.environ.get("CHANGE_STREAM_RETRY_SECONDS", 5))
+STREAM_QUEUE_SIZE = int(os.environ.get("STREAM_QUEUE_SIZE", 100))
+
+# Collections whose changes affect what the public endpoints render,
+# plus invite tokens for the per-worker token filter
+PUBLIC_COLLECTIONS = ["testimonials", "projects"]
+WATCHED_COLLECTIONS = PUBLIC_COLLECTIONS + ["tokens"]
+
+# The token filter only needs issuance and removal; status updates (submits,
+# expiry sweeps) would cost every worker an event and a document lookup
+TOKEN_OPERATIONS = ["insert", "delete"]
+
+# Server error codes meaning change streams will never work on this deployment
+CHANGE_STREAMS_UNSUPPORTED = {40573, 136}
+CHANGE_STREAM_HISTORY_LOST = 286
+
+class EventBroker:
+    """Fan out events to in-process listeners and streaming subscribers"""
+    
+    def __init__(self):
+        self._listeners: List[Callable[[dict], None]] = []
+        self._subscribers: Set[asyncio.Queue] = set()
+    
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+    
+    def add_listener(self, callback: Callable[[dict], None]):
+        """Register a synchronous callback invoked for every event"""
+        self._listeners.append(callback)
+    
+    def subscribe(self) -> asyncio.Queue:
+        """Open a bounded queue that receives every published event"""
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Stop delivering events to a queue"""
+        self._subscribers.discard(queue)
+    
+    def publish(self, event: dict):
+        """Deliver an event to all listeners and subscribers"""
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"⚠️ Event listener failed: {e}")
+        
+        for queue in list(self._subscribers):
+            if queue.full():
+                # Slow consumer - drop its oldest event instead of blocking everyone
+                queue.get_nowait()
+            queue.put_nowait(event)
+    
+    def close(self):
+        """Tell every subscriber to finish its stream"""
+        for queue in list(self._subscribers):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+        self._subscribers.clear()
+
+broker = EventBroker()
+
+class ChangeWatcher:
+    """Background task tailing a change stream on the watched collections"""
+    task: Optional[asyncio.Task] = None
+    running: bool = False
+
+watcher = ChangeWatcher()
+
+def _is_newly_visible(change: dict) -> bool:
+    """Whether a testimonial change just published or featured a public testimonial"""
+    document = change.get("fullDocument")
+    if not document or not document.get("is_published", True):
+        return False
+    
+    if change["operationType"] in ("insert", "replace"):
+        return True
+    
+    updated = change.get("updateDescription", {}).get("updatedFields", {})
+    if updated.get("is_published") is True:
+        return True
+    return updated.get("is_featured") is True
+
+async def _public_testimonial_event(document: dict) -> dict:
+    """Build the public payload pushed to stream subscribers"""
+    db = get_database()
+    
+    try:
+        project = await db.projects.find_one(
+            {"_id": ObjectId(document["project_id"])},
+            {"name": 1}
+        )
+        project_name = project["name"] if project else "Project"
+    except Exception:
+        project_name = "Project"
+    
+    testimonial = PublicTestimonialResponse(
+        id=str(document["_id"]),
+        client_name=document["client_name"],
+        client_role=document.get("client_role"),
+        client_company=document.get("client_company"),
+        client_avatar=document.get("client_avatar"),
+        rating=document["rating"],
+        title=document["title"],
+        content=document["content"],
+        project_name=project_name,
+        is_featured=document.get("is_featured", False),
+        created_at=document["created_at"]
+    )
+    
+    return {"type": "testimonial", "data": testimonial.model_dump(mode="json")}
+
+def _dispatch_token(change: dict):
+    """Publish token issuance and removal; tokens never affect public pages"""
+    operation = change["operationType"]
+    
+    if operation == "insert":
+        broker.publish({"type": "token", "op": "insert", "token": change["fullDocument"]["token"]})
+    elif operation == "delete":
+        broker.publish({"type": "token", "op": "delete"})
+
+async def _dispatch(change: dict):
+    """Translate a raw change document into broker events"""
+    collection = change["ns"]["coll"]
+    if collection == "tokens":
+        _dispatch_token(change)
+        return
+    
+    broker.publish({"type": "invalidate", "collection": collection})
+    
+    if collection == "testimonials" and _is_newly_visible(change):
+        broker.publish(await _public_testimonial_event(change["fullDocument"]))
+
+async def watch_changes():
+    """Tail the change stream, resuming after transient failures"""
+    pipeline = [{"$match": {"$and": [
+        {"$or": [
+            {"ns.coll": {"$in": PUBLIC_COLLECTIONS}},
+            {"ns.coll": "tokens", "operationType": {"$in": TOKEN_OPERATIONS}}
+        ]},
+        # Bulk-imported history is not live news and would flood every worker;
+        # the importing worker invalidates its caches, the others catch up at their TTL
+        {"$or": [{"operationType": {"$ne": "insert"}}, {"fullDocument.import_ref": {"$exists": False}}]}
+    ]}}]
+    resume_token = None
+    
+    while True:
+        try:
+            async with get_database().watch(
+                pipeline,
+                full_document="updateLookup",
+                resume_after=resume_token
+            ) as stream:
+                watcher.running = True
+                print("👀 Watching changes on " + ", ".join(WATCHED_COLLECTIONS))
+                
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    await _dispatch(change)
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            watcher.running = False
+            if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                print(f"⚠️ Change streams unavailable, caches fall back to TTL expiry: {e}")
+                return
+            if e.code == CHANGE_STREAM_HISTORY_LOST:
+                resume_token = None
+            print(f"⚠️ Change stream interrupted: {e}")
+        except Exception as e:
+            watcher.running = False
+            print(f"⚠️ Change stream interrupted: {e}")
+        
+        # Events may have been missed while disconnected
+        broker.publish({"type": "invalidate", "collection": None})
+        await asyncio.sleep(CHANGE_STREAM_RETRY_SECONDS)
+
+def start_change_watcher():
+    """Start the change-stream watcher in the background"""
+    if CHANGE_STREAMS_ENABLED and watcher.task is None:
+        watcher.task = asyncio.create_task(watch_changes())
+
+async def stop_change_watcher():
+    """Stop the watcher and close open event streams"""
+    broker.close()
+    
+    if watcher.task:
+        watcher.task.cancel()
+        try:
+            await watcher.task
+        except asyncio.CancelledError:
+            pass
+        watcher.task = None
+        watcher.running = False
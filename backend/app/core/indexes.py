@@ -0,0 +1,152 @@
+"""
+Index Manifest - Declared MongoDB Indexes, Applied by `manage.py indexes` and Checked at Boot
+"""
+
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Tuple
+from pymongo.errors import OperationFailure
+import hashlib
+import json
+import socket
+import os
+
+from app.core.database import TOKEN_RETENTION_DAYS, TOKEN_RETENTION_MODE
+
+# Configuration from Environment Variables
+INDEX_BOOT_MODE = os.environ.get("INDEX_BOOT_MODE", "check").lower()  # check, create (build at boot) or off
+
+MANIFEST_ID = "indexes"
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    options: Dict[str, object] = {}
+    
+    @property
+    def name(self) -> str:
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+def _keys(*fields) -> Tuple[Tuple[str, int], ...]:
+    """Key pattern from field names or (field, direction) pairs"""
+    return tuple((field, 1) if isinstance(field, str) else field for field in fields)
+
+def _token_expiry_options() -> dict:
+    # Under TTL retention the expiry index also deletes long-expired tokens
+    if TOKEN_RETENTION_MODE == "ttl":
+        return {"expireAfterSeconds": int(TOKEN_RETENTION_DAYS * 86400)}
+    return {}
+
+def index_manifest() -> List[IndexSpec]:
+    """Every index the application relies on"""
+    return [
+        IndexSpec("projects", _keys("created_at")),
+        # Public list filters: equality fields first, then the sort, then the rating range
+        IndexSpec("projects", _keys("tags", ("created_at", -1))),
+        IndexSpec("projects", _keys("name")),
+        # Only projects being deleted are indexed, so excluding them costs one tiny lookup
+        IndexSpec("projects", _keys("deleting"), {"partialFilterExpression": {"deleting": True}}),
+        IndexSpec("tokens", _keys("token"), {"unique": True}),
+        IndexSpec("tokens", _keys("expires_at"), _token_expiry_options()),
+        IndexSpec("tokens_archive", _keys("project_id", ("created_at", -1))),
+        IndexSpec("tokens_archive", _keys("created_at")),
+        IndexSpec("testimonials", _keys("project_id")),
+        IndexSpec("testimonials", _keys("created_at")),
+        IndexSpec("testimonials", _keys("is_published", "is_featured", ("created_at", -1))),
+        IndexSpec("testimonials", _keys("is_published", ("created_at", -1), "rating")),
+        IndexSpec("testimonials", _keys("is_published", ("rating", -1), ("created_at", -1))),
+        IndexSpec("testimonials", _keys("project_id", "is_published", ("created_at", -1))),
+        # Tag or status filters narrow to project ids; this serves them sorted by rating
+        IndexSpec("testimonials", _keys("project_id", "is_published", ("rating", -1), ("created_at", -1))),
+        # Lets a resumed bulk import skip rows an interrupted run already wrote
+        IndexSpec(
+            "testimonials", _keys("import_ref.id", "import_ref.row"),
+            {"unique": True, "partialFilterExpression": {"import_ref": {"$exists": True}}}
+        ),
+        IndexSpec("import_errors", _keys("import_id", "row")),
+        IndexSpec("admins", _keys("username"), {"unique": True}),
+        IndexSpec("jobs", _keys("status", "run_at")),
+        IndexSpec("jobs", _keys("created_at")),
+        IndexSpec("spent_tokens", _keys("expires_at"), {"expireAfterSeconds": 0}),
+        IndexSpec("rate_limits", _keys("expires_at"), {"expireAfterSeconds": 0}),
+    ]
+
+def manifest_version(manifest: List[IndexSpec]) -> str:
+    """Short digest that changes whenever an index is added, removed or altered"""
+    encoded = json.dumps([[spec.collection, spec.keys, spec.options] for spec in manifest], sort_keys=True)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:12]
+
+async def _create(db, spec: IndexSpec):
+    try:
+        await db[spec.collection].create_index(list(spec.keys), **spec.options)
+    except OperationFailure:
+        if "expireAfterSeconds" not in spec.options:
+            raise
+        # A plain or differently timed index exists - convert it in place
+        await db.command(
+            "collMod", spec.collection,
+            index={"keyPattern": dict(spec.keys), "expireAfterSeconds": spec.options["expireAfterSeconds"]}
+        )
+
+async def ensure_indexes(db) -> List[str]:
+    """Create any missing index and record the manifest version; returns indexes that conflict"""
+    manifest = index_manifest()
+    conflicts = []
+    
+    for spec in manifest:
+        try:
+            await _create(db, spec)
+        except OperationFailure as e:
+            conflicts.append(f"{spec.collection}.{spec.name}")
+            print(f"⚠️ {spec.collection}.{spec.name} exists with other options - drop it to apply the manifest: {e}")
+    
+    if not conflicts:
+        await db.schema_state.update_one(
+            {"_id": MANIFEST_ID},
+            {"$set": {
+                "version": manifest_version(manifest),
+                "indexes": len(manifest),
+                "applied_by": f"{socket.gethostname()}:{os.getpid()}",
+                "applied_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+    return conflicts
+
+async def diff_indexes(db) -> Dict[str, List[str]]:
+    """Compare the live indexes with the manifest, collection by collection"""
+    manifest = index_manifest()
+    report = {"missing": [], "conflicting": [], "unlisted": []}
+    
+    for collection in sorted({spec.collection for spec in manifest}):
+        live = {}
+        async for index in db[collection].list_indexes():
+            live[tuple((field, int(direction)) for field, direction in index["key"].items())] = index
+        
+        for spec in (spec for spec in manifest if spec.collection == collection):
+            index = live.pop(spec.keys, None)
+            if index is None:
+                report["missing"].append(f"{collection}.{spec.name}")
+            elif any(index.get(option) != value for option, value in spec.options.items()) or (
+                "expireAfterSeconds" in index and "expireAfterSeconds" not in spec.options
+            ):
+                report["conflicting"].append(f"{collection}.{spec.name}")
+        
+        report["unlisted"] += [f"{collection}.{index['name']}" for index in live.values() if index["name"] != "_id_"]
+    
+    return report
+
+async def check_index_manifest(db) -> bool:
+    """Boot-time check: one read comparing the recorded manifest version with this build's"""
+    if INDEX_BOOT_MODE == "off":
+        return True
+    if INDEX_BOOT_MODE == "create":
+        return not await ensure_indexes(db)
+    
+    expected = manifest_version(index_manifest())
+    state = await db.schema_state.find_one({"_id": MANIFEST_ID})
+    if state and state.get("version") == expected:
+        return True
+    
+    recorded = state.get("version") if state else "none"
+    print(f"⚠️ Index manifest {expected} not applied (database has {recorded}) - run `python manage.py indexes`")
+    return False
@@ -0,0 +1,309 @@
+"""
+Job Queue - Durable MongoDB-Backed Background Jobs with Leases & Retries
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+import asyncio
+import random
+import socket
+import os
+
+from app.core.database import get_database
+from app.core.tracing import current_traceparent, root_span
+
+# Configuration from Environment Variables
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_WORKERS_IN_PROCESS = os.environ.get("JOB_WORKERS_IN_PROCESS", "true").lower() == "true"
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", 60))
+JOB_HEARTBEAT_SECONDS = int(os.environ.get("JOB_HEARTBEAT_SECONDS", 15))
+JOB_HEARTBEAT_RETRY_SECONDS = float(os.environ.get("JOB_HEARTBEAT_RETRY_SECONDS", 1))
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", 2))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 5))
+JOB_RETRY_BASE_SECONDS = float(os.environ.get("JOB_RETRY_BASE_SECONDS", 10))
+JOB_RETRY_MAX_SECONDS = float(os.environ.get("JOB_RETRY_MAX_SECONDS", 600))
+
+class JobCancelled(Exception):
+    """The job was cancelled or taken over while its handler ran"""
+
+class Job:
+    """A claimed job as seen by its handler"""
+    
+    def __init__(self, doc: dict):
+        self.id: ObjectId = doc["_id"]
+        self.type: str = doc["type"]
+        self.payload: dict = doc.get("payload", {})
+        self.progress: dict = doc.get("progress", {})
+        self.attempts: int = doc.get("attempts", 0)
+        self.worker_id: Optional[str] = doc.get("worker_id")
+    
+    async def check_cancelled(self):
+        """Raise JobCancelled if this worker no longer runs the job; call it between units of work"""
+        db = get_database()
+        
+        running = await db.jobs.find_one({"_id": self.id, "worker_id": self.worker_id, "status": "running"}, {"_id": 1})
+        if running is None:
+            raise JobCancelled(f"Job {self.id} was cancelled or taken over")
+    
+    async def report_progress(self, **progress):
+        """Merge counters into the job's progress document"""
+        db = get_database()
+        self.progress.update(progress)
+        
+        update = {f"progress.{key}": value for key, value in progress.items()}
+        update["updated_at"] = datetime.utcnow()
+        await db.jobs.update_one({"_id": self.id}, {"$set": update})
+
+JobHandler = Callable[[Job], Awaitable[Any]]
+
+_handlers: Dict[str, JobHandler] = {}
+_cancel_hooks: Dict[str, JobHandler] = {}
+
+def job_handler(job_type: str):
+    """Register the coroutine that runs jobs of `job_type`"""
+    def register(handler: JobHandler) -> JobHandler:
+        _handlers[job_type] = handler
+        return handler
+    return register
+
+def job_cancel_hook(job_type: str):
+    """Register the coroutine that undoes a cancelled job's half-done state"""
+    def register(hook: JobHandler) -> JobHandler:
+        _cancel_hooks[job_type] = hook
+        return hook
+    return register
+
+async def job_cancelled(job_doc: dict):
+    """Run the cancel hook of a job that was just cancelled, if its type has one"""
+    hook = _cancel_hooks.get(job_doc["type"])
+    if hook:
+        await hook(Job(job_doc))
+
+async def enqueue_job(
+    job_type: str,
+    payload: dict,
+    created_by: Optional[str] = None,
+    job_id: Optional[ObjectId] = None,
+    max_attempts: int = JOB_MAX_ATTEMPTS
+) -> ObjectId:
+    """Queue a job for the next free worker"""
+    db = get_database()
+    now = datetime.utcnow()
+    
+    job_doc = {
+        "_id": job_id or ObjectId(),
+        "type": job_type,
+        "status": "queued",
+        "payload": payload,
+        "progress": {},
+        "result": None,
+        "error": None,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_at": now,
+        "lease_until": None,
+        "worker_id": None,
+        "created_by": created_by,
+        "traceparent": current_traceparent(),
+        "created_at": now,
+        "updated_at": now,
+        "started_at": None,
+        "finished_at": None
+    }
+    
+    await db.jobs.insert_one(job_doc)
+    worker_pool.wake()
+    return job_doc["_id"]
+
+async def claim_job(worker_id: str) -> Optional[dict]:
+    """Atomically take the next due job, or one whose lease has lapsed"""
+    db = get_database()
+    now = datetime.utcnow()
+    
+    return await db.jobs.find_one_and_update(
+        {
+            "type": {"$in": list(_handlers)},
+            "$or": [
+                {"status": "queued", "run_at": {"$lte": now}},
+                {"status": "running", "lease_until": {"$lt": now}}
+            ]
+        },
+        {
+            "$set": {
+                "status": "running",
+                "worker_id": worker_id,
+                "lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                "started_at": now,
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("run_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter"""
+    delay = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+async def _finish(job_doc: dict, worker_id: str, update: dict):
+    """Record the outcome, unless the job was cancelled or taken over meanwhile"""
+    db = get_database()
+    now = datetime.utcnow()
+    
+    await db.jobs.update_one(
+        {"_id": job_doc["_id"], "worker_id": worker_id, "status": "running"},
+        {"$set": {**update, "lease_until": None, "updated_at": now}}
+    )
+
+async def _heartbeat(job_id: ObjectId, worker_id: str, lease_until: datetime, work: asyncio.Task, state: dict):
+    """Extend the lease while the handler runs; stop it if the lease is lost
+
+    A renewal that fails on a database error is retried until the current
+    lease runs out - only then could another worker claim the job.
+    """
+    db = get_database()
+    delay = JOB_HEARTBEAT_SECONDS
+    
+    while not work.done():
+        await asyncio.sleep(delay)
+        renewed_until = datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)
+        try:
+            result = await db.jobs.update_one(
+                {"_id": job_id, "worker_id": worker_id, "status": "running"},
+                {"$set": {"lease_until": renewed_until}}
+            )
+        except PyMongoError as e:
+            remaining = (lease_until - datetime.utcnow()).total_seconds()
+            if remaining > 0:
+                delay = min(JOB_HEARTBEAT_RETRY_SECONDS, remaining)
+                continue
+            print(f"⚠️ Job {job_id} lease could not be renewed: {e}")
+            state["lease_lost"] = True
+            work.cancel()
+            return
+        
+        if result.matched_count == 0:
+            # Cancelled by an admin, or another worker took over
+            state["lease_lost"] = True
+            work.cancel()
+            return
+        lease_until = renewed_until
+        delay = JOB_HEARTBEAT_SECONDS
+
+async def _run_handler(job: Job, traceparent: Optional[str]):
+    """Run a job's handler in a span continuing the trace that enqueued it"""
+    with root_span(f"job {job.type}", traceparent, "consumer", **{"job.id": str(job.id), "job.attempt": job.attempts}):
+        return await _handlers[job.type](job)
+
+async def run_claimed_job(job_doc: dict, worker_id: str):
+    """Run one claimed job to completion, retry or failure"""
+    job = Job(job_doc)
+    max_attempts = job_doc.get("max_attempts", JOB_MAX_ATTEMPTS)
+    
+    if job.attempts > max_attempts:
+        await _finish(job_doc, worker_id, {
+            "status": "failed",
+            "error": job_doc.get("error") or "Lease expired too many times",
+            "finished_at": datetime.utcnow()
+        })
+        return
+    
+    work = asyncio.ensure_future(_run_handler(job, job_doc.get("traceparent")))
+    state = {"lease_lost": False}
+    lease_until = job_doc.get("lease_until") or datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)
+    heartbeat = asyncio.ensure_future(_heartbeat(job.id, worker_id, lease_until, work, state))
+    
+    try:
+        result = await work
+        await _finish(job_doc, worker_id, {
+            "status": "completed",
+            "result": result,
+            "error": None,
+            "finished_at": datetime.utcnow()
+        })
+        print(f"✅ Job {job.id} ({job.type}) completed")
+    except JobCancelled:
+        print(f"🛑 Job {job.id} ({job.type}) stopped - cancelled or taken over")
+    except asyncio.CancelledError:
+        if state["lease_lost"]:
+            print(f"🛑 Job {job.id} ({job.type}) stopped - lease lost or cancelled")
+            return
+        # Worker shutting down - hand the job straight back to the queue
+        await _finish(job_doc, worker_id, {"status": "queued", "run_at": datetime.utcnow()})
+        raise
+    except Exception as e:
+        if job.attempts < max_attempts:
+            delay = retry_delay(job.attempts)
+            await _finish(job_doc, worker_id, {
+                "status": "queued",
+                "error": str(e),
+                "run_at": datetime.utcnow() + timedelta(seconds=delay)
+            })
+            print(f"⚠️ Job {job.id} ({job.type}) failed, retrying in {delay:.0f}s: {e}")
+        else:
+            await _finish(job_doc, worker_id, {
+                "status": "failed",
+                "error": str(e),
+                "finished_at": datetime.utcnow()
+            })
+            print(f"❌ Job {job.id} ({job.type}) failed: {e}")
+    finally:
+        heartbeat.cancel()
+
+class WorkerPool:
+    """N concurrent workers polling the jobs collection"""
+    
+    def __init__(self):
+        self.tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+    
+    def start(self, workers: int = JOB_WORKERS):
+        if self.tasks:
+            return
+        
+        self._wake = asyncio.Event()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self.tasks = [
+            asyncio.create_task(self._work(f"{prefix}:{n}"))
+            for n in range(workers)
+        ]
+        print(f"⚙️ Started {workers} job workers")
+    
+    def wake(self):
+        """Skip the poll delay after a job is queued from this process"""
+        if self._wake:
+            self._wake.set()
+    
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+    
+    async def wait(self):
+        await asyncio.gather(*self.tasks)
+    
+    async def _work(self, worker_id: str):
+        while True:
+            try:
+                job_doc = await claim_job(worker_id)
+            except Exception as e:
+                print(f"⚠️ Job claim failed: {e}")
+                job_doc = None
+            
+            if job_doc:
+                await run_claimed_job(job_doc, worker_id)
+                continue
+            
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+worker_pool = WorkerPool()
@@ -0,0 +1,154 @@
+"""
+Migrations - Versioned, Resumable Data Migrations Run Outside the Request Path
+"""
+
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import socket
+import os
+
+# Configuration from Environment Variables
+MIGRATION_BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", 500))
+MIGRATION_BATCH_PAUSE_SECONDS = float(os.environ.get("MIGRATION_BATCH_PAUSE_SECONDS", 0.2))
+MIGRATION_LEASE_SECONDS = int(os.environ.get("MIGRATION_LEASE_SECONDS", 120))
+
+class MigrationLockLost(Exception):
+    """Another runner took over the migration after our lease lapsed"""
+
+class MigrationContext:
+    """State handed to a running migration: database, checkpoint and progress"""
+    
+    def __init__(self, db, doc: dict, owner: str):
+        self.db = db
+        self.version: str = doc["_id"]
+        self.checkpoint: dict = doc.get("checkpoint") or {}
+        self.progress: dict = doc.get("progress") or {}
+        self.owner = owner
+    
+    async def save(self, **progress):
+        """Persist the checkpoint and merge counters, renewing this runner's lease"""
+        self.progress.update(progress)
+        now = datetime.utcnow()
+        
+        result = await self.db.migrations.update_one(
+            {"_id": self.version, "owner": self.owner, "status": "running"},
+            {"$set": {
+                "checkpoint": self.checkpoint,
+                "progress": self.progress,
+                "lease_until": now + timedelta(seconds=MIGRATION_LEASE_SECONDS),
+                "updated_at": now
+            }}
+        )
+        if result.matched_count == 0:
+            raise MigrationLockLost(f"Migration {self.version} is now run by another process")
+    
+    async def pause(self):
+        """Give other traffic room on the primary between batches"""
+        await asyncio.sleep(MIGRATION_BATCH_PAUSE_SECONDS)
+
+class Migration(NamedTuple):
+    version: str
+    description: str
+    run: Callable[[MigrationContext], Awaitable[Optional[dict]]]
+
+_migrations: Dict[str, Migration] = {}
+
+def migration(version: str, description: str):
+    """Register a migration; versions run in sorted order, each exactly once"""
+    def register(fn: Callable[[MigrationContext], Awaitable[Optional[dict]]]):
+        _migrations[version] = Migration(version, description, fn)
+        return fn
+    return register
+
+async def migration_status(db) -> List[dict]:
+    """Every registered migration with its recorded state"""
+    docs = {doc["_id"]: doc async for doc in db.migrations.find({"_id": {"$in": list(_migrations)}})}
+    
+    return [
+        {
+            "version": version,
+            "description": _migrations[version].description,
+            "status": docs.get(version, {}).get("status", "pending"),
+            "progress": docs.get(version, {}).get("progress", {}),
+            "applied_at": docs.get(version, {}).get("applied_at")
+        }
+        for version in sorted(_migrations)
+    ]
+
+async def _claim(db, item: Migration, owner: str) -> Optional[dict]:
+    """Take the migration's lease, creating its record on first run"""
+    now = datetime.utcnow()
+    
+    try:
+        return await db.migrations.find_one_and_update(
+            {
+                "_id": item.version,
+                "status": {"$ne": "applied"},
+                "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]
+            },
+            {
+                "$set": {
+                    "description": item.description,
+                    "status": "running",
+                    "owner": owner,
+                    "lease_until": now + timedelta(seconds=MIGRATION_LEASE_SECONDS),
+                    "error": None,
+                    "updated_at": now
+                },
+                "$setOnInsert": {"checkpoint": {}, "progress": {}, "started_at": now}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Applied meanwhile, or another runner holds a live lease
+        return None
+
+async def run_migrations(db, target: Optional[str] = None) -> List[str]:
+    """Apply pending migrations up to `target`, resuming interrupted ones from their checkpoint"""
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    applied = {doc["_id"] async for doc in db.migrations.find({"status": "applied"}, {"_id": 1})}
+    completed = []
+    
+    for version in sorted(_migrations):
+        if target is not None and version > target:
+            break
+        if version in applied:
+            continue
+        
+        item = _migrations[version]
+        doc = await _claim(db, item, owner)
+        if doc is None:
+            print(f"⏸️ Migration {version} is being run elsewhere - stopping here")
+            break
+        
+        resumed = " (resuming)" if doc.get("checkpoint") else ""
+        print(f"🚚 Migration {version}: {item.description}{resumed}")
+        ctx = MigrationContext(db, doc, owner)
+        
+        try:
+            result = await item.run(ctx)
+        except BaseException as e:
+            await db.migrations.update_one(
+                {"_id": version, "owner": owner},
+                {"$set": {"status": "failed", "error": str(e) or type(e).__name__, "lease_until": None, "updated_at": datetime.utcnow()}}
+            )
+            raise
+        
+        await db.migrations.update_one(
+            {"_id": version, "owner": owner},
+            {"$set": {
+                "status": "applied",
+                "result": result,
+                "lease_until": None,
+                "applied_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            }}
+        )
+        completed.append(version)
+        print(f"✅ Migration {version} applied: {result or ctx.progress}")
+    
+    return completed
@@ -0,0 +1,363 @@
+"""
+Monitoring - Request Metrics Middleware & MongoDB Command Listener
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from pymongo import monitoring
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import threading
+import time
+import os
+
+from app.core.metrics import COUNT_BUCKETS, SIZE_BUCKETS, registry
+from app.core.tracing import Span, start_span
+
+# Configuration from Environment Variables
+QUERY_BUDGET_MODE = os.environ.get("QUERY_BUDGET_MODE", "warn").lower()  # off, warn or raise
+DB_QUERY_HEADER = os.environ.get("DB_QUERY_HEADER", "false").lower() == "true"
+
+# ============== METRICS ==============
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"]
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled", ["method"]
+)
+http_response_size_bytes = registry.histogram(
+    "http_response_size_bytes", "HTTP response body size as sent", ["method", "route"], SIZE_BUCKETS
+)
+http_request_db_commands = registry.histogram(
+    "http_request_db_commands", "MongoDB commands issued per HTTP request", ["method", "route"], COUNT_BUCKETS
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Time spent in MongoDB commands per HTTP request", ["method", "route"]
+)
+mongo_commands_total = registry.counter(
+    "mongo_commands_total", "MongoDB commands issued", ["command", "collection", "outcome"]
+)
+mongo_command_duration_seconds = registry.histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ["command", "collection"]
+)
+mongo_pool_connections = registry.gauge(
+    "mongo_pool_connections", "Established MongoDB connections per server pool", ["address"]
+)
+query_budget_exceeded_total = registry.counter(
+    "query_budget_exceeded_total", "Requests that issued more MongoDB queries than their route allows", ["method", "route"]
+)
+
+# ============== REQUEST CONTEXT ==============
+
+# Cursor continuations scale with result size, so they don't count as queries
+CURSOR_COMMANDS = {"getMore"}
+
+_record_lock = threading.Lock()
+
+class RequestStats:
+    """Database work attributed to one HTTP request"""
+    
+    __slots__ = ("commands", "queries", "db_seconds", "by_command", "parent", "scope")
+    
+    def __init__(self, parent: Optional["RequestStats"] = None, scope: Optional[Scope] = None):
+        self.commands = 0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.by_command: Dict[Tuple[str, str], int] = {}
+        self.parent = parent
+        self.scope = scope
+    
+    @property
+    def route(self) -> Optional[str]:
+        """Template of the matched route, once routing has happened"""
+        if self.scope is None:
+            return None
+        return getattr(self.scope.get("route"), "path", None) or self.scope.get("path")
+    
+    def record(self, command: str, collection: str, seconds: float):
+        """Count a finished command here and in every enclosing scope (called from driver threads)"""
+        key = (command, collection)
+        with _record_lock:
+            stats = self
+            while stats is not None:
+                stats.commands += 1
+                if command not in CURSOR_COMMANDS:
+                    stats.queries += 1
+                stats.db_seconds += seconds
+                stats.by_command[key] = stats.by_command.get(key, 0) + 1
+                stats = stats.parent
+    
+    def summary(self) -> str:
+        """Human-readable breakdown, e.g. for a failing budget assertion"""
+        parts = [f"{command} {collection}".strip() + f" x{count}" for (command, collection), count in self.by_command.items()]
+        return f"{self.queries} queries ({', '.join(parts) or 'none'})"
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Stats of the request being handled, if any"""
+    return _request_stats.get()
+
+@contextmanager
+def count_queries() -> Iterator[RequestStats]:
+    """Count MongoDB commands issued inside the block, including by in-process requests
+
+    with count_queries() as stats:
+        await client.get("/api/public/testimonials")
+    assert stats.queries <= 2, stats.summary()
+    """
+    stats = RequestStats(parent=_request_stats.get())
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+@contextmanager
+def untracked() -> Iterator[None]:
+    """Keep infrastructure commands (e.g. shared rate limits) out of the request's query count"""
+    token = _request_stats.set(None)
+    try:
+        yield
+    finally:
+        _request_stats.reset(token)
+
+# ============== QUERY BUDGETS ==============
+
+class QueryBudgetExceeded(AssertionError):
+    """A route issued more MongoDB queries than its declared budget"""
+
+def query_budget(max_queries: int) -> Callable:
+    """Declare how many MongoDB queries a route may issue, independent of result size
+
+    Place it below the router decorator:
+
+    @router.get("/testimonials")
+    @query_budget(2)
+    async def get_public_testimonials(): ...
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.query_budget = max_queries
+        return endpoint
+    return decorator
+
+def route_query_budget(route) -> Optional[int]:
+    """The budget declared on a matched route's endpoint, if any"""
+    return getattr(getattr(route, "endpoint", None), "query_budget", None)
+
+# ============== COMMAND LISTENER ==============
+
+# Driver-internal commands that say nothing about application queries
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "endSessions", "killCursors"}
+
+class PendingCommand(NamedTuple):
+    stats: Optional[RequestStats]
+    collection: str
+    database_name: str
+    command: Any
+    span: Optional[Span]
+
+class FinishedCommand(NamedTuple):
+    """A completed command as handed to slow-command listeners"""
+    command_name: str
+    collection: str
+    database_name: str
+    command: Any
+    seconds: float
+    outcome: str
+    stats: Optional[RequestStats]
+
+class CommandMonitor(monitoring.CommandListener):
+    """Time every MongoDB command and attribute it to the current request and span"""
+    
+    def __init__(self):
+        self._pending: Dict[tuple, PendingCommand] = {}
+        self._slow_listeners: List[Tuple[float, Callable[[FinishedCommand], None]]] = []
+        self._lock = threading.Lock()
+    
+    def add_slow_listener(self, threshold_seconds: float, callback: Callable[[FinishedCommand], None]):
+        """Call `callback` (possibly from a driver thread) for commands slower than the threshold"""
+        self._slow_listeners.append((threshold_seconds, callback))
+    
+    def started(self, event: monitoring.CommandStartedEvent):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else ""
+        command_span = start_span(f"mongodb.{event.command_name}", "client")
+        if command_span is not None:
+            command_span.attributes.update({
+                "db.system": "mongodb",
+                "db.name": event.database_name,
+                "db.operation": event.command_name,
+                "db.mongodb.collection": collection
+            })
+        pending = PendingCommand(_request_stats.get(), collection, event.database_name, event.command, command_span)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = pending
+    
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event, "success")
+    
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, "failure")
+    
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        
+        collection = pending.collection
+        seconds = event.duration_micros / 1_000_000
+        if pending.span is not None:
+            if outcome == "failure":
+                pending.span.error = str(event.failure.get("errmsg", "command failed"))
+            pending.span.end(pending.span.start_ns + event.duration_micros * 1000)
+        mongo_commands_total.inc(command=event.command_name, collection=collection, outcome=outcome)
+        mongo_command_duration_seconds.observe(seconds, command=event.command_name, collection=collection)
+        if pending.stats is not None:
+            pending.stats.record(event.command_name, collection, seconds)
+        
+        for threshold, callback in self._slow_listeners:
+            if seconds >= threshold:
+                try:
+                    callback(FinishedCommand(
+                        event.command_name, collection, pending.database_name, pending.command, seconds, outcome, pending.stats
+                    ))
+                except Exception as e:
+                    print(f"⚠️ Slow command listener failed: {e}")
+
+command_monitor = CommandMonitor()
+
+# ============== POOL LISTENER ==============
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Count established connections per server, so readiness can wait for minPoolSize"""
+    
+    def __init__(self):
+        self._connections: Dict[str, set] = {}
+        self._lock = threading.Lock()
+    
+    def ready_connections(self, address: Optional[Tuple[str, int]] = None) -> int:
+        """Established connections to one server, or to the best-connected one"""
+        with self._lock:
+            if address is not None:
+                return len(self._connections.get(_address(address), ()))
+            return max((len(ids) for ids in self._connections.values()), default=0)
+    
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent):
+        with self._lock:
+            self._connections.setdefault(_address(event.address), set()).add(event.connection_id)
+        mongo_pool_connections.inc(address=_address(event.address))
+    
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent):
+        with self._lock:
+            ids = self._connections.get(_address(event.address), set())
+            if event.connection_id not in ids:
+                return
+            ids.discard(event.connection_id)
+        mongo_pool_connections.dec(address=_address(event.address))
+    
+    def pool_closed(self, event: monitoring.PoolClosedEvent):
+        with self._lock:
+            self._connections.pop(_address(event.address), None)
+        mongo_pool_connections.set(0, address=_address(event.address))
+    
+    # The remaining pool events don't change the count
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        pass
+    
+    def connection_created(self, event):
+        pass
+    
+    def connection_check_out_started(self, event):
+        pass
+    
+    def connection_check_out_failed(self, event):
+        pass
+    
+    def connection_checked_out(self, event):
+        pass
+    
+    def connection_checked_in(self, event):
+        pass
+
+def _address(address: Tuple[str, int]) -> str:
+    return f"{address[0]}:{address[1]}"
+
+pool_monitor = PoolMonitor()
+
+# ============== MIDDLEWARE ==============
+
+class MetricsMiddleware:
+    """Record per-route counts, latency, response size and DB work"""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        stats = RequestStats(parent=_request_stats.get(), scope=scope)
+        token = _request_stats.set(stats)
+        status = 500
+        size = 0
+        started = time.perf_counter()
+        http_requests_in_flight.inc(method=method)
+        
+        async def send_wrapper(message: Message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if DB_QUERY_HEADER:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Queries"] = str(stats.queries)
+                    headers["X-DB-Time-Ms"] = f"{stats.db_seconds * 1000:.1f}"
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec(method=method)
+            _request_stats.reset(token)
+            
+            # The router stores the matched route, giving a low-cardinality template
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            
+            http_requests_total.inc(method=method, route=template, status=str(status))
+            http_request_duration_seconds.observe(elapsed, method=method, route=template)
+            http_response_size_bytes.observe(size, method=method, route=template)
+            http_request_db_commands.observe(stats.commands, method=method, route=template)
+            http_request_db_seconds.observe(stats.db_seconds, method=method, route=template)
+        
+        budget = route_query_budget(route)
+        if budget is not None and stats.queries > budget:
+            self._over_budget(method, template, budget, stats)
+    
+    def _over_budget(self, method: str, template: str, budget: int, stats: RequestStats):
+        query_budget_exceeded_total.inc(method=method, route=template)
+        message = f"{method} {template} issued {stats.summary()}, budget is {budget}"
+        if QUERY_BUDGET_MODE == "raise":
+            raise QueryBudgetExceeded(message)
+        if QUERY_BUDGET_MODE == "warn":
+            print(f"⚠️ Query budget exceeded: {message}")
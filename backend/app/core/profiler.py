@@ -0,0 +1,177 @@
+"""
+Profiler - On-Demand Sampling Profiler & Event-Loop Lag Monitor
+"""
+
+from collections import Counter
+from typing import Dict, Optional
+import asyncio
+import sys
+import threading
+import time
+import traceback
+import os
+
+from app.core.metrics import registry
+
+# Configuration from Environment Variables
+PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "false").lower() == "true"
+PROFILER_MAX_SECONDS = float(os.environ.get("PROFILER_MAX_SECONDS", 60))
+LOOP_MONITOR_ENABLED = os.environ.get("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_LAG_THRESHOLD_MS = float(os.environ.get("LOOP_LAG_THRESHOLD_MS", 250))
+LOOP_MONITOR_INTERVAL = float(os.environ.get("LOOP_MONITOR_INTERVAL", 0.1))
+
+event_loop_lag_seconds = registry.histogram(
+    "event_loop_lag_seconds", "Delay between a scheduled event-loop tick and when it ran"
+)
+event_loop_blocked_total = registry.counter(
+    "event_loop_blocked_total", "Times the event loop was blocked longer than the lag threshold"
+)
+
+# Leaf functions of a thread waiting for I/O rather than running code
+IDLE_FUNCTIONS = {"select", "poll", "epoll", "kqueue", "_worker", "wait", "_wait_for_tstate_lock"}
+
+def _frame_label(code) -> str:
+    """'function (path:line)' with site-packages and the working directory trimmed"""
+    filename = code.co_filename
+    if "site-packages/" in filename:
+        filename = filename.split("site-packages/", 1)[1]
+    elif filename.startswith(os.getcwd()):
+        filename = os.path.relpath(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+def _collapse(frame) -> Optional[str]:
+    """Root-to-leaf stack of one frame in collapsed (flamegraph) format"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels)) if labels else None
+
+class SamplingProfiler:
+    """Periodically sample thread stacks from a helper thread"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+    
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+    
+    async def profile(self, seconds: float, interval: float, all_threads: bool = False, include_idle: bool = False) -> dict:
+        """Sample the event-loop thread (or every thread) for `seconds` and return collapsed stacks"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        
+        try:
+            target = None if all_threads else threading.get_ident()
+            seconds = min(seconds, PROFILER_MAX_SECONDS)
+            return await asyncio.to_thread(self._sample, target, seconds, interval, include_idle)
+        finally:
+            self._lock.release()
+    
+    def _sample(self, target: Optional[int], seconds: float, interval: float, include_idle: bool) -> dict:
+        stacks: Counter = Counter()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        me = threading.get_ident()
+        samples = 0
+        idle = 0
+        deadline = time.perf_counter() + seconds
+        
+        while time.perf_counter() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me or (target is not None and ident != target):
+                    continue
+                if not include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                    idle += 1
+                    continue
+                stack = _collapse(frame)
+                if stack:
+                    prefix = f"{names.get(ident, ident)};" if target is None else ""
+                    stacks[prefix + stack] += 1
+            samples += 1
+            time.sleep(interval)
+        
+        return {"samples": samples, "idle": idle, "stacks": stacks}
+
+profiler = SamplingProfiler()
+
+def render_collapsed(stacks: Dict[str, int]) -> str:
+    """One 'frame;frame;frame count' line per stack, heaviest first"""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
+
+class LoopMonitor:
+    """Detect event-loop stalls and log the stack of the code holding the loop"""
+    
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.blocked = 0
+        self.max_lag = 0.0
+        self._loop_thread: Optional[int] = None
+        self._last_tick = 0.0
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+    
+    def start(self):
+        if not LOOP_MONITOR_ENABLED or self.task is not None:
+            return
+        
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self.task = asyncio.create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+    
+    async def stop(self):
+        self._stop.set()
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self._watchdog:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+    
+    async def _tick(self):
+        """Measure how late each scheduled wake-up runs"""
+        while True:
+            expected = time.monotonic() + LOOP_MONITOR_INTERVAL
+            await asyncio.sleep(LOOP_MONITOR_INTERVAL)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._last_tick = now
+            self.max_lag = max(self.max_lag, lag)
+            event_loop_lag_seconds.observe(lag)
+    
+    def _watch(self):
+        """Watchdog thread: dump the loop thread's stack once per stall"""
+        threshold = LOOP_LAG_THRESHOLD_MS / 1000
+        reported = False
+        
+        while not self._stop.wait(threshold / 2):
+            stalled = time.monotonic() - self._last_tick - LOOP_MONITOR_INTERVAL
+            if stalled < threshold:
+                reported = False
+                continue
+            if reported:
+                continue
+            
+            reported = True
+            self.blocked += 1
+            event_loop_blocked_total.inc()
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<no stack>\n"
+            print(f"🐌 Event loop blocked for more than {stalled * 1000:.0f}ms:\n{stack}", end="")
+    
+    def stats(self) -> dict:
+        return {
+            "enabled": self.task is not None,
+            "threshold_ms": LOOP_LAG_THRESHOLD_MS,
+            "blocked": self.blocked,
+            "max_lag_ms": round(self.max_lag * 1000, 1)
+        }
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,128 @@
+"""
+Readiness - Hold Traffic Until MongoDB, the Connection Pool and the Hot Caches Are Ready
+"""
+
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import pymongo
+import time
+import os
+
+from app.core.database import get_database, MONGODB_MIN_POOL_SIZE
+from app.core.events import watcher
+from app.core.monitoring import pool_monitor
+from app.core.token_filter import token_filter, TOKEN_FILTER_ENABLED
+
+# Configuration from Environment Variables
+READY_PING_TIMEOUT_SECONDS = float(os.environ.get("READY_PING_TIMEOUT_SECONDS", 2))
+READY_WARMUP_RETRY_SECONDS = float(os.environ.get("READY_WARMUP_RETRY_SECONDS", 2))
+
+class ReadinessProbe:
+    """Tracks the startup work a worker finishes before it should take traffic
+
+    The MongoDB ping is repeated on every probe. Startup gates are checked
+    only until they first pass: the pool reaching minPoolSize, the registered
+    cache warm-ups and the token filter's first build. A later failover or
+    cache expiry therefore doesn't pull every worker out of rotation at once.
+    """
+    
+    def __init__(self):
+        self._warmups: Dict[str, Callable[[], Awaitable]] = {}
+        self.warmed: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.pool_filled = False
+        self.filter_built = False
+        self.draining = False
+        self.started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def register(self, name: str, warmup: Callable[[], Awaitable]):
+        """Run `warmup` once at startup (retrying until it succeeds) before reporting ready"""
+        self._warmups[name] = warmup
+    
+    def start(self):
+        if self._task is None:
+            self.draining = False
+            self.started_at = time.monotonic()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Report not ready from now on, so load balancers drain this worker"""
+        self.draining = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        while len(self.warmed) < len(self._warmups):
+            pending = [name for name in self._warmups if name not in self.warmed]
+            await asyncio.gather(*(self._warm(name) for name in pending))
+            if len(self.warmed) < len(self._warmups):
+                await asyncio.sleep(READY_WARMUP_RETRY_SECONDS)
+    
+    async def _warm(self, name: str):
+        started = time.perf_counter()
+        try:
+            await self._warmups[name]()
+        except Exception as e:
+            self.errors[name] = str(e) or type(e).__name__
+            return
+        self.errors.pop(name, None)
+        self.warmed[name] = round((time.perf_counter() - started) * 1000, 1)
+    
+    async def _ping(self) -> bool:
+        try:
+            with pymongo.timeout(READY_PING_TIMEOUT_SECONDS):
+                await get_database().command("ping")
+            return True
+        except Exception:
+            return False
+    
+    def _pool_ready(self) -> bool:
+        if not self.pool_filled:
+            primary = get_database().client.primary
+            self.pool_filled = pool_monitor.ready_connections(primary) >= MONGODB_MIN_POOL_SIZE
+        return self.pool_filled
+    
+    def _filter_ready(self) -> bool:
+        # Only expected when the change stream that keeps it current is running
+        if not self.filter_built:
+            expected = TOKEN_FILTER_ENABLED and watcher.task is not None and not watcher.task.done()
+            self.filter_built = not expected or token_filter.builds > 0
+        return self.filter_built
+    
+    async def check(self) -> dict:
+        """Current readiness with the state of every gate"""
+        checks = {
+            "mongo": await self._ping(),
+            "pool": self._pool_ready(),
+            "token_filter": self._filter_ready(),
+            "caches": all(name in self.warmed for name in self._warmups)
+        }
+        ready = all(checks.values()) and not self.draining
+        if ready and self.ready_at is None:
+            self.ready_at = time.monotonic()
+            print(f"🚦 Ready to serve after {self.ready_at - (self.started_at or self.ready_at):.2f}s")
+        
+        if ready:
+            status = "ready"
+        elif self.draining:
+            status = "draining"
+        else:
+            status = "starting" if self.ready_at is None else "unavailable"
+        
+        return {
+            "status": status,
+            "checks": checks,
+            "pool_connections": pool_monitor.ready_connections(),
+            "min_pool_size": MONGODB_MIN_POOL_SIZE,
+            "warmed_ms": self.warmed,
+            "errors": self.errors
+        }
+
+readiness = ReadinessProbe()
@@ -3,36 +3,57 @@ Security Utilities - Password Hashing & JWT Token Management
 """
 
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import NamedTuple, Optional
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import base64
+import hashlib
+import hmac
 import secrets
+import struct
 import uuid
 import os
 
+from app.core.tracing import span
+
 # Configuration from Environment Variables
 SECRET_KEY = os.environ.get("SECRET_KEY", "change-this-secret-key-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 60 * 24))  # 24 hours default
+INVITE_TOKEN_FORMAT = os.environ.get("INVITE_TOKEN_FORMAT", "opaque").lower()  # opaque or signed
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Signed invite tokens: "s1.<project id | expiry | nonce>.<truncated HMAC-SHA256>"
+SIGNED_TOKEN_PREFIX = "s1."
+SIGNED_TOKEN_PAYLOAD = struct.Struct(">12sI8s")
+SIGNED_TOKEN_MAC_BYTES = 16
+_INVITE_KEY = hashlib.sha256(b"invite-token:" + SECRET_KEY.encode("utf-8")).digest()
 
 # Bearer token scheme
 security = HTTPBearer()
 
+# passlib/bcrypt and jose are imported on first use; most requests and
+# worker boots never hash a password or touch a JWT
+@lru_cache(maxsize=None)
+def pwd_context():
+    """Password hashing context"""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    with span("bcrypt.verify"):
+        return pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    with span("bcrypt.hash"):
+        return pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
+    from jose import jwt
+    
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -44,6 +65,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def decode_access_token(token: str) -> Optional[dict]:
     """Decode and validate a JWT access token"""
+    from jose import JWTError, jwt
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
@@ -74,4 +97,46 @@ async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return {"username": username, "admin_id": payload.get("admin_id")}
\ No newline at end of file
+    return {"username": username, "admin_id": payload.get("admin_id")}
+
+class SignedInvite(NamedTuple):
+    project_id: str
+    expires_at: datetime
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _invite_mac(payload: bytes) -> bytes:
+    return hmac.new(_INVITE_KEY, SIGNED_TOKEN_PREFIX.encode("ascii") + payload, hashlib.sha256).digest()[:SIGNED_TOKEN_MAC_BYTES]
+
+def generate_signed_invite_token(project_id: str, expires_at: datetime) -> str:
+    """Generate an invite token carrying its project and expiry, signed with SECRET_KEY"""
+    payload = SIGNED_TOKEN_PAYLOAD.pack(
+        bytes.fromhex(project_id),
+        int((expires_at - datetime(1970, 1, 1)).total_seconds()),
+        secrets.token_bytes(8)
+    )
+    return f"{SIGNED_TOKEN_PREFIX}{_b64encode(payload)}.{_b64encode(_invite_mac(payload))}"
+
+def is_signed_invite_token(token: str) -> bool:
+    return token.startswith(SIGNED_TOKEN_PREFIX)
+
+def verify_signed_invite_token(token: str) -> Optional[SignedInvite]:
+    """Decode a signed invite token, or None if it is malformed or forged"""
+    try:
+        encoded_payload, encoded_mac = token[len(SIGNED_TOKEN_PREFIX):].split(".")
+        payload = _b64decode(encoded_payload)
+        mac = _b64decode(encoded_mac)
+        if len(payload) != SIGNED_TOKEN_PAYLOAD.size:
+            return None
+    except ValueError:
+        return None
+    
+    if not hmac.compare_digest(mac, _invite_mac(payload)):
+        return None
+    
+    project_id, expires, _ = SIGNED_TOKEN_PAYLOAD.unpack(payload)
+    return SignedInvite(project_id.hex(), datetime(1970, 1, 1) + timedelta(seconds=expires))
@@ -0,0 +1,55 @@
+"""
+Single-Flight - Coalesce identical concurrent calls into one execution
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+
+class SingleFlight:
+    """Share one in-flight coroutine among concurrent callers with the same key"""
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.coalesced_by_group: Dict[str, int] = {}
+    
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+    
+    def pending(self, key: Hashable) -> bool:
+        """Whether a call for this key is currently running"""
+        return key in self._calls
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `fn` once per key at a time; later callers await the same result"""
+        task = self._calls.get(key)
+        
+        if task is None:
+            # Run as its own task so a disconnecting caller can't cancel it for everyone
+            task = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self._calls[key] = task
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            group = str(key[0]) if isinstance(key, tuple) and key else str(key)
+            self.coalesced_by_group[group] = self.coalesced_by_group.get(group, 0) + 1
+        
+        return await asyncio.shield(task)
+    
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            task.exception()
+    
+    def stats(self) -> dict:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_by_group": dict(self.coalesced_by_group),
+            "in_flight": self.in_flight
+        }
@@ -0,0 +1,258 @@
+"""
+Slow Query Log - Redacted Filter Shapes & Rate-Limited Explain Capture
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+from pymongo.errors import CollectionInvalid, OperationFailure
+import asyncio
+import contextvars
+import json
+import time
+import os
+
+from app.core.database import get_database
+from app.core.monitoring import FinishedCommand, command_monitor
+
+# Configuration from Environment Variables
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 100))  # 0 disables the log
+SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.environ.get("SLOW_QUERY_EXPLAIN_INTERVAL", 300))  # per shape
+SLOW_QUERY_EXPLAINS_PER_MINUTE = int(os.environ.get("SLOW_QUERY_EXPLAINS_PER_MINUTE", 10))
+SLOW_QUERY_LOG_BYTES = int(os.environ.get("SLOW_QUERY_LOG_BYTES", 16 * 1024 * 1024))
+
+SLOW_QUERY_COLLECTION = "slow_queries"
+
+# Commands explain can run, and where each keeps its filter
+EXPLAINABLE = {
+    "find": "filter",
+    "aggregate": "pipeline",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "update": "updates",
+    "delete": "deletes"
+}
+
+# Session, cluster and transport fields that must not be replayed into explain
+COMMAND_ENVELOPE = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+def redact(value: Any) -> Any:
+    """Keep a filter's structure and operators but replace every value with '?'"""
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # Pipelines and $or branches keep their structure; value lists like $in collapse
+        if value and all(isinstance(item, dict) for item in value):
+            return [redact(item) for item in value]
+        return "?"
+    return "?"
+
+# Explain fields holding literal query values; the SBE plan text embeds them as well
+PLAN_VALUE_FIELDS = {"filter", "indexBounds", "parsedQuery", "query"}
+PLAN_DROPPED_FIELDS = {"slotBasedPlan"}
+
+def redact_plan(plan: Any) -> Any:
+    """A winning plan with stages and index names intact but filter and bound values redacted"""
+    if isinstance(plan, dict):
+        return {
+            key: redact(value) if key in PLAN_VALUE_FIELDS else redact_plan(value)
+            for key, value in plan.items()
+            if key not in PLAN_DROPPED_FIELDS
+        }
+    if isinstance(plan, list):
+        return [redact_plan(item) for item in plan]
+    return plan
+
+def explain_error(e: Exception) -> str:
+    """An explain failure without its message, which may quote query values"""
+    if isinstance(e, OperationFailure):
+        code_name = (e.details or {}).get("codeName")
+        return f"{type(e).__name__} {e.code}" + (f" ({code_name})" if code_name else "")
+    return type(e).__name__
+
+def filter_shape(command_name: str, command: dict) -> Any:
+    """The redacted part of a command that decides which documents it touches"""
+    field = EXPLAINABLE.get(command_name)
+    if field is None:
+        return None
+    
+    target = command.get(field)
+    if command_name in ("update", "delete") and target:
+        target = target[0].get("q")
+    
+    shape = {"pipeline" if command_name == "aggregate" else "filter": redact(target or {})}
+    if command.get("sort"):
+        shape["sort"] = dict(command["sort"])
+    return shape
+
+def _find_key(document: Any, key: str) -> Optional[Any]:
+    """First value stored under `key` anywhere in a nested explain document"""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        children = document.values()
+    elif isinstance(document, list):
+        children = document
+    else:
+        return None
+    
+    for child in children:
+        found = _find_key(child, key)
+        if found is not None:
+            return found
+    return None
+
+def plan_summary(plan: Any) -> str:
+    """Compact 'IXSCAN { index } / COLLSCAN' description of a winning plan"""
+    stages: List[str] = []
+    
+    def walk(node: Any):
+        if isinstance(node, dict):
+            stage = node.get("stage")
+            if stage in ("COLLSCAN", "IXSCAN", "COUNT_SCAN", "DISTINCT_SCAN", "IDHACK", "EXPRESS_IXSCAN"):
+                index = node.get("indexName")
+                stages.append(f"{stage} {{ {index} }}" if index else stage)
+            for child in node.values():
+                walk(child)
+        elif isinstance(node, list):
+            for child in node:
+                walk(child)
+    
+    walk(plan)
+    return ", ".join(dict.fromkeys(stages)) or "UNKNOWN"
+
+class SlowQueryLog:
+    """Log slow MongoDB commands and capture explain plans for their shapes"""
+    
+    def __init__(self):
+        self.logged = 0
+        self.explained = 0
+        self.explain_errors = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_explained: Dict[str, float] = {}
+        self._explain_times: List[float] = []
+        self._background: Set[asyncio.Task] = set()
+    
+    async def start(self):
+        """Create the capped collection and start listening for slow commands"""
+        if not SLOW_QUERY_MS or self._loop is not None:
+            return
+        
+        try:
+            await get_database().create_collection(
+                SLOW_QUERY_COLLECTION,
+                capped=True,
+                size=SLOW_QUERY_LOG_BYTES
+            )
+        except CollectionInvalid:
+            pass  # already exists
+        
+        self._loop = asyncio.get_running_loop()
+        command_monitor.add_slow_listener(SLOW_QUERY_MS / 1000, self.observe)
+        print(f"🐢 Logging MongoDB commands slower than {SLOW_QUERY_MS:.0f}ms")
+    
+    async def stop(self):
+        self._loop = None
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+    
+    def observe(self, finished: FinishedCommand):
+        """Slow-command listener; may run on a driver thread"""
+        if self._loop is None or finished.collection == SLOW_QUERY_COLLECTION or finished.command_name == "explain":
+            return
+        
+        route = finished.stats.route if finished.stats else None
+        shape = filter_shape(finished.command_name, finished.command)
+        
+        # Run the follow-up on the loop, outside the request's context so it isn't billed to it
+        self._loop.call_soon_threadsafe(
+            self._schedule, finished, route, shape,
+            context=contextvars.Context()
+        )
+    
+    def _schedule(self, finished: FinishedCommand, route: Optional[str], shape: Any):
+        task = asyncio.ensure_future(self._record(finished, route, shape))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+    
+    def _explain_due(self, shape_key: str) -> bool:
+        """Rate-limit explains per shape and overall"""
+        now = time.monotonic()
+        if now - self._last_explained.get(shape_key, float("-inf")) < SLOW_QUERY_EXPLAIN_INTERVAL:
+            return False
+        
+        self._explain_times = [t for t in self._explain_times if now - t < 60]
+        if len(self._explain_times) >= SLOW_QUERY_EXPLAINS_PER_MINUTE:
+            return False
+        
+        self._last_explained[shape_key] = now
+        self._explain_times.append(now)
+        return True
+    
+    async def _record(self, finished: FinishedCommand, route: Optional[str], shape: Any):
+        db = get_database()
+        entry = {
+            "ts": datetime.utcnow(),
+            "route": route,
+            "command": finished.command_name,
+            "collection": finished.collection,
+            "shape": json.dumps(shape, default=str, sort_keys=True) if shape is not None else None,
+            "duration_ms": round(finished.seconds * 1000, 1),
+            "outcome": finished.outcome,
+            "explained": False
+        }
+        
+        shape_key = f"{finished.command_name}:{finished.collection}:{entry['shape']}"
+        if SLOW_QUERY_EXPLAIN and shape is not None and self._explain_due(shape_key):
+            entry.update(await self._explain(finished))
+        
+        examined = f" docs_examined={entry['docs_examined']} plan={entry['plan_summary']}" if entry.get("explained") else ""
+        print(
+            f"🐢 Slow {finished.command_name} on {finished.collection or finished.database_name} "
+            f"({entry['duration_ms']:.0f}ms) route={route or '-'} shape={entry['shape']}{examined}"
+        )
+        
+        try:
+            await db[SLOW_QUERY_COLLECTION].insert_one(entry)
+            self.logged += 1
+        except Exception as e:
+            print(f"⚠️ Could not store slow query: {e}")
+    
+    async def _explain(self, finished: FinishedCommand) -> dict:
+        """Re-run the command under explain('executionStats')"""
+        command = {
+            key: value for key, value in finished.command.items()
+            if not key.startswith("$") and key not in COMMAND_ENVELOPE
+        }
+        
+        try:
+            result = await get_database().client[finished.database_name].command(
+                {"explain": command, "verbosity": "executionStats"}
+            )
+        except Exception as e:
+            self.explain_errors += 1
+            return {"explain_error": explain_error(e)}
+        
+        self.explained += 1
+        winning_plan = _find_key(result, "winningPlan")
+        stats = _find_key(result, "executionStats") or {}
+        return {
+            "explained": True,
+            "plan_summary": plan_summary(winning_plan),
+            "winning_plan": json.dumps(redact_plan(winning_plan), default=str),
+            "docs_examined": stats.get("totalDocsExamined"),
+            "keys_examined": stats.get("totalKeysExamined"),
+            "n_returned": stats.get("nReturned"),
+            "execution_ms": stats.get("executionTimeMillis")
+        }
+    
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": SLOW_QUERY_MS,
+            "logged": self.logged,
+            "explained": self.explained,
+            "explain_errors": self.explain_errors
+        }
+
+slow_query_log = SlowQueryLog()
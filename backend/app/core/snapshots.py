@@ -0,0 +1,180 @@
+"""
+Snapshot Publisher - Pre-rendered, precompressed JSON files of public responses
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+import asyncio
+import hashlib
+import tempfile
+import time
+import os
+
+from app.core.cache import render_json
+from app.core.compression import available_encodings, compress
+
+# Configuration from Environment Variables
+SNAPSHOTS_ENABLED = os.environ.get("SNAPSHOTS_ENABLED", "true").lower() == "true"
+SNAPSHOT_DIR = os.environ.get(
+    "SNAPSHOT_DIR",
+    os.path.join(tempfile.gettempdir(), "testimonial-snapshots")
+)
+SNAPSHOT_DEBOUNCE_SECONDS = float(os.environ.get("SNAPSHOT_DEBOUNCE_SECONDS", 2))
+SNAPSHOT_MAX_DELAY_SECONDS = float(os.environ.get("SNAPSHOT_MAX_DELAY_SECONDS", 30))
+SNAPSHOT_REFRESH_SECONDS = float(os.environ.get("SNAPSHOT_REFRESH_SECONDS", 300))
+SNAPSHOT_KEEP_VERSIONS = int(os.environ.get("SNAPSHOT_KEEP_VERSIONS", 3))
+SNAPSHOT_PRUNE_GRACE_SECONDS = float(os.environ.get("SNAPSHOT_PRUNE_GRACE_SECONDS", 900))
+
+class Snapshot(NamedTuple):
+    name: str
+    version: str
+    files: Dict[Optional[str], str]  # content-encoding (None = identity) -> path
+    size: int
+    published_at: float
+
+class SnapshotPublisher:
+    """Render registered responses to versioned files after writes settle"""
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.current: Dict[str, Snapshot] = {}
+        self.publishes = 0
+        self._renderers: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self._versions: Dict[str, List[str]] = {}
+        self._dirty: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def register(self, name: str, producer: Callable[[], Awaitable[Any]]):
+        """Publish the output of `producer` as snapshot `name`"""
+        self._renderers[name] = producer
+    
+    def renderer(self, name: str) -> Optional[Callable[[], Awaitable[Any]]]:
+        return self._renderers.get(name)
+    
+    def schedule(self, event: Optional[dict] = None):
+        """Request a (debounced) re-publish; usable as a broker listener"""
+        if self._dirty and (event is None or event["type"] == "invalidate"):
+            self._dirty.set()
+    
+    def start(self):
+        if SNAPSHOTS_ENABLED and self._task is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._dirty = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        """Publish at startup, then after each burst of writes settles"""
+        while True:
+            try:
+                await self.publish_all()
+            except Exception as e:
+                print(f"⚠️ Snapshot publish failed: {e}")
+            
+            # Periodic refresh covers deployments without change streams
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=SNAPSHOT_REFRESH_SECONDS)
+            except asyncio.TimeoutError:
+                continue
+            
+            started = time.monotonic()
+            while self._dirty.is_set() and time.monotonic() - started < SNAPSHOT_MAX_DELAY_SECONDS:
+                self._dirty.clear()
+                await asyncio.sleep(SNAPSHOT_DEBOUNCE_SECONDS)
+            self._dirty.clear()
+    
+    async def publish_all(self):
+        for name, producer in list(self._renderers.items()):
+            body = render_json(await producer())
+            version = hashlib.sha256(body).hexdigest()[:20]
+            
+            if name in self.current and self.current[name].version == version:
+                # Touch the files so other workers' pruning sees them as in use
+                await asyncio.to_thread(self._touch, self.current[name])
+                continue
+            
+            files = await asyncio.to_thread(self._write, name, version, body)
+            self.current[name] = Snapshot(name, version, files, len(body), time.time())
+            self.publishes += 1
+            await asyncio.to_thread(self._prune, name, version)
+    
+    def _write(self, name: str, version: str, body: bytes) -> Dict[Optional[str], str]:
+        """Write the identity and precompressed variants atomically"""
+        base = os.path.join(self.directory, f"{name}.{version}.json")
+        variants = {None: (base, body)}
+        for encoding in available_encodings():
+            suffix = ".br" if encoding == "br" else ".gz"
+            variants[encoding] = (base + suffix, compress(body, encoding, precompress=True))
+        
+        files = {}
+        for encoding, (path, data) in variants.items():
+            if os.path.exists(path):
+                os.utime(path)
+            else:
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            files[encoding] = path
+        return files
+    
+    def _touch(self, snapshot: Snapshot):
+        for path in snapshot.files.values():
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+    
+    def _prune(self, name: str, version: str):
+        """Remove old versions of a snapshot once no worker has published them for a while
+
+        Workers share the directory and each may still serve a version this one
+        replaced, so only versions beyond the newest few whose files have not
+        been touched for SNAPSHOT_PRUNE_GRACE_SECONDS are removed.
+        """
+        versions = self._versions.setdefault(name, [])
+        if version in versions:
+            versions.remove(version)
+        versions.append(version)
+        
+        cutoff = time.time() - SNAPSHOT_PRUNE_GRACE_SECONDS
+        in_use = []
+        for old in versions[:-SNAPSHOT_KEEP_VERSIONS]:
+            paths = [
+                os.path.join(self.directory, filename)
+                for filename in os.listdir(self.directory)
+                if filename.startswith(f"{name}.{old}.")
+            ]
+            if any(_modified_since(path, cutoff) for path in paths):
+                in_use.append(old)
+                continue
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        versions[:-SNAPSHOT_KEEP_VERSIONS] = in_use
+    
+    def stats(self) -> dict:
+        return {
+            "publishes": self.publishes,
+            "snapshots": {
+                name: {"version": s.version, "size": s.size, "published_at": s.published_at}
+                for name, s in self.current.items()
+            }
+        }
+
+def _modified_since(path: str, cutoff: float) -> bool:
+    try:
+        return os.path.getmtime(path) >= cutoff
+    except FileNotFoundError:
+        return False
+
+snapshot_publisher = SnapshotPublisher(SNAPSHOT_DIR)
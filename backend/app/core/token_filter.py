@@ -0,0 +1,254 @@
+"""
+Token Filter - Per-Worker Bloom Filter of Issued Invite Tokens
+"""
+
+from typing import Iterable, Optional, Set
+import asyncio
+import hashlib
+import math
+import time
+import os
+
+from app.core.database import get_database
+from app.core.events import broker, watcher
+from app.core.metrics import registry
+
+# Configuration from Environment Variables
+TOKEN_FILTER_ENABLED = os.environ.get("TOKEN_FILTER_ENABLED", "true").lower() == "true"
+TOKEN_FILTER_FP_RATE = float(os.environ.get("TOKEN_FILTER_FP_RATE", 0.01))
+TOKEN_FILTER_MIN_CAPACITY = int(os.environ.get("TOKEN_FILTER_MIN_CAPACITY", 10000))
+TOKEN_FILTER_BATCH_SIZE = int(os.environ.get("TOKEN_FILTER_BATCH_SIZE", 5000))
+TOKEN_FILTER_REBUILD_SECONDS = float(os.environ.get("TOKEN_FILTER_REBUILD_SECONDS", 3600))
+TOKEN_FILTER_DELETED_RATIO = float(os.environ.get("TOKEN_FILTER_DELETED_RATIO", 0.5))
+
+class BloomFilter:
+    """Fixed-size bit array answering 'definitely absent' or 'maybe present'"""
+    
+    def __init__(self, capacity: int, fp_rate: float):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+    
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+    
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+    
+    def fill_ratio(self) -> float:
+        return bin(int.from_bytes(self._bits, "little")).count("1") / self.size
+    
+    def estimated_fp_rate(self) -> float:
+        """Chance an absent item tests positive, given the bits set so far"""
+        return self.fill_ratio() ** self.hashes
+
+class TokenFilter:
+    """Answers whether an invite token was ever issued, without the database
+
+    Every issued token is kept - not just active ones - so used, revoked and
+    expired tokens still reach the database and get their specific message.
+    Built from a covered scan of the token index once the change stream is
+    up, then kept current from token events. Bloom filters can't forget, so
+    deleted tokens stay as harmless positives until the next rebuild. While
+    the change stream is down the filter is not trusted and every lookup
+    goes to the database.
+    """
+    
+    def __init__(self):
+        self.checks = 0
+        self.negatives = 0
+        self.positives = 0
+        self.bypassed = 0
+        self.false_positives = 0
+        self.deleted = 0
+        self.builds = 0
+        self.built_at: Optional[float] = None
+        self.build_seconds = 0.0
+        self._filter: Optional[BloomFilter] = None
+        self._trusted = False
+        self._pending: Optional[Set[str]] = None
+        self._rebuild: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def ready(self) -> bool:
+        """Whether negative answers can be relied on right now"""
+        return self._trusted and watcher.running
+    
+    def might_exist(self, token: str) -> bool:
+        """False only when the token was definitely never issued"""
+        self.checks += 1
+        if not self.ready:
+            self.bypassed += 1
+            return True
+        
+        if token in self._filter:
+            self.positives += 1
+            return True
+        
+        self.negatives += 1
+        return False
+    
+    def record_false_positive(self):
+        """Note a 'maybe' answer for a token the database didn't have"""
+        if self.ready:
+            self.false_positives += 1
+    
+    def add(self, token: str):
+        """Make a newly issued token pass the filter"""
+        if self._filter is not None:
+            self._filter.add(token)
+            if self._filter.count > self._filter.capacity:
+                self.request_rebuild()
+        if self._pending is not None:
+            self._pending.add(token)
+    
+    def remove(self):
+        """Count a deleted token; enough of them trigger a rebuild"""
+        self.deleted += 1
+        if self._filter is not None and self.deleted > self._filter.count * TOKEN_FILTER_DELETED_RATIO:
+            self.request_rebuild()
+    
+    def request_rebuild(self):
+        if self._rebuild:
+            self._rebuild.set()
+    
+    def on_event(self, event: dict):
+        """Broker listener keeping the filter in step with every worker's writes"""
+        if event["type"] == "token":
+            if event["op"] == "insert":
+                self.add(event["token"])
+            else:
+                self.remove()
+        elif event["type"] == "invalidate" and event.get("collection") is None:
+            # The change stream reconnected; inserts may have been missed
+            self._trusted = False
+            self.request_rebuild()
+    
+    def start(self):
+        if TOKEN_FILTER_ENABLED and self._task is None:
+            self._rebuild = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._filter = None
+        self._trusted = False
+    
+    async def _run(self):
+        """Build once the change stream is up, then rebuild periodically or on demand"""
+        while True:
+            while not watcher.running:
+                await asyncio.sleep(1)
+            
+            try:
+                await self.build()
+            except Exception as e:
+                self._trusted = False
+                print(f"⚠️ Token filter build failed: {e}")
+                await asyncio.sleep(5)
+                continue
+            
+            try:
+                await asyncio.wait_for(self._rebuild.wait(), timeout=TOKEN_FILTER_REBUILD_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def build(self):
+        """Stream every token string into a fresh filter and swap it in"""
+        self._rebuild.clear()
+        started = time.perf_counter()
+        db = get_database()
+        
+        # Tokens issued while scanning are collected and folded in afterwards
+        self._pending = set()
+        try:
+            issued = await db.tokens.estimated_document_count()
+            bloom = BloomFilter(max(TOKEN_FILTER_MIN_CAPACITY, issued * 2), TOKEN_FILTER_FP_RATE)
+            
+            # Hinting the unique token index makes this a covered index scan
+            cursor = db.tokens.find({}, {"token": 1, "_id": 0}).hint([("token", 1)]).batch_size(TOKEN_FILTER_BATCH_SIZE)
+            async for doc in cursor:
+                bloom.add(doc["token"])
+            
+            for token in self._pending:
+                bloom.add(token)
+        finally:
+            self._pending = None
+        
+        self._filter = bloom
+        self._trusted = True
+        self.deleted = 0
+        self.builds += 1
+        self.built_at = time.time()
+        self.build_seconds = time.perf_counter() - started
+        print(f"🧮 Token filter built: {bloom.count} tokens, {len(bloom._bits) // 1024} KiB in {self.build_seconds:.2f}s")
+    
+    def stats(self) -> dict:
+        bloom = self._filter
+        positives = self.positives
+        # Share of tokens absent from the database that the filter still let through
+        absent = self.false_positives + self.negatives
+        return {
+            "enabled": TOKEN_FILTER_ENABLED,
+            "ready": self.ready,
+            "items": bloom.count if bloom else 0,
+            "capacity": bloom.capacity if bloom else 0,
+            "bits": bloom.size if bloom else 0,
+            "hashes": bloom.hashes if bloom else 0,
+            "fill_ratio": round(bloom.fill_ratio(), 4) if bloom else 0,
+            "target_fp_rate": TOKEN_FILTER_FP_RATE,
+            "estimated_fp_rate": bloom.estimated_fp_rate() if bloom else None,
+            "observed_fp_rate": self.false_positives / absent if absent else None,
+            "checks": self.checks,
+            "negatives": self.negatives,
+            "positives": positives,
+            "false_positives": self.false_positives,
+            "bypassed": self.bypassed,
+            "deleted_since_build": self.deleted,
+            "builds": self.builds,
+            "built_at": self.built_at,
+            "build_seconds": round(self.build_seconds, 3)
+        }
+
+token_filter = TokenFilter()
+broker.add_listener(token_filter.on_event)
+
+token_filter_checks_total = registry.counter("token_filter_checks_total", "Invite token filter lookups by answer", ["result"])
+token_filter_false_positives_total = registry.counter(
+    "token_filter_false_positives_total", "Tokens that passed the filter but were not in the database"
+)
+token_filter_items = registry.gauge("token_filter_items", "Tokens added to the invite token filter since its last build")
+token_filter_fp_rate = registry.gauge("token_filter_fp_rate", "Invite token filter false-positive rate", ["kind"])
+
+def _collect_token_filter_metrics():
+    """Mirror the token filter counters into the metrics registry"""
+    stats = token_filter.stats()
+    for result, key in (("negative", "negatives"), ("positive", "positives"), ("bypass", "bypassed")):
+        token_filter_checks_total.set(stats[key], result=result)
+    token_filter_false_positives_total.set(stats["false_positives"])
+    token_filter_items.set(stats["items"])
+    for kind in ("estimated", "observed"):
+        if stats[f"{kind}_fp_rate"] is not None:
+            token_filter_fp_rate.set(stats[f"{kind}_fp_rate"], kind=kind)
+
+registry.add_collector(_collect_token_filter_metrics)
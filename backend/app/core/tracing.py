@@ -0,0 +1,396 @@
+"""
+Tracing - Request, Handler & Database Spans with W3C Trace Context
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import asyncio
+import functools
+import json
+import random
+import re
+import secrets
+import time
+import urllib.request
+import os
+
+# Configuration from Environment Variables
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "false").lower() == "true"
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 1.0))
+TRACE_SERVICE_NAME = os.environ.get("TRACE_SERVICE_NAME", "testimonial-api")
+TRACE_FILE = os.environ.get("TRACE_FILE", "traces.jsonl")
+TRACE_EXPORT_INTERVAL = float(os.environ.get("TRACE_EXPORT_INTERVAL", 5))
+TRACE_BUFFER_SIZE = int(os.environ.get("TRACE_BUFFER_SIZE", 10000))
+OTLP_ENDPOINT = os.environ.get("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT") or (
+    os.environ["OTEL_EXPORTER_OTLP_ENDPOINT"].rstrip("/") + "/v1/traces"
+    if os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT") else ""
+)
+
+TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# OTLP span kinds
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3, "producer": 4, "consumer": 5}
+
+class SpanContext(NamedTuple):
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """Parse a W3C traceparent header, or None if absent or malformed"""
+    match = TRACEPARENT_RE.match((value or "").strip().lower())
+    if not match:
+        return None
+    
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1))
+
+class Span:
+    """One timed operation within a trace"""
+    
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+    
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None,
+        start_ns: Optional[int] = None
+    ):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.error: Optional[str] = None
+    
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+    
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+    
+    def record_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+    
+    def end(self, end_ns: Optional[int] = None):
+        """Finish the span and queue it for export"""
+        if self.end_ns is None:
+            self.end_ns = end_ns or time.time_ns()
+            exporter.add(self)
+    
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def current_span() -> Optional[Span]:
+    """The innermost active span, if the current work is being traced"""
+    return _current_span.get()
+
+def current_traceparent() -> Optional[str]:
+    """traceparent value for propagating the current trace, e.g. into a queued job"""
+    active = _current_span.get()
+    return active.traceparent if active else None
+
+def start_span(name: str, kind: str = "internal", attributes: Optional[Dict[str, Any]] = None, start_ns: Optional[int] = None) -> Optional[Span]:
+    """Open a child of the current span without activating it; None when not tracing"""
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes, start_ns)
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes) -> Iterator[Optional[Span]]:
+    """Trace a block as a child of the current span; a no-op outside a trace"""
+    child = start_span(name, kind, attributes)
+    if child is None:
+        yield None
+        return
+    
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+@contextmanager
+def root_span(name: str, traceparent: Optional[str] = None, kind: str = "server", **attributes) -> Iterator[Optional[Span]]:
+    """Start a trace, continuing a remote parent when a traceparent is given"""
+    parent = parse_traceparent(traceparent)
+    sampled = parent.sampled if parent else random.random() < TRACE_SAMPLE_RATE
+    if not TRACING_ENABLED or not sampled:
+        yield None
+        return
+    
+    trace_id = parent.trace_id if parent else secrets.token_hex(16)
+    root = Span(name, trace_id, parent.span_id if parent else None, kind, attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        root.end()
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator tracing each call of a sync or async function"""
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+        
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# ============== EXPORT ==============
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_span(finished: Span) -> dict:
+    encoded = {
+        "traceId": finished.trace_id,
+        "spanId": finished.span_id,
+        "name": finished.name,
+        "kind": SPAN_KINDS.get(finished.kind, 1),
+        "startTimeUnixNano": str(finished.start_ns),
+        "endTimeUnixNano": str(finished.end_ns),
+        "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in finished.attributes.items()],
+        "status": {"code": 2, "message": finished.error} if finished.error else {"code": 1}
+    }
+    if finished.parent_id:
+        encoded["parentSpanId"] = finished.parent_id
+    return encoded
+
+class SpanExporter:
+    """Buffer finished spans and ship them to OTLP/HTTP or a JSONL file in the background"""
+    
+    def __init__(self, otlp_endpoint: str, path: str):
+        self.otlp_endpoint = otlp_endpoint
+        self.path = path
+        self.exported = 0
+        self.dropped = 0
+        self.failures = 0
+        self.task: Optional[asyncio.Task] = None
+        self._buffer: deque = deque(maxlen=TRACE_BUFFER_SIZE)
+    
+    def add(self, finished: Span):
+        """Queue a span; safe to call from driver threads"""
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(finished)
+    
+    def start(self):
+        if TRACING_ENABLED and self.task is None:
+            self.task = asyncio.create_task(self._run())
+            target = self.otlp_endpoint or self.path
+            print(f"🔭 Exporting traces to {target}")
+    
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.flush()
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(TRACE_EXPORT_INTERVAL)
+            await self.flush()
+    
+    async def flush(self):
+        """Export everything buffered so far"""
+        spans = []
+        while self._buffer:
+            spans.append(self._buffer.popleft())
+        if not spans:
+            return
+        
+        try:
+            await asyncio.to_thread(self._export, spans)
+            self.exported += len(spans)
+        except Exception as e:
+            self.failures += 1
+            print(f"⚠️ Trace export failed ({len(spans)} spans dropped): {e}")
+    
+    def _export(self, spans: List[Span]):
+        if self.otlp_endpoint:
+            self._post_otlp(spans)
+        else:
+            self._append_jsonl(spans)
+    
+    def _post_otlp(self, spans: List[Span]):
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": [_otlp_span(s) for s in spans]}]
+            }]
+        }
+        request = urllib.request.Request(
+            self.otlp_endpoint,
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            response.read()
+    
+    def _append_jsonl(self, spans: List[Span]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for finished in spans:
+                f.write(json.dumps(finished.to_dict(), default=str) + "\n")
+    
+    def stats(self) -> dict:
+        return {
+            "enabled": TRACING_ENABLED,
+            "target": self.otlp_endpoint or self.path,
+            "buffered": len(self._buffer),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failures": self.failures
+        }
+
+exporter = SpanExporter(OTLP_ENDPOINT, TRACE_FILE)
+
+# ============== HTTP ==============
+
+class TracingMiddleware:
+    """Open a server span per request, continuing an incoming traceparent"""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        traceparent = Headers(scope=scope).get("traceparent")
+        
+        with root_span(method, traceparent, "server", **{"http.method": method, "url.path": scope["path"]}) as request_span:
+            if request_span is None:
+                await self.app(scope, receive, send)
+                return
+            
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        request_span.error = f"HTTP {message['status']}"
+                    # Let clients correlate a response with its trace
+                    MutableHeaders(scope=message)["traceresponse"] = request_span.traceparent
+                await send(message)
+            
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    request_span.name = f"{method} {route}"
+                    request_span.set_attribute("http.route", route)
+
+# Time the endpoint finished, so the rest of the route handler counts as serialization
+_endpoint_done: ContextVar[Optional[list]] = ContextVar("endpoint_done", default=None)
+
+class TracedRoute(APIRoute):
+    """Route class adding handler and serialization spans under the request span"""
+    
+    def get_route_handler(self) -> Callable:
+        endpoint = self.dependant.call
+        if not getattr(endpoint, "_traced", False):
+            self.dependant.call = self._trace_endpoint(endpoint)
+        
+        handler = super().get_route_handler()
+        
+        async def traced_handler(request: Request):
+            if current_span() is None:
+                return await handler(request)
+            
+            marker = []
+            token = _endpoint_done.set(marker)
+            try:
+                response = await handler(request)
+            finally:
+                _endpoint_done.reset(token)
+            
+            if marker:
+                serialize = start_span("serialize", attributes={"http.route": self.path}, start_ns=marker[0])
+                serialize.set_attribute("response.bytes", len(getattr(response, "body", b"") or b""))
+                serialize.end()
+            return response
+        
+        return traced_handler
+    
+    def _trace_endpoint(self, endpoint: Callable) -> Callable:
+        name = f"handler {endpoint.__name__}"
+        
+        def finished():
+            marker = _endpoint_done.get()
+            if marker is not None:
+                marker.append(time.time_ns())
+        
+        if asyncio.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def traced_endpoint(*args, **kwargs):
+                with span(name, **{"code.function": endpoint.__name__}):
+                    result = await endpoint(*args, **kwargs)
+                finished()
+                return result
+        else:
+            @functools.wraps(endpoint)
+            def traced_endpoint(*args, **kwargs):
+                with span(name, **{"code.function": endpoint.__name__}):
+                    return endpoint(*args, **kwargs)
+        
+        traced_endpoint._traced = True
+        return traced_endpoint
@@ -4,17 +4,51 @@ A professional invite-only testimonial management system
 """
 
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from app.core.database import connect_to_mongo, close_mongo_connection
+from app.core.compression import CompressionMiddleware
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.core.events import start_change_watcher, stop_change_watcher
+from app.core.indexes import check_index_manifest
+from app.core.jobs import worker_pool, JOB_WORKERS_IN_PROCESS
+from app.core.metrics import registry
+from app.core.monitoring import MetricsMiddleware
+from app.core.profiler import loop_monitor
+from app.core.readiness import readiness
+from app.core.slow_queries import slow_query_log
+from app.core.snapshots import snapshot_publisher
+from app.core.token_filter import token_filter
+from app.core.tracing import TracingMiddleware, exporter as span_exporter, TRACING_ENABLED
 from app.routes import admin, testimonials, tokens, public
+from app.utils.retention import archive_scheduler
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle - connect/disconnect from MongoDB"""
+    span_exporter.start()
+    loop_monitor.start()
     await connect_to_mongo()
+    await check_index_manifest(get_database())
+    await slow_query_log.start()
+    start_change_watcher()
+    token_filter.start()
+    snapshot_publisher.start()
+    readiness.start()
+    if JOB_WORKERS_IN_PROCESS:
+        worker_pool.start()
+        archive_scheduler.start()
     yield
+    await readiness.stop()
+    await archive_scheduler.stop()
+    await worker_pool.stop()
+    await snapshot_publisher.stop()
+    await token_filter.stop()
+    await stop_change_watcher()
+    await slow_query_log.stop()
     await close_mongo_connection()
+    await loop_monitor.stop()
+    await span_exporter.stop()
 
 app = FastAPI(
     title="Testimonial System API",
@@ -32,6 +66,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Negotiated gzip/brotli compression
+app.add_middleware(CompressionMiddleware)
+
+# Request metrics - outside compression, so sizes are measured as sent
+app.add_middleware(MetricsMiddleware)
+
+# Request tracing with W3C traceparent propagation - added last, so it is
+# outermost and the server span covers metrics and compression too
+if TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 app.include_router(tokens.router, prefix="/api/tokens", tags=["Tokens"])
@@ -49,3 +94,15 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/ready")
+async def readiness_check():
+    """Ready once MongoDB answers, the pool has reached minPoolSize and the public caches are warm"""
+    report = await readiness.check()
+    return JSONResponse(report, status_code=200 if report["status"] == "ready" else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request, database and cache metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,5 @@
+"""
+Migrations module - importing it registers every versioned data migration
+"""
+
+from . import project_object_ids
@@ -0,0 +1,50 @@
+"""
+Migration 0001 - Store project_id references as ObjectId instead of string
+"""
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.core.migrations import MIGRATION_BATCH_SIZE, MigrationContext, migration
+
+# Collections holding a `project_id` reference to `projects._id`
+REFERENCING_COLLECTIONS = ["testimonials", "tokens", "tokens_archive", "spent_tokens"]
+
+async def _backfill(ctx: MigrationContext, name: str):
+    """Convert one collection in `_id` order, checkpointing after every batch"""
+    collection = ctx.db[name]
+    state = ctx.checkpoint.setdefault(name, {"after": None, "done": False})
+    converted = ctx.progress.get(f"{name}_converted", 0)
+    skipped = ctx.progress.get(f"{name}_skipped", 0)
+    
+    while not state["done"]:
+        query = {"project_id": {"$type": "string"}}
+        if state["after"] is not None:
+            query["_id"] = {"$gt": state["after"]}
+        
+        batch = await collection.find(query, {"project_id": 1}).sort("_id", 1).limit(MIGRATION_BATCH_SIZE).to_list(None)
+        if not batch:
+            state["done"] = True
+            await ctx.save()
+            break
+        
+        # Match the old value too, so a concurrent rewrite of the reference wins
+        updates = [
+            UpdateOne({"_id": doc["_id"], "project_id": doc["project_id"]}, {"$set": {"project_id": ObjectId(doc["project_id"])}})
+            for doc in batch
+            if ObjectId.is_valid(doc["project_id"])
+        ]
+        if updates:
+            result = await collection.bulk_write(updates, ordered=False)
+            converted += result.modified_count
+        skipped += len(batch) - len(updates)
+        
+        state["after"] = batch[-1]["_id"]
+        await ctx.save(**{f"{name}_converted": converted, f"{name}_skipped": skipped})
+        await ctx.pause()
+
+@migration("0001", "Store project_id references as ObjectId")
+async def project_object_ids(ctx: MigrationContext) -> dict:
+    for name in REFERENCING_COLLECTIONS:
+        await _backfill(ctx, name)
+    return ctx.progress
@@ -2,12 +2,24 @@
 Admin Routes - Authentication, Dashboard, and Admin Management
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from fastapi.responses import PlainTextResponse
 from datetime import datetime, timedelta
 from bson import ObjectId
-from typing import List
+from pymongo import ReturnDocument
+from typing import List, Optional
+import json
 
+from app.core.cache import public_cache
+from app.core.profiler import PROFILER_ENABLED, profiler, render_collapsed
+from app.core.slow_queries import SLOW_QUERY_COLLECTION
+from app.core.snapshots import snapshot_publisher
+from app.core.token_filter import token_filter
 from app.core.database import get_database
+from app.core.jobs import enqueue_job, job_cancelled
+from app.core.monitoring import query_budget
+from app.core.admission import AdmissionRoute
+from app.core.deadlines import deadline
 from app.core.security import (
     verify_password,
     get_password_hash,
@@ -23,10 +35,25 @@ from app.schemas.schemas import (
     ProjectCreate,
     ProjectUpdate,
     ProjectResponse,
-    TestimonialResponse
+    TestimonialResponse,
+    ImportFormat,
+    ImportSummary,
+    JobResponse,
+    SlowQueryResponse
 )
+from app.utils import cascade  # registers the project_delete job handler
+from app.utils.importer import IMPORT_ERROR_SAMPLE, ImportFailed, ImportInProgress, import_summary, run_import
+from app.utils.lookups import (
+    count_by_project,
+    deleting_project_refs,
+    exclude_projects,
+    find_projects,
+    project_name,
+    project_ref_query
+)
+from app.utils.retention import enqueue_token_archive
 
-router = APIRouter()
+router = APIRouter(route_class=AdmissionRoute)
 
 # ============== AUTHENTICATION ==============
 
@@ -134,13 +161,17 @@ async def get_current_admin_info(current_admin: dict = Depends(get_current_admin
 # ============== DASHBOARD ==============
 
 @router.get("/dashboard", response_model=DashboardStats)
+@query_budget(9)
 async def get_dashboard_stats(current_admin: dict = Depends(get_current_admin)):
     """Get dashboard statistics"""
     db = get_database()
     
+    # Testimonials of projects being deleted are left out everywhere
+    deleting = await deleting_project_refs(db)
+    
     # Get counts
-    total_projects = await db.projects.count_documents({})
-    total_testimonials = await db.testimonials.count_documents({})
+    total_projects = await db.projects.count_documents({"deleting": {"$ne": True}})
+    total_testimonials = await db.testimonials.count_documents(exclude_projects({}, deleting))
     total_tokens = await db.tokens.count_documents({})
     active_tokens = await db.tokens.count_documents({
         "status": "active",
@@ -149,27 +180,25 @@ async def get_dashboard_stats(current_admin: dict = Depends(get_current_admin)):
     
     # Get average rating
     pipeline = [
+        {"$match": exclude_projects({}, deleting)},
         {"$group": {"_id": None, "avg_rating": {"$avg": "$rating"}}}
     ]
     rating_result = await db.testimonials.aggregate(pipeline).to_list(1)
     average_rating = rating_result[0]["avg_rating"] if rating_result else 0.0
     
     # Get featured count
-    featured_count = await db.testimonials.count_documents({"is_featured": True})
+    featured_count = await db.testimonials.count_documents(exclude_projects({"is_featured": True}, deleting))
     
     # Get recent testimonials
-    recent_cursor = db.testimonials.find().sort("created_at", -1).limit(5)
+    recent = await db.testimonials.find(exclude_projects({}, deleting)).sort("created_at", -1).limit(5).to_list(None)
+    projects = await find_projects(db, (doc["project_id"] for doc in recent), {"name": 1})
     recent_testimonials = []
     
-    async for testimonial in recent_cursor:
-        # Get project name
-        project = await db.projects.find_one({"_id": ObjectId(testimonial["project_id"])})
-        project_name = project["name"] if project else "Unknown Project"
-        
+    for testimonial in recent:
         recent_testimonials.append(TestimonialResponse(
             id=str(testimonial["_id"]),
-            project_id=testimonial["project_id"],
-            project_name=project_name,
+            project_id=str(testimonial["project_id"]),
+            project_name=project_name(projects, testimonial["project_id"], missing="Unknown Project"),
             client_name=testimonial["client_name"],
             client_role=testimonial.get("client_role"),
             client_company=testimonial.get("client_company"),
@@ -193,8 +222,36 @@ async def get_dashboard_stats(current_admin: dict = Depends(get_current_admin)):
         recent_testimonials=recent_testimonials
     )
 
+@router.get("/cache/stats")
+async def get_cache_stats(current_admin: dict = Depends(get_current_admin)):
+    """Get public cache, request coalescing and token filter counters for this worker"""
+    return {
+        "public": public_cache.stats(),
+        "snapshots": snapshot_publisher.stats(),
+        "token_filter": token_filter.stats()
+    }
+
 # ============== PROJECTS ==============
 
+def _project_response(project: dict, testimonial_count: int) -> ProjectResponse:
+    """Build the admin response for a project document"""
+    return ProjectResponse(
+        id=str(project["_id"]),
+        name=project["name"],
+        description=project.get("description"),
+        client_name=project["client_name"],
+        client_email=project.get("client_email"),
+        client_company=project.get("client_company"),
+        project_url=project.get("project_url"),
+        project_image=project.get("project_image"),
+        tags=project.get("tags", []),
+        status=project["status"],
+        created_at=project["created_at"],
+        updated_at=project["updated_at"],
+        testimonial_count=testimonial_count,
+        has_testimonial=testimonial_count > 0
+    )
+
 @router.post("/projects", response_model=ProjectResponse)
 async def create_project(
     project_data: ProjectCreate,
@@ -238,37 +295,17 @@ async def create_project(
     )
 
 @router.get("/projects", response_model=List[ProjectResponse])
+@query_budget(2)
 async def get_all_projects(current_admin: dict = Depends(get_current_admin)):
     """Get all projects"""
     db = get_database()
     
-    projects = []
-    cursor = db.projects.find().sort("created_at", -1)
-    
-    async for project in cursor:
-        project_id = str(project["_id"])
-        
-        # Count testimonials for this project
-        testimonial_count = await db.testimonials.count_documents({"project_id": project_id})
-        
-        projects.append(ProjectResponse(
-            id=project_id,
-            name=project["name"],
-            description=project.get("description"),
-            client_name=project["client_name"],
-            client_email=project.get("client_email"),
-            client_company=project.get("client_company"),
-            project_url=project.get("project_url"),
-            project_image=project.get("project_image"),
-            tags=project.get("tags", []),
-            status=project["status"],
-            created_at=project["created_at"],
-            updated_at=project["updated_at"],
-            testimonial_count=testimonial_count,
-            has_testimonial=testimonial_count > 0
-        ))
+    docs = await db.projects.find({"deleting": {"$ne": True}}).sort("created_at", -1).to_list(None)
     
-    return projects
+    # Count testimonials for all projects at once
+    counts = await count_by_project(db.testimonials, [str(project["_id"]) for project in docs])
+    
+    return [_project_response(project, counts.get(str(project["_id"]), 0)) for project in docs]
 
 @router.get("/projects/{project_id}", response_model=ProjectResponse)
 async def get_project(project_id: str, current_admin: dict = Depends(get_current_admin)):
@@ -276,7 +313,7 @@ async def get_project(project_id: str, current_admin: dict = Depends(get_current
     db = get_database()
     
     try:
-        project = await db.projects.find_one({"_id": ObjectId(project_id)})
+        project = await db.projects.find_one({"_id": ObjectId(project_id), "deleting": {"$ne": True}})
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -289,24 +326,9 @@ async def get_project(project_id: str, current_admin: dict = Depends(get_current
             detail="Project not found"
         )
     
-    testimonial_count = await db.testimonials.count_documents({"project_id": project_id})
+    testimonial_count = await db.testimonials.count_documents({"project_id": project_ref_query([project_id])})
     
-    return ProjectResponse(
-        id=str(project["_id"]),
-        name=project["name"],
-        description=project.get("description"),
-        client_name=project["client_name"],
-        client_email=project.get("client_email"),
-        client_company=project.get("client_company"),
-        project_url=project.get("project_url"),
-        project_image=project.get("project_image"),
-        tags=project.get("tags", []),
-        status=project["status"],
-        created_at=project["created_at"],
-        updated_at=project["updated_at"],
-        testimonial_count=testimonial_count,
-        has_testimonial=testimonial_count > 0
-    )
+    return _project_response(project, testimonial_count)
 
 @router.put("/projects/{project_id}", response_model=ProjectResponse)
 async def update_project(
@@ -328,9 +350,10 @@ async def update_project(
                 update_doc[field] = value
     
     try:
-        result = await db.projects.update_one(
-            {"_id": ObjectId(project_id)},
-            {"$set": update_doc}
+        project = await db.projects.find_one_and_update(
+            {"_id": ObjectId(project_id), "deleting": {"$ne": True}},
+            {"$set": update_doc},
+            return_document=ReturnDocument.AFTER
         )
     except:
         raise HTTPException(
@@ -338,41 +361,311 @@ async def update_project(
             detail="Invalid project ID"
         )
     
-    if result.matched_count == 0:
+    if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
     
-    return await get_project(project_id, current_admin)
+    testimonial_count = await db.testimonials.count_documents({"project_id": project_ref_query([project_id])})
+    
+    return _project_response(project, testimonial_count)
 
-@router.delete("/projects/{project_id}")
+@router.delete("/projects/{project_id}", status_code=status.HTTP_202_ACCEPTED)
 async def delete_project(project_id: str, current_admin: dict = Depends(get_current_admin)):
-    """Delete a project and its associated tokens and testimonials"""
+    """Hide a project and delete it with its tokens and testimonials in the background"""
     db = get_database()
     
+    job_id = ObjectId()
+    
     try:
-        # Delete project
-        result = await db.projects.delete_one({"_id": ObjectId(project_id)})
-        
-        if result.deleted_count == 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Project not found"
-            )
-        
-        # Delete associated tokens
-        await db.tokens.delete_many({"project_id": project_id})
-        
-        # Delete associated testimonials
-        await db.testimonials.delete_many({"project_id": project_id})
-        
-    except HTTPException:
-        raise
+        # Mark as deleting - hidden from every query from here on
+        project = await db.projects.find_one_and_update(
+            {"_id": ObjectId(project_id), "deleting": {"$ne": True}},
+            {"$set": {"deleting": True, "deletion_job_id": str(job_id), "updated_at": datetime.utcnow()}}
+        )
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid project ID"
         )
     
-    return {"message": "Project deleted successfully"}
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    await enqueue_job(
+        "project_delete",
+        {"project_id": project_id},
+        created_by=current_admin["admin_id"],
+        job_id=job_id
+    )
+    
+    return {"message": "Project deletion started", "job_id": str(job_id)}
+
+# ============== BULK IMPORT ==============
+
+IMPORT_CONTENT_TYPES = {
+    "text/csv": ImportFormat.CSV,
+    "application/x-ndjson": ImportFormat.NDJSON,
+    "application/ndjson": ImportFormat.NDJSON,
+    "application/jsonl": ImportFormat.NDJSON
+}
+
+@router.post("/import", response_model=ImportSummary)
+@deadline(None)
+async def import_testimonials(
+    request: Request,
+    import_format: Optional[ImportFormat] = Query(None, alias="format"),
+    import_id: str = Query(..., pattern=r"^[A-Za-z0-9._-]{1,100}$"),
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Stream a CSV or NDJSON body of historical testimonials into the database
+
+    The body is read as it arrives and written in batches. The client picks
+    the `import_id` (e.g. file name and size), so after a dropped upload
+    re-sending the same file with it resumes after the last checkpoint; a
+    completed import is not applied twice.
+    """
+    if import_format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        import_format = IMPORT_CONTENT_TYPES.get(content_type)
+    if import_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass ?format=csv|ndjson or a text/csv or application/x-ndjson body"
+        )
+    
+    try:
+        return await run_import(
+            get_database(),
+            request.stream(),
+            import_format,
+            import_id,
+            created_by=current_admin["admin_id"]
+        )
+    except ImportFailed as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ImportInProgress as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+@router.get("/imports/{import_id}", response_model=ImportSummary)
+async def get_import(
+    import_id: str,
+    skip: int = 0,
+    limit: int = IMPORT_ERROR_SAMPLE,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Progress of an import with a page of its row errors"""
+    summary = await import_summary(get_database(), import_id, max(skip, 0), min(max(limit, 1), 1000))
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import not found"
+        )
+    
+    return summary
+
+# ============== TOKEN RETENTION ==============
+
+@router.post("/tokens/archive")
+async def archive_expired_tokens(current_admin: dict = Depends(get_current_admin)):
+    """Move long-expired tokens to the archive now instead of waiting for the schedule"""
+    job_id = await enqueue_token_archive(created_by=current_admin["admin_id"])
+    
+    return {"message": "Token archive started", "job_id": str(job_id)}
+
+# ============== JOBS ==============
+
+def _job_response(job: dict) -> JobResponse:
+    """Build the response for a job document"""
+    return JobResponse(
+        id=str(job["_id"]),
+        type=job["type"],
+        status=job["status"],
+        payload=job.get("payload", {}),
+        progress=job.get("progress", {}),
+        result=job.get("result"),
+        error=job.get("error"),
+        attempts=job.get("attempts", 0),
+        max_attempts=job.get("max_attempts", 1),
+        run_at=job.get("run_at"),
+        worker_id=job.get("worker_id"),
+        created_by=job.get("created_by"),
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+        started_at=job.get("started_at"),
+        finished_at=job.get("finished_at")
+    )
+
+async def _find_job(db, job_id: str) -> dict:
+    try:
+        job = await db.jobs.find_one({"_id": ObjectId(job_id)})
+    except:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid job ID"
+        )
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return job
+
+@router.get("/jobs", response_model=List[JobResponse])
+async def get_jobs(
+    job_status: Optional[str] = Query(None, alias="status"),
+    job_type: Optional[str] = Query(None, alias="type"),
+    limit: int = 50,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """List background jobs, newest first"""
+    db = get_database()
+    
+    query = {}
+    if job_status:
+        query["status"] = job_status
+    if job_type:
+        query["type"] = job_type
+    
+    cursor = db.jobs.find(query).sort("created_at", -1).limit(min(max(limit, 1), 500))
+    return [_job_response(job) async for job in cursor]
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, current_admin: dict = Depends(get_current_admin)):
+    """Get the status and progress of a background job"""
+    db = get_database()
+    
+    return _job_response(await _find_job(db, job_id))
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(job_id: str, current_admin: dict = Depends(get_current_admin)):
+    """Cancel a queued or running job"""
+    db = get_database()
+    
+    job = await _find_job(db, job_id)
+    job = await db.jobs.find_one_and_update(
+        {"_id": job["_id"], "status": {"$in": ["queued", "running"]}},
+        {"$set": {"status": "cancelled", "updated_at": datetime.utcnow(), "finished_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Only queued or running jobs can be cancelled"
+        )
+    
+    await job_cancelled(job)
+    return _job_response(job)
+
+@router.post("/jobs/{job_id}/retry", response_model=JobResponse)
+async def retry_job(job_id: str, current_admin: dict = Depends(get_current_admin)):
+    """Queue a failed or cancelled job again"""
+    db = get_database()
+    
+    job = await _find_job(db, job_id)
+    job = await db.jobs.find_one_and_update(
+        {"_id": job["_id"], "status": {"$in": ["failed", "cancelled"]}},
+        {"$set": {
+            "status": "queued",
+            "attempts": 0,
+            "run_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+            "finished_at": None
+        }},
+        return_document=ReturnDocument.AFTER
+    )
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Only failed or cancelled jobs can be retried"
+        )
+    
+    return _job_response(job)
+
+# ============== DIAGNOSTICS ==============
+
+def _load_json(value: Optional[str]):
+    try:
+        return json.loads(value) if value else None
+    except ValueError:
+        return value
+
+@router.get("/slow-queries", response_model=List[SlowQueryResponse])
+async def get_slow_queries(
+    collection: Optional[str] = None,
+    explained_only: bool = False,
+    limit: int = 50,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """List recently logged slow MongoDB commands with their captured plans, newest first"""
+    db = get_database()
+    
+    query = {}
+    if collection:
+        query["collection"] = collection
+    if explained_only:
+        query["explained"] = True
+    
+    cursor = db[SLOW_QUERY_COLLECTION].find(query).sort("$natural", -1).limit(min(max(limit, 1), 500))
+    
+    return [
+        SlowQueryResponse(
+            id=str(entry["_id"]),
+            ts=entry["ts"],
+            route=entry.get("route"),
+            command=entry["command"],
+            collection=entry.get("collection", ""),
+            shape=_load_json(entry.get("shape")),
+            duration_ms=entry["duration_ms"],
+            outcome=entry.get("outcome", "success"),
+            explained=entry.get("explained", False),
+            plan_summary=entry.get("plan_summary"),
+            winning_plan=_load_json(entry.get("winning_plan")),
+            docs_examined=entry.get("docs_examined"),
+            keys_examined=entry.get("keys_examined"),
+            n_returned=entry.get("n_returned"),
+            execution_ms=entry.get("execution_ms"),
+            explain_error=entry.get("explain_error")
+        )
+        async for entry in cursor
+    ]
+
+@router.get("/profile", response_class=PlainTextResponse)
+@deadline(None)
+async def profile_worker(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    all_threads: bool = False,
+    include_idle: bool = False,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Sample this worker's stacks and return them in collapsed (flamegraph) format"""
+    if not PROFILER_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiler is disabled"
+        )
+    
+    try:
+        result = await profiler.profile(seconds, interval_ms / 1000, all_threads, include_idle)
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    return PlainTextResponse(
+        render_collapsed(result["stacks"]),
+        headers={
+            "X-Profile-Samples": str(result["samples"]),
+            "X-Profile-Idle-Samples": str(result["idle"])
+        }
+    )
@@ -2,95 +2,236 @@
 Public Routes - Public endpoints for testimonial display
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from datetime import datetime
-from bson import ObjectId
-from typing import List, Optional
+from typing import List, NamedTuple, Optional, Tuple
+import asyncio
+import json
+import os
 
+from app.core.cache import public_cache, cached_json_response, cache_control
+from app.core.compression import choose_encoding
 from app.core.database import get_database
+from app.core.events import broker
+from app.core.monitoring import query_budget
+from app.core.readiness import readiness
+from app.core.snapshots import snapshot_publisher
+from app.core.admission import AdmissionRoute
+from app.core.deadlines import deadline
 from app.schemas.schemas import (
+    ProjectStatus,
+    PublicSort,
     PublicTestimonialResponse,
-    PublicProjectResponse
+    PublicProjectResponse,
+    TagMatch
 )
+from app.utils.lookups import deleting_project_refs, exclude_projects, find_projects, project_ref_query
 
-router = APIRouter()
+router = APIRouter(route_class=AdmissionRoute)
+
+# Server-Sent Events configuration
+STREAM_HEARTBEAT_SECONDS = float(os.environ.get("STREAM_HEARTBEAT_SECONDS", 15))
+STREAM_MAX_SUBSCRIBERS = int(os.environ.get("STREAM_MAX_SUBSCRIBERS", 5000))
+
+def _invalidate_public_cache(event: dict):
+    """Drop cached public responses whenever watched collections change
+
+    Edits may unpublish or delete content, so they never get served stale;
+    stale-while-revalidate only covers entries whose TTL ran out.
+    """
+    if event["type"] == "invalidate":
+        public_cache.invalidate()
+
+broker.add_listener(_invalidate_public_cache)
+
+# At most this many tags can be combined in one filter, each at most this long
+PUBLIC_MAX_TAGS = 10
+PUBLIC_MAX_TAG_LENGTH = 100
+
+# Largest page a public list serves; also bounds the distinct cache keys per filter
+PUBLIC_MAX_LIMIT = 100
+
+class PublicFilters(NamedTuple):
+    """Normalized public list filters; hashable, so it doubles as a cache key"""
+    tags: Tuple[str, ...] = ()
+    tag_match: TagMatch = TagMatch.ANY
+    project_status: Optional[ProjectStatus] = None
+    min_rating: Optional[int] = None
+    featured_only: bool = False
+    sort: PublicSort = PublicSort.NEWEST
+
+def _public_filters(
+    tags: Optional[List[str]],
+    tag_match: TagMatch,
+    project_status: Optional[ProjectStatus],
+    min_rating: Optional[int],
+    featured_only: bool,
+    sort: PublicSort
+) -> PublicFilters:
+    """Build filters from query parameters; `tag` may repeat or be comma-separated"""
+    names = sorted({name.strip() for value in tags or [] for name in value.split(",") if name.strip()})
+    if len(names) > PUBLIC_MAX_TAGS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {PUBLIC_MAX_TAGS} tags can be combined"
+        )
+    if any(len(name) > PUBLIC_MAX_TAG_LENGTH for name in names):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tags can be at most {PUBLIC_MAX_TAG_LENGTH} characters"
+        )
+    
+    return PublicFilters(tuple(names), tag_match, project_status, min_rating, featured_only, sort)
+
+def _project_filter(filters: PublicFilters) -> dict:
+    """Project conditions of a filter (uses the multikey `tags` index)"""
+    query = {"deleting": {"$ne": True}}
+    if filters.tags:
+        operator = "$all" if filters.tag_match == TagMatch.ALL else "$in"
+        query["tags"] = {operator: list(filters.tags)}
+    if filters.project_status:
+        query["status"] = filters.project_status.value
+    return query
+
+def _testimonial_filter(filters: PublicFilters) -> dict:
+    """Testimonial conditions of a filter"""
+    query = {"is_published": True}
+    if filters.featured_only:
+        query["is_featured"] = True
+    if filters.min_rating:
+        query["rating"] = {"$gte": filters.min_rating}
+    return query
+
+def _testimonial_sort(filters: PublicFilters) -> list:
+    """Sort order matching the compound testimonial indexes"""
+    if filters.sort == PublicSort.HIGHEST_RATED:
+        return [("rating", -1), ("created_at", -1)]
+    return [("created_at", -1)]
+
+def _public_testimonial(testimonial: dict, project_name: str) -> PublicTestimonialResponse:
+    """Build the public response for a testimonial document"""
+    return PublicTestimonialResponse(
+        id=str(testimonial["_id"]),
+        client_name=testimonial["client_name"],
+        client_role=testimonial.get("client_role"),
+        client_company=testimonial.get("client_company"),
+        client_avatar=testimonial.get("client_avatar"),
+        rating=testimonial["rating"],
+        title=testimonial["title"],
+        content=testimonial["content"],
+        project_name=project_name,
+        is_featured=testimonial.get("is_featured", False),
+        created_at=testimonial["created_at"]
+    )
 
 @router.get("/testimonials", response_model=List[PublicTestimonialResponse])
+@query_budget(3)
+@deadline(5)
 async def get_public_testimonials(
     featured_only: bool = False,
-    limit: int = 50
+    limit: int = Query(50, ge=1, le=PUBLIC_MAX_LIMIT),
+    tags: Optional[List[str]] = Query(None, alias="tag"),
+    tag_match: TagMatch = TagMatch.ANY,
+    project_status: Optional[ProjectStatus] = Query(None, alias="status"),
+    min_rating: Optional[int] = Query(None, ge=1, le=5),
+    sort: PublicSort = PublicSort.NEWEST
 ):
-    """Get all published testimonials for public display"""
+    """Get published testimonials for public display, optionally filtered by project tag, status and rating"""
+    filters = _public_filters(tags, tag_match, project_status, min_rating, featured_only, sort)
+    return await _public_testimonials_response(filters, limit)
+
+async def _public_testimonials_response(filters: PublicFilters, limit: int) -> Response:
+    return await cached_json_response(
+        public_cache,
+        ("testimonials", filters, limit),
+        lambda: _load_public_testimonials(filters, limit)
+    )
+
+async def _load_public_testimonials(filters: PublicFilters, limit: int) -> List[PublicTestimonialResponse]:
+    """Query published testimonials with their project names"""
     db = get_database()
     
-    query = {"is_published": True}
-    if featured_only:
-        query["is_featured"] = True
+    query = _testimonial_filter(filters)
+    projects = None
     
-    testimonials = []
-    cursor = db.testimonials.find(query).sort("created_at", -1).limit(limit)
+    if filters.tags or filters.project_status:
+        # Matching projects first; their names serve the response as well
+        projects = {
+            str(project["_id"]): project
+            async for project in db.projects.find(_project_filter(filters), {"name": 1})
+        }
+        if not projects:
+            return []
+        query["project_id"] = project_ref_query(projects)
+    else:
+        # Leave out projects being deleted in the query itself, so pages stay full
+        query = exclude_projects(query, await deleting_project_refs(db))
     
-    async for testimonial in cursor:
-        # Get project name
-        try:
-            project = await db.projects.find_one({"_id": ObjectId(testimonial["project_id"])})
-            project_name = project["name"] if project else "Project"
-        except:
-            project_name = "Project"
-        
-        testimonials.append(PublicTestimonialResponse(
-            id=str(testimonial["_id"]),
-            client_name=testimonial["client_name"],
-            client_role=testimonial.get("client_role"),
-            client_company=testimonial.get("client_company"),
-            client_avatar=testimonial.get("client_avatar"),
-            rating=testimonial["rating"],
-            title=testimonial["title"],
-            content=testimonial["content"],
-            project_name=project_name,
-            is_featured=testimonial.get("is_featured", False),
-            created_at=testimonial["created_at"]
-        ))
+    docs = await db.testimonials.find(query).sort(_testimonial_sort(filters)).limit(limit).to_list(None)
+    if projects is None:
+        projects = await find_projects(db, (doc["project_id"] for doc in docs), {"name": 1})
+    
+    testimonials = []
+    for testimonial in docs:
+        project = projects.get(str(testimonial["project_id"]))
+        testimonials.append(_public_testimonial(testimonial, project["name"] if project else "Project"))
     
     return testimonials
 
 @router.get("/testimonials/featured", response_model=List[PublicTestimonialResponse])
-async def get_featured_testimonials(limit: int = 10):
+@query_budget(3)
+@deadline(5)
+async def get_featured_testimonials(limit: int = Query(10, ge=1, le=PUBLIC_MAX_LIMIT)):
     """Get featured testimonials for homepage display"""
-    return await get_public_testimonials(featured_only=True, limit=limit)
+    return await _public_testimonials_response(PublicFilters(featured_only=True), limit)
 
 @router.get("/projects", response_model=List[PublicProjectResponse])
-async def get_public_projects():
-    """Get all projects with their testimonials for public portfolio"""
+@query_budget(2)
+@deadline(5)
+async def get_public_projects(
+    tags: Optional[List[str]] = Query(None, alias="tag"),
+    tag_match: TagMatch = TagMatch.ANY,
+    project_status: Optional[ProjectStatus] = Query(None, alias="status"),
+    min_rating: Optional[int] = Query(None, ge=1, le=5),
+    featured_only: bool = False,
+    sort: PublicSort = PublicSort.NEWEST
+):
+    """Get projects with their testimonials for the public portfolio
+
+    `min_rating` and `featured_only` filter the embedded testimonials; projects
+    left without any are omitted.
+    """
+    filters = _public_filters(tags, tag_match, project_status, min_rating, featured_only, sort)
+    return await cached_json_response(public_cache, ("projects", filters), lambda: _load_public_projects(filters))
+
+async def _load_public_projects(filters: PublicFilters = PublicFilters()) -> List[PublicProjectResponse]:
+    """Query visible projects with their published testimonials"""
     db = get_database()
     
-    projects = []
-    cursor = db.projects.find({"status": {"$ne": "archived"}}).sort("created_at", -1)
+    # Archived projects never appear in the public portfolio
+    if filters.project_status == ProjectStatus.ARCHIVED:
+        return []
+    query = _project_filter(filters)
+    if not filters.project_status:
+        query["status"] = {"$ne": "archived"}
+    docs = await db.projects.find(query).sort("created_at", -1).to_list(None)
+    
+    # Get published testimonials of all listed projects at once
+    by_project = {str(project["_id"]): [] for project in docs}
+    t_cursor = db.testimonials.find({
+        **_testimonial_filter(filters),
+        "project_id": project_ref_query(by_project)
+    }).sort(_testimonial_sort(filters))
+    
+    async for testimonial in t_cursor:
+        by_project[str(testimonial["project_id"])].append(testimonial)
     
-    async for project in cursor:
+    projects = []
+    for project in docs:
         project_id = str(project["_id"])
-        
-        # Get testimonials for this project
-        testimonials = []
-        t_cursor = db.testimonials.find({
-            "project_id": project_id,
-            "is_published": True
-        }).sort("created_at", -1)
-        
-        async for testimonial in t_cursor:
-            testimonials.append(PublicTestimonialResponse(
-                id=str(testimonial["_id"]),
-                client_name=testimonial["client_name"],
-                client_role=testimonial.get("client_role"),
-                client_company=testimonial.get("client_company"),
-                client_avatar=testimonial.get("client_avatar"),
-                rating=testimonial["rating"],
-                title=testimonial["title"],
-                content=testimonial["content"],
-                project_name=project["name"],
-                is_featured=testimonial.get("is_featured", False),
-                created_at=testimonial["created_at"]
-            ))
+        if not by_project[project_id] and (filters.min_rating or filters.featured_only):
+            continue
         
         projects.append(PublicProjectResponse(
             id=project_id,
@@ -99,22 +240,41 @@ async def get_public_projects():
             project_url=project.get("project_url"),
             project_image=project.get("project_image"),
             tags=project.get("tags", []),
-            testimonials=testimonials
+            testimonials=[_public_testimonial(testimonial, project["name"]) for testimonial in by_project[project_id]]
         ))
     
+    if filters.sort == PublicSort.HIGHEST_RATED:
+        # Best average rating first; projects without testimonials last (stable, so newest within ties)
+        projects.sort(key=lambda project: -_average_rating(project.testimonials))
+    
     return projects
 
+def _average_rating(testimonials: List[PublicTestimonialResponse]) -> float:
+    if not testimonials:
+        return 0
+    return sum(testimonial.rating for testimonial in testimonials) / len(testimonials)
+
 @router.get("/stats")
+@query_budget(5)
+@deadline(5)
 async def get_public_stats():
     """Get public statistics for display"""
+    return await cached_json_response(public_cache, ("stats",), _load_public_stats)
+
+async def _load_public_stats() -> dict:
+    """Compute public statistics"""
     db = get_database()
     
-    total_projects = await db.projects.count_documents({"status": {"$ne": "archived"}})
-    total_testimonials = await db.testimonials.count_documents({"is_published": True})
+    total_projects = await db.projects.count_documents({
+        "status": {"$ne": "archived"},
+        "deleting": {"$ne": True}
+    })
+    published = exclude_projects({"is_published": True}, await deleting_project_refs(db))
+    total_testimonials = await db.testimonials.count_documents(published)
     
     # Get average rating
     pipeline = [
-        {"$match": {"is_published": True}},
+        {"$match": published},
         {"$group": {"_id": None, "avg_rating": {"$avg": "$rating"}}}
     ]
     rating_result = await db.testimonials.aggregate(pipeline).to_list(1)
@@ -122,7 +282,7 @@ async def get_public_stats():
     
     # Get rating distribution
     rating_pipeline = [
-        {"$match": {"is_published": True}},
+        {"$match": published},
         {"$group": {"_id": "$rating", "count": {"$sum": 1}}}
     ]
     rating_dist = await db.testimonials.aggregate(rating_pipeline).to_list(5)
@@ -135,3 +295,99 @@ async def get_public_stats():
         "rating_distribution": rating_distribution,
         "satisfaction_rate": round((average_rating / 5) * 100, 1)
     }
+
+@router.get("/stream")
+async def stream_public_events(request: Request):
+    """Push newly published or featured testimonials as Server-Sent Events"""
+    if broker.subscriber_count >= STREAM_MAX_SUBSCRIBERS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open streams",
+            headers={"Retry-After": "30"}
+        )
+    
+    queue = broker.subscribe()
+    
+    async def event_source():
+        try:
+            yield f"retry: {int(STREAM_HEARTBEAT_SECONDS * 1000)}\n\n"
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                if event is None:
+                    break
+                
+                if event["type"] == "testimonial":
+                    yield f"event: testimonial\ndata: {json.dumps(event['data'])}\n\n"
+                elif event["type"] == "invalidate":
+                    yield f"event: invalidate\ndata: {json.dumps({'collection': event['collection']})}\n\n"
+        finally:
+            broker.unsubscribe(queue)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# ============== SNAPSHOTS ==============
+
+snapshot_publisher.register("projects", lambda: _load_public_projects())
+snapshot_publisher.register("testimonials", lambda: _load_public_testimonials(PublicFilters(), 50))
+snapshot_publisher.register("featured", lambda: _load_public_testimonials(PublicFilters(featured_only=True), 10))
+snapshot_publisher.register("stats", lambda: _load_public_stats())
+broker.add_listener(snapshot_publisher.schedule)
+
+# ============== WARM-UP ==============
+
+async def _warm_featured():
+    """The homepage asks for 6 featured testimonials; 10 is the API default"""
+    for limit in (6, 10):
+        await _public_testimonials_response(PublicFilters(featured_only=True), limit)
+
+readiness.register("public_feed", lambda: _public_testimonials_response(PublicFilters(), 50))
+readiness.register("featured", _warm_featured)
+readiness.register("stats", lambda: cached_json_response(public_cache, ("stats",), _load_public_stats))
+
+@router.get("/snapshots/{name}")
+async def get_public_snapshot(name: str, request: Request):
+    """Serve a pre-rendered public response (projects, testimonials, featured, stats) from disk"""
+    producer = snapshot_publisher.renderer(name)
+    if producer is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Snapshot not found"
+        )
+    
+    snapshot = snapshot_publisher.current.get(name)
+    if snapshot is None or not os.path.exists(snapshot.files[None]):
+        # Not published yet on this worker, or pruned by another - answer from the live cache
+        return await cached_json_response(public_cache, ("snapshot", name), producer)
+    
+    etag = f'"{snapshot.version}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control(public_cache),
+        "Vary": "Accept-Encoding"
+    }
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    encoding = choose_encoding(
+        request.headers.get("accept-encoding", ""),
+        [e for e in snapshot.files if e]
+    )
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    
+    return FileResponse(snapshot.files[encoding], media_type="application/json", headers=headers)
@@ -5,27 +5,72 @@ Testimonial Routes - Testimonial Management
 from fastapi import APIRouter, HTTPException, status, Depends
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DeleteOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 from typing import List, Optional
 
 from app.core.database import get_database
-from app.core.security import get_current_admin
+from app.core.monitoring import query_budget
+from app.core.token_filter import token_filter
+from app.core.security import get_current_admin, is_signed_invite_token, verify_signed_invite_token
+from app.core.admission import AdmissionRoute, admission_limit
+from app.core.deadlines import deadline, uninterrupted
 from app.schemas.schemas import (
     TestimonialCreate,
     TestimonialUpdate,
-    TestimonialResponse
+    TestimonialResponse,
+    BulkOperation,
+    TestimonialBulkAction,
+    TestimonialBulkResponse,
+    BulkItemResult
 )
+from app.utils.invites import get_active_project, spend_token, spent_reason
+from app.utils.lookups import deleting_project_refs, exclude_projects, find_projects, project_name, project_ref_query
 
-router = APIRouter()
+router = APIRouter(route_class=AdmissionRoute)
 
-@router.post("/submit", response_model=TestimonialResponse)
-async def submit_testimonial(testimonial_data: TestimonialCreate):
-    """Submit a testimonial using an invite token (public endpoint)"""
-    db = get_database()
+async def _get_project_name(db, project_id: str) -> str:
+    """Look up the name of a testimonial's project"""
+    try:
+        project = await db.projects.find_one({"_id": ObjectId(project_id)}, {"name": 1})
+        return project["name"] if project else "Deleted Project"
+    except:
+        return "Unknown Project"
+
+def _testimonial_response(testimonial: dict, project_name: str) -> TestimonialResponse:
+    """Build the admin response for a testimonial document"""
+    return TestimonialResponse(
+        id=str(testimonial["_id"]),
+        project_id=str(testimonial["project_id"]),
+        project_name=project_name,
+        client_name=testimonial["client_name"],
+        client_role=testimonial.get("client_role"),
+        client_company=testimonial.get("client_company"),
+        client_avatar=testimonial.get("client_avatar"),
+        rating=testimonial["rating"],
+        title=testimonial["title"],
+        content=testimonial["content"],
+        is_featured=testimonial.get("is_featured", False),
+        is_published=testimonial.get("is_published", True),
+        created_at=testimonial["created_at"],
+        updated_at=testimonial["updated_at"]
+    )
+
+async def _check_opaque_token(db, token: str):
+    """Look up a random invite token and its project, rejecting unusable ones"""
+    # Tokens that were never issued are rejected without a database round trip
+    if not token_filter.might_exist(token):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Token tidak valid atau tidak ditemukan"
+        )
     
     # Validate token
-    token_doc = await db.tokens.find_one({"token": testimonial_data.token})
+    token_doc = await db.tokens.find_one({"token": token})
     
     if not token_doc:
+        token_filter.record_false_positive()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Token tidak valid atau tidak ditemukan"
@@ -56,7 +101,7 @@ async def submit_testimonial(testimonial_data: TestimonialCreate):
     # Get project
     project_id = token_doc["project_id"]
     try:
-        project = await db.projects.find_one({"_id": ObjectId(project_id)})
+        project = await db.projects.find_one({"_id": ObjectId(project_id), "deleting": {"$ne": True}})
     except:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -69,10 +114,111 @@ async def submit_testimonial(testimonial_data: TestimonialCreate):
             detail="Project tidak ditemukan"
         )
     
+    return token_doc, project
+
+async def _check_signed_token(db, token: str):
+    """Check a signed invite token in memory and look up its project"""
+    invite = verify_signed_invite_token(token)
+    if invite is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Token tidak valid atau tidak ditemukan"
+        )
+    
+    if invite.expires_at < datetime.utcnow():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token sudah kedaluwarsa"
+        )
+    
+    project = await get_active_project(db, invite.project_id)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project tidak ditemukan"
+        )
+    
+    token_doc = await db.tokens.find_one({"token": token}, {"_id": 1})
+    return invite, token_doc, project
+
+async def _spend_invite(db, token: str, invite, token_doc: Optional[dict]):
+    """Atomically mark the invite used; raise if another submission or a revoke got there first"""
+    if invite is not None:
+        if await spend_token(db, token, "used", invite.project_id, invite.expires_at):
+            # Keep the admin's view of the invite in step with the spent record
+            await db.tokens.update_one(
+                {"token": token, "status": "active"},
+                {"$set": {"status": "used", "used_at": datetime.utcnow()}}
+            )
+            return
+        reason = await spent_reason(db, token)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token telah dicabut" if reason == "revoked" else "Token sudah digunakan"
+        )
+    
+    result = await db.tokens.update_one(
+        {"_id": token_doc["_id"], "status": "active"},
+        {
+            "$set": {
+                "status": "used",
+                "used_at": datetime.utcnow()
+            }
+        }
+    )
+    if result.modified_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token sudah digunakan"
+        )
+
+async def _unspend_invite(db, token: str, invite, token_doc: Optional[dict]):
+    """Give back an invite spent for a testimonial that could not be saved"""
+    if invite is not None:
+        await db.spent_tokens.delete_one({"_id": token, "reason": "used"})
+        await db.tokens.update_one(
+            {"token": token, "status": "used"},
+            {"$set": {"status": "active", "used_at": None}}
+        )
+        return
+    
+    await db.tokens.update_one(
+        {"_id": token_doc["_id"], "status": "used"},
+        {"$set": {"status": "active", "used_at": None}}
+    )
+
+async def _save_submission(db, testimonial_doc: dict, token: str, invite, token_doc: Optional[dict]):
+    """Spend the invite, then insert the testimonial, giving the invite back if the insert fails
+
+    Spending first keeps the change stream from announcing a testimonial
+    that would be rolled back because its invite was already used.
+    """
+    await _spend_invite(db, token, invite, token_doc)
+    try:
+        return await db.testimonials.insert_one(testimonial_doc)
+    except BaseException:
+        await _unspend_invite(db, token, invite, token_doc)
+        raise
+
+@router.post("/submit", response_model=TestimonialResponse)
+@query_budget(6)
+@deadline(5)
+@admission_limit(max_concurrent=32, per_minute=10, burst=5)
+async def submit_testimonial(testimonial_data: TestimonialCreate):
+    """Submit a testimonial using an invite token (public endpoint)"""
+    db = get_database()
+    
+    invite = None
+    if is_signed_invite_token(testimonial_data.token):
+        invite, token_doc, project = await _check_signed_token(db, testimonial_data.token)
+    else:
+        token_doc, project = await _check_opaque_token(db, testimonial_data.token)
+    project_id = str(project["_id"])
+    
     # Create testimonial
     testimonial_doc = {
-        "project_id": project_id,
-        "token_id": str(token_doc["_id"]),
+        "project_id": project["_id"],
+        "token_id": str(token_doc["_id"]) if token_doc else None,
         "client_name": testimonial_data.client_name,
         "client_role": testimonial_data.client_role,
         "client_company": testimonial_data.client_company,
@@ -86,17 +232,9 @@ async def submit_testimonial(testimonial_data: TestimonialCreate):
         "updated_at": datetime.utcnow()
     }
     
-    result = await db.testimonials.insert_one(testimonial_doc)
-    
-    # Mark token as used
-    await db.tokens.update_one(
-        {"_id": token_doc["_id"]},
-        {
-            "$set": {
-                "status": "used",
-                "used_at": datetime.utcnow()
-            }
-        }
+    # The deadline must not fall between spending the invite and saving the testimonial
+    result = await uninterrupted(
+        _save_submission(db, testimonial_doc, testimonial_data.token, invite, token_doc)
     )
     
     return TestimonialResponse(
@@ -116,7 +254,106 @@ async def submit_testimonial(testimonial_data: TestimonialCreate):
         updated_at=testimonial_doc["updated_at"]
     )
 
+@router.post("/bulk", response_model=TestimonialBulkResponse)
+@deadline(30)
+async def bulk_moderate_testimonials(
+    action: TestimonialBulkAction,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Apply one moderation operation to many testimonials in a single bulk write"""
+    db = get_database()
+    
+    # Build the update applied to every testimonial
+    now = datetime.utcnow()
+    if action.operation == BulkOperation.UPDATE:
+        fields = action.update.model_dump(exclude_unset=True) if action.update else {}
+        update_doc = {field: value for field, value in fields.items() if value is not None}
+        if not update_doc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The update operation needs at least one field to change"
+            )
+        update_doc["updated_at"] = now
+    else:
+        update_doc = {
+            BulkOperation.PUBLISH: {"is_published": True},
+            BulkOperation.UNPUBLISH: {"is_published": False},
+            BulkOperation.FEATURE: {"is_featured": True},
+            BulkOperation.UNFEATURE: {"is_featured": False},
+            BulkOperation.DELETE: {}
+        }[action.operation]
+        update_doc = {**update_doc, "updated_at": now}
+    
+    # Parse ids, keeping request order and dropping duplicates
+    results = {}
+    requested_ids = {}
+    for testimonial_id in action.ids:
+        if testimonial_id in results:
+            continue
+        try:
+            oid = ObjectId(testimonial_id)
+        except (InvalidId, TypeError):
+            results[testimonial_id] = BulkItemResult(
+                id=testimonial_id,
+                status="invalid_id",
+                detail="Invalid testimonial ID"
+            )
+            continue
+        if oid not in requested_ids:
+            requested_ids[oid] = testimonial_id
+            results[testimonial_id] = BulkItemResult(id=testimonial_id, status="ok")
+    
+    object_ids = list(requested_ids)
+    
+    def mark(oid: ObjectId, item_status: str, detail: str):
+        testimonial_id = requested_ids[oid]
+        results[testimonial_id] = BulkItemResult(id=testimonial_id, status=item_status, detail=detail)
+    
+    if action.operation == BulkOperation.DELETE and object_ids:
+        # Deleted and missing documents look alike afterwards, so check first
+        existing = {
+            doc["_id"] async for doc in db.testimonials.find({"_id": {"$in": object_ids}}, {"_id": 1})
+        }
+        for oid in object_ids:
+            if oid not in existing:
+                mark(oid, "not_found", "Testimonial not found")
+        object_ids = [oid for oid in object_ids if oid in existing]
+        operations = [DeleteOne({"_id": oid}) for oid in object_ids]
+    else:
+        operations = [UpdateOne({"_id": oid}, {"$set": update_doc}) for oid in object_ids]
+    
+    matched = modified = deleted = 0
+    if operations:
+        try:
+            result = await db.testimonials.bulk_write(operations, ordered=False)
+            matched, modified, deleted = result.matched_count, result.modified_count, result.deleted_count
+        except BulkWriteError as e:
+            matched = e.details.get("nMatched", 0)
+            modified = e.details.get("nModified", 0)
+            deleted = e.details.get("nRemoved", 0)
+            for error in e.details.get("writeErrors", []):
+                mark(object_ids[error["index"]], "error", error.get("errmsg"))
+        
+        if action.operation != BulkOperation.DELETE and matched < len(operations):
+            # Updates never remove documents, so whatever is absent now was never there
+            found = {
+                doc["_id"] async for doc in db.testimonials.find({"_id": {"$in": object_ids}}, {"_id": 1})
+            }
+            for oid in object_ids:
+                if oid not in found:
+                    mark(oid, "not_found", "Testimonial not found")
+    
+    return TestimonialBulkResponse(
+        operation=action.operation.value,
+        requested=len(action.ids),
+        matched=matched,
+        modified=modified,
+        deleted=deleted,
+        results=list(results.values())
+    )
+
 @router.get("/", response_model=List[TestimonialResponse])
+@query_budget(3)
 async def get_all_testimonials(
     project_id: Optional[str] = None,
     featured_only: bool = False,
@@ -128,39 +365,18 @@ async def get_all_testimonials(
     # Build query
     query = {}
     if project_id:
-        query["project_id"] = project_id
+        query["project_id"] = project_ref_query([project_id])
     if featured_only:
         query["is_featured"] = True
+    query = exclude_projects(query, await deleting_project_refs(db))
     
-    testimonials = []
-    cursor = db.testimonials.find(query).sort("created_at", -1)
+    docs = await db.testimonials.find(query).sort("created_at", -1).to_list(None)
+    projects = await find_projects(db, (doc["project_id"] for doc in docs), {"name": 1})
     
-    async for testimonial in cursor:
-        # Get project name
-        try:
-            project = await db.projects.find_one({"_id": ObjectId(testimonial["project_id"])})
-            project_name = project["name"] if project else "Deleted Project"
-        except:
-            project_name = "Unknown Project"
-        
-        testimonials.append(TestimonialResponse(
-            id=str(testimonial["_id"]),
-            project_id=testimonial["project_id"],
-            project_name=project_name,
-            client_name=testimonial["client_name"],
-            client_role=testimonial.get("client_role"),
-            client_company=testimonial.get("client_company"),
-            client_avatar=testimonial.get("client_avatar"),
-            rating=testimonial["rating"],
-            title=testimonial["title"],
-            content=testimonial["content"],
-            is_featured=testimonial.get("is_featured", False),
-            is_published=testimonial.get("is_published", True),
-            created_at=testimonial["created_at"],
-            updated_at=testimonial["updated_at"]
-        ))
-    
-    return testimonials
+    return [
+        _testimonial_response(testimonial, project_name(projects, testimonial["project_id"]))
+        for testimonial in docs
+    ]
 
 @router.get("/{testimonial_id}", response_model=TestimonialResponse)
 async def get_testimonial(
@@ -184,29 +400,7 @@ async def get_testimonial(
             detail="Testimonial not found"
         )
     
-    # Get project name
-    try:
-        project = await db.projects.find_one({"_id": ObjectId(testimonial["project_id"])})
-        project_name = project["name"] if project else "Deleted Project"
-    except:
-        project_name = "Unknown Project"
-    
-    return TestimonialResponse(
-        id=str(testimonial["_id"]),
-        project_id=testimonial["project_id"],
-        project_name=project_name,
-        client_name=testimonial["client_name"],
-        client_role=testimonial.get("client_role"),
-        client_company=testimonial.get("client_company"),
-        client_avatar=testimonial.get("client_avatar"),
-        rating=testimonial["rating"],
-        title=testimonial["title"],
-        content=testimonial["content"],
-        is_featured=testimonial.get("is_featured", False),
-        is_published=testimonial.get("is_published", True),
-        created_at=testimonial["created_at"],
-        updated_at=testimonial["updated_at"]
-    )
+    return _testimonial_response(testimonial, await _get_project_name(db, testimonial["project_id"]))
 
 @router.put("/{testimonial_id}", response_model=TestimonialResponse)
 async def update_testimonial(
@@ -225,9 +419,10 @@ async def update_testimonial(
             update_doc[field] = value
     
     try:
-        result = await db.testimonials.update_one(
+        testimonial = await db.testimonials.find_one_and_update(
             {"_id": ObjectId(testimonial_id)},
-            {"$set": update_doc}
+            {"$set": update_doc},
+            return_document=ReturnDocument.AFTER
         )
     except:
         raise HTTPException(
@@ -235,13 +430,13 @@ async def update_testimonial(
             detail="Invalid testimonial ID"
         )
     
-    if result.matched_count == 0:
+    if not testimonial:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Testimonial not found"
         )
     
-    return await get_testimonial(testimonial_id, current_admin)
+    return _testimonial_response(testimonial, await _get_project_name(db, testimonial["project_id"]))
 
 @router.delete("/{testimonial_id}")
 async def delete_testimonial(
@@ -275,8 +470,17 @@ async def toggle_featured(
     """Toggle featured status of a testimonial"""
     db = get_database()
     
+    # Flip the flag server-side in one atomic round trip
     try:
-        testimonial = await db.testimonials.find_one({"_id": ObjectId(testimonial_id)})
+        testimonial = await db.testimonials.find_one_and_update(
+            {"_id": ObjectId(testimonial_id)},
+            [{"$set": {
+                "is_featured": {"$not": [{"$ifNull": ["$is_featured", False]}]},
+                "updated_at": datetime.utcnow()
+            }}],
+            projection={"is_featured": 1},
+            return_document=ReturnDocument.AFTER
+        )
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -289,14 +493,7 @@ async def toggle_featured(
             detail="Testimonial not found"
         )
     
-    new_status = not testimonial.get("is_featured", False)
-    
-    await db.testimonials.update_one(
-        {"_id": ObjectId(testimonial_id)},
-        {"$set": {"is_featured": new_status, "updated_at": datetime.utcnow()}}
-    )
-    
-    return {"is_featured": new_status}
+    return {"is_featured": testimonial["is_featured"]}
 
 @router.post("/{testimonial_id}/toggle-published")
 async def toggle_published(
@@ -306,8 +503,17 @@ async def toggle_published(
     """Toggle published status of a testimonial"""
     db = get_database()
     
+    # Flip the flag server-side in one atomic round trip
     try:
-        testimonial = await db.testimonials.find_one({"_id": ObjectId(testimonial_id)})
+        testimonial = await db.testimonials.find_one_and_update(
+            {"_id": ObjectId(testimonial_id)},
+            [{"$set": {
+                "is_published": {"$not": [{"$ifNull": ["$is_published", True]}]},
+                "updated_at": datetime.utcnow()
+            }}],
+            projection={"is_published": 1},
+            return_document=ReturnDocument.AFTER
+        )
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -320,11 +526,4 @@ async def toggle_published(
             detail="Testimonial not found"
         )
     
-    new_status = not testimonial.get("is_published", True)
-    
-    await db.testimonials.update_one(
-        {"_id": ObjectId(testimonial_id)},
-        {"$set": {"is_published": new_status, "updated_at": datetime.utcnow()}}
-    )
-    
-    return {"is_published": new_status}
+    return {"is_published": testimonial["is_published"]}
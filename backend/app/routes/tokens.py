@@ -6,18 +6,32 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from datetime import datetime, timedelta
 from bson import ObjectId
 from typing import List
+import heapq
 import os
 
 from app.core.database import get_database
-from app.core.security import generate_invite_token, get_current_admin
+from app.core.monitoring import query_budget
+from app.core.token_filter import token_filter
+from app.core.security import (
+    INVITE_TOKEN_FORMAT,
+    generate_invite_token,
+    generate_signed_invite_token,
+    get_current_admin,
+    is_signed_invite_token,
+    verify_signed_invite_token
+)
+from app.core.admission import AdmissionRoute, admission_limit
+from app.core.deadlines import deadline
 from app.schemas.schemas import (
     InviteTokenCreate,
     InviteTokenResponse,
     TokenValidationResponse,
     ProjectResponse
 )
+from app.utils.invites import get_active_project, spend_token, spent_reason
+from app.utils.lookups import find_projects, project_name, project_ref_query
 
-router = APIRouter()
+router = APIRouter(route_class=AdmissionRoute)
 
 # Base URL for invite links - from environment variable
 FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:5173")
@@ -32,7 +46,7 @@ async def generate_token(
     
     # Verify project exists
     try:
-        project = await db.projects.find_one({"_id": ObjectId(token_data.project_id)})
+        project = await db.projects.find_one({"_id": ObjectId(token_data.project_id), "deleting": {"$ne": True}})
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -45,16 +59,19 @@ async def generate_token(
             detail="Project not found"
         )
     
-    # Generate unique token
-    invite_token = generate_invite_token()
+    # Calculate expiration (whole seconds, as embedded in signed tokens)
+    expires_at = datetime.utcnow().replace(microsecond=0) + timedelta(hours=token_data.expires_hours)
     
-    # Calculate expiration
-    expires_at = datetime.utcnow() + timedelta(hours=token_data.expires_hours)
+    # Generate unique token
+    if INVITE_TOKEN_FORMAT == "signed":
+        invite_token = generate_signed_invite_token(token_data.project_id, expires_at)
+    else:
+        invite_token = generate_invite_token()
     
     # Create token document
     token_doc = {
         "token": invite_token,
-        "project_id": token_data.project_id,
+        "project_id": project["_id"],
         "status": "active",
         "created_at": datetime.utcnow(),
         "expires_at": expires_at,
@@ -64,6 +81,7 @@ async def generate_token(
     }
     
     result = await db.tokens.insert_one(token_doc)
+    token_filter.add(invite_token)
     
     # Generate invite URL
     invite_url = f"{FRONTEND_URL}/review/write?token={invite_token}"
@@ -81,60 +99,76 @@ async def generate_token(
         invite_url=invite_url
     )
 
+def _token_response(token: dict, project_name: str, status: str) -> InviteTokenResponse:
+    """Build the admin response for a live or archived token document"""
+    return InviteTokenResponse(
+        id=str(token["_id"]),
+        token=token["token"],
+        project_id=str(token["project_id"]),
+        project_name=project_name,
+        status=status,
+        created_at=token["created_at"],
+        expires_at=token["expires_at"],
+        used_at=token.get("used_at"),
+        note=token.get("note"),
+        invite_url=f"{FRONTEND_URL}/review/write?token={token['token']}",
+        archived="archived_at" in token
+    )
+
+async def _with_history(db, query: dict, docs: list) -> list:
+    """Merge archived tokens into a newest-first list of live ones"""
+    archived = await db.tokens_archive.find(query).sort("created_at", -1).to_list(None)
+    return list(heapq.merge(docs, archived, key=lambda token: token["created_at"], reverse=True))
+
 @router.get("/", response_model=List[InviteTokenResponse])
-async def get_all_tokens(current_admin: dict = Depends(get_current_admin)):
-    """Get all invite tokens"""
+@query_budget(4)
+@deadline(30)
+async def get_all_tokens(
+    include_history: bool = False,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Get all invite tokens; archived ones only when `include_history` is set"""
     db = get_database()
     
+    docs = await db.tokens.find().sort("created_at", -1).to_list(None)
+    if include_history:
+        docs = await _with_history(db, {}, docs)
+    projects = await find_projects(db, (token["project_id"] for token in docs), {"name": 1})
+    now = datetime.utcnow()
+    
     tokens = []
-    cursor = db.tokens.find().sort("created_at", -1)
-    
-    async for token in cursor:
-        # Get project name
-        try:
-            project = await db.projects.find_one({"_id": ObjectId(token["project_id"])})
-            project_name = project["name"] if project else "Deleted Project"
-        except:
-            project_name = "Unknown Project"
-        
+    expired_ids = []
+    for token in docs:
         # Check if expired
         status = token["status"]
-        if status == "active" and token["expires_at"] < datetime.utcnow():
+        if status == "active" and token["expires_at"] < now:
             status = "expired"
-            # Update status in database
-            await db.tokens.update_one(
-                {"_id": token["_id"]},
-                {"$set": {"status": "expired"}}
-            )
+            expired_ids.append(token["_id"])
         
-        invite_url = f"{FRONTEND_URL}/review/write?token={token['token']}"
-        
-        tokens.append(InviteTokenResponse(
-            id=str(token["_id"]),
-            token=token["token"],
-            project_id=token["project_id"],
-            project_name=project_name,
-            status=status,
-            created_at=token["created_at"],
-            expires_at=token["expires_at"],
-            used_at=token.get("used_at"),
-            note=token.get("note"),
-            invite_url=invite_url
-        ))
+        tokens.append(_token_response(token, project_name(projects, token["project_id"]), status))
+    
+    # Update expired statuses in database
+    if expired_ids:
+        await db.tokens.update_many(
+            {"_id": {"$in": expired_ids}, "status": "active"},
+            {"$set": {"status": "expired"}}
+        )
     
     return tokens
 
 @router.get("/project/{project_id}", response_model=List[InviteTokenResponse])
+@query_budget(3)
 async def get_tokens_by_project(
     project_id: str,
+    include_history: bool = False,
     current_admin: dict = Depends(get_current_admin)
 ):
-    """Get all tokens for a specific project"""
+    """Get all tokens for a specific project; archived ones only when `include_history` is set"""
     db = get_database()
     
     # Verify project exists
     try:
-        project = await db.projects.find_one({"_id": ObjectId(project_id)})
+        project = await db.projects.find_one({"_id": ObjectId(project_id), "deleting": {"$ne": True}})
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -147,40 +181,45 @@ async def get_tokens_by_project(
             detail="Project not found"
         )
     
-    tokens = []
-    cursor = db.tokens.find({"project_id": project_id}).sort("created_at", -1)
+    query = {"project_id": project_ref_query([project_id])}
+    docs = await db.tokens.find(query).sort("created_at", -1).to_list(None)
+    if include_history:
+        docs = await _with_history(db, query, docs)
     
-    async for token in cursor:
+    tokens = []
+    for token in docs:
         status = token["status"]
         if status == "active" and token["expires_at"] < datetime.utcnow():
             status = "expired"
         
-        invite_url = f"{FRONTEND_URL}/review/write?token={token['token']}"
-        
-        tokens.append(InviteTokenResponse(
-            id=str(token["_id"]),
-            token=token["token"],
-            project_id=token["project_id"],
-            project_name=project["name"],
-            status=status,
-            created_at=token["created_at"],
-            expires_at=token["expires_at"],
-            used_at=token.get("used_at"),
-            note=token.get("note"),
-            invite_url=invite_url
-        ))
+        tokens.append(_token_response(token, project["name"], status))
     
     return tokens
 
 @router.get("/validate/{token}")
+@query_budget(3)
+@deadline(3)
+@admission_limit(max_concurrent=64, per_minute=120, burst=20)
 async def validate_token(token: str):
     """Validate an invite token (public endpoint for clients)"""
     db = get_database()
     
+    if is_signed_invite_token(token):
+        return await _validate_signed_token(db, token)
+    
+    # Tokens that were never issued are rejected without a database round trip
+    if not token_filter.might_exist(token):
+        return TokenValidationResponse(
+            valid=False,
+            project=None,
+            message="Token tidak ditemukan atau tidak valid"
+        )
+    
     # Find token
     token_doc = await db.tokens.find_one({"token": token})
     
     if not token_doc:
+        token_filter.record_false_positive()
         return TokenValidationResponse(
             valid=False,
             project=None,
@@ -218,7 +257,7 @@ async def validate_token(token: str):
     
     # Get project
     try:
-        project = await db.projects.find_one({"_id": ObjectId(token_doc["project_id"])})
+        project = await db.projects.find_one({"_id": ObjectId(token_doc["project_id"]), "deleting": {"$ne": True}})
     except:
         return TokenValidationResponse(
             valid=False,
@@ -235,32 +274,77 @@ async def validate_token(token: str):
     
     return TokenValidationResponse(
         valid=True,
-        project=ProjectResponse(
-            id=str(project["_id"]),
-            name=project["name"],
-            description=project.get("description"),
-            client_name=project["client_name"],
-            client_email=project.get("client_email"),
-            client_company=project.get("client_company"),
-            project_url=project.get("project_url"),
-            project_image=project.get("project_image"),
-            tags=project.get("tags", []),
-            status=project["status"],
-            created_at=project["created_at"],
-            updated_at=project["updated_at"]
-        ),
+        project=_validation_project(project),
+        message="Token valid! Silakan tulis testimoni Anda"
+    )
+
+async def _validate_signed_token(db, token: str) -> TokenValidationResponse:
+    """Validate a signed token; only the spent-token check needs the database"""
+    invite = verify_signed_invite_token(token)
+    
+    if invite is None:
+        return TokenValidationResponse(
+            valid=False,
+            project=None,
+            message="Token tidak ditemukan atau tidak valid"
+        )
+    
+    if invite.expires_at < datetime.utcnow():
+        return TokenValidationResponse(
+            valid=False,
+            project=None,
+            message="Token sudah kedaluwarsa"
+        )
+    
+    reason = await spent_reason(db, token)
+    if reason:
+        return TokenValidationResponse(
+            valid=False,
+            project=None,
+            message="Token telah dicabut" if reason == "revoked" else "Token sudah digunakan"
+        )
+    
+    project = await get_active_project(db, invite.project_id)
+    if not project:
+        return TokenValidationResponse(
+            valid=False,
+            project=None,
+            message="Project tidak ditemukan"
+        )
+    
+    return TokenValidationResponse(
+        valid=True,
+        project=_validation_project(project),
         message="Token valid! Silakan tulis testimoni Anda"
     )
 
+def _validation_project(project: dict) -> ProjectResponse:
+    """Project details shown on the review form"""
+    return ProjectResponse(
+        id=str(project["_id"]),
+        name=project["name"],
+        description=project.get("description"),
+        client_name=project["client_name"],
+        client_email=project.get("client_email"),
+        client_company=project.get("client_company"),
+        project_url=project.get("project_url"),
+        project_image=project.get("project_image"),
+        tags=project.get("tags", []),
+        status=project["status"],
+        created_at=project["created_at"],
+        updated_at=project["updated_at"]
+    )
+
 @router.delete("/{token_id}")
 async def revoke_token(token_id: str, current_admin: dict = Depends(get_current_admin)):
     """Revoke an invite token"""
     db = get_database()
     
     try:
-        result = await db.tokens.update_one(
+        token_doc = await db.tokens.find_one_and_update(
             {"_id": ObjectId(token_id)},
-            {"$set": {"status": "revoked"}}
+            {"$set": {"status": "revoked"}},
+            projection={"token": 1, "project_id": 1, "expires_at": 1}
         )
     except:
         raise HTTPException(
@@ -268,10 +352,14 @@ async def revoke_token(token_id: str, current_admin: dict = Depends(get_current_
             detail="Invalid token ID"
         )
     
-    if result.matched_count == 0:
+    if not token_doc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Token not found"
         )
     
+    # Signed tokens are validated without reading `tokens`, so record the revocation
+    if is_signed_invite_token(token_doc["token"]):
+        await spend_token(db, token_doc["token"], "revoked", token_doc["project_id"], token_doc["expires_at"])
+    
     return {"message": "Token revoked successfully"}
\ No newline at end of file
@@ -3,7 +3,7 @@ Pydantic Schemas - Data validation and serialization
 """
 
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -100,6 +100,7 @@ class InviteTokenResponse(BaseModel):
     used_at: Optional[datetime] = None
     note: Optional[str] = None
     invite_url: str
+    archived: bool = False
 
 class TokenValidationResponse(BaseModel):
     valid: bool
@@ -148,8 +149,81 @@ class TestimonialResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+class BulkOperation(str, Enum):
+    PUBLISH = "publish"
+    UNPUBLISH = "unpublish"
+    FEATURE = "feature"
+    UNFEATURE = "unfeature"
+    DELETE = "delete"
+    UPDATE = "update"
+
+class TestimonialBulkAction(BaseModel):
+    """Schema for applying one moderation operation to many testimonials"""
+    ids: List[str] = Field(..., min_length=1, max_length=1000)
+    operation: BulkOperation
+    update: Optional[TestimonialUpdate] = None  # required for the "update" operation
+
+class BulkItemResult(BaseModel):
+    id: str
+    status: str  # ok, not_found, invalid_id, error
+    detail: Optional[str] = None
+
+class TestimonialBulkResponse(BaseModel):
+    operation: str
+    requested: int
+    matched: int
+    modified: int
+    deleted: int
+    results: List[BulkItemResult]
+
+# ============== IMPORT SCHEMAS ==============
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class TestimonialImport(BaseModel):
+    """Schema for one historical testimonial in a bulk import; its project is validated as ProjectCreate"""
+    client_name: str = Field(..., min_length=2, max_length=100)
+    client_role: Optional[str] = Field(None, max_length=100)
+    client_company: Optional[str] = Field(None, max_length=200)
+    client_avatar: Optional[str] = None
+    rating: int = Field(..., ge=1, le=5)
+    title: str = Field(..., min_length=5, max_length=200)
+    content: str = Field(..., min_length=20, max_length=5000)
+    is_featured: bool = False
+    is_published: bool = True
+    created_at: Optional[datetime] = None  # original submission time; defaults to the import time
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class ImportSummary(BaseModel):
+    import_id: str
+    format: str
+    status: str  # running, completed, failed
+    rows_read: int
+    inserted: int
+    duplicates: int
+    failed: int
+    projects_created: int
+    checkpoint: int  # last row fully processed; a resumed run starts after it
+    error: Optional[str] = None
+    errors: List[ImportRowError] = []
+    created_at: datetime
+    updated_at: datetime
+
 # ============== PUBLIC SCHEMAS ==============
 
+class PublicSort(str, Enum):
+    NEWEST = "newest"
+    HIGHEST_RATED = "highest_rated"
+
+class TagMatch(str, Enum):
+    ANY = "any"
+    ALL = "all"
+
 class PublicTestimonialResponse(BaseModel):
     """Schema for public testimonial display (limited info)"""
     id: str
@@ -184,3 +258,43 @@ class DashboardStats(BaseModel):
     average_rating: float
     featured_count: int
     recent_testimonials: List[TestimonialResponse]
+
+# ============== JOB SCHEMAS ==============
+
+class JobResponse(BaseModel):
+    id: str
+    type: str
+    status: str
+    payload: Dict[str, Any]
+    progress: Dict[str, Any]
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    max_attempts: int = 1
+    run_at: Optional[datetime] = None
+    worker_id: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+# ============== DIAGNOSTICS SCHEMAS ==============
+
+class SlowQueryResponse(BaseModel):
+    id: str
+    ts: datetime
+    route: Optional[str] = None
+    command: str
+    collection: str
+    shape: Optional[Any] = None
+    duration_ms: float
+    outcome: str
+    explained: bool = False
+    plan_summary: Optional[str] = None
+    winning_plan: Optional[Any] = None
+    docs_examined: Optional[int] = None
+    keys_examined: Optional[int] = None
+    n_returned: Optional[int] = None
+    execution_ms: Optional[int] = None
+    explain_error: Optional[str] = None
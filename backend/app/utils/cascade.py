@@ -0,0 +1,80 @@
+"""
+Cascade Deletes - Remove a project's children in throttled batches
+"""
+
+from bson import ObjectId
+import asyncio
+import os
+
+from app.core.database import get_database
+from app.core.jobs import Job, job_cancel_hook, job_handler
+from app.utils.lookups import project_ref_query
+
+# Configuration from Environment Variables
+CASCADE_BATCH_SIZE = int(os.environ.get("CASCADE_BATCH_SIZE", 1000))
+CASCADE_BATCH_PAUSE_SECONDS = float(os.environ.get("CASCADE_BATCH_PAUSE_SECONDS", 0.1))
+
+async def delete_in_batches(collection, query: dict, job: Job, counter: str) -> int:
+    """Delete matching documents a batch at a time, pausing between batches"""
+    # Continue the count from an earlier, interrupted attempt
+    deleted = job.progress.get(counter, 0)
+    
+    while True:
+        # Stop as soon as the deletion is cancelled, so a restored project keeps its children
+        await job.check_cancelled()
+        batch = [
+            doc["_id"]
+            async for doc in collection.find(query, {"_id": 1}).limit(CASCADE_BATCH_SIZE)
+        ]
+        if not batch:
+            return deleted
+        
+        result = await collection.delete_many({"_id": {"$in": batch}})
+        deleted += result.deleted_count
+        await job.report_progress(**{counter: deleted})
+        
+        # Give other traffic room on the primary
+        await asyncio.sleep(CASCADE_BATCH_PAUSE_SECONDS)
+
+@job_handler("project_delete")
+async def cascade_delete_project(job: Job) -> dict:
+    """Delete a project's testimonials, then its live and archived tokens, then the project itself"""
+    db = get_database()
+    project_id = job.payload["project_id"]
+    children = {"project_id": project_ref_query([project_id])}
+    
+    # A retried job after a cancel hides the project again
+    await db.projects.update_one(
+        {"_id": ObjectId(project_id)},
+        {"$set": {"deleting": True, "deletion_job_id": str(job.id)}}
+    )
+    
+    # Testimonials first - they are what the public pages show
+    testimonials_deleted = await delete_in_batches(
+        db.testimonials, children, job, "testimonials_deleted"
+    )
+    tokens_deleted = await delete_in_batches(
+        db.tokens, children, job, "tokens_deleted"
+    )
+    archived_tokens_deleted = await delete_in_batches(
+        db.tokens_archive, children, job, "archived_tokens_deleted"
+    )
+    
+    await db.projects.delete_one({"_id": ObjectId(project_id), "deleting": True})
+    
+    return {
+        "project_id": project_id,
+        "testimonials_deleted": testimonials_deleted,
+        "tokens_deleted": tokens_deleted,
+        "archived_tokens_deleted": archived_tokens_deleted
+    }
+
+@job_cancel_hook("project_delete")
+async def restore_project(job: Job):
+    """Show a project again once its deletion is cancelled; children already deleted stay deleted"""
+    db = get_database()
+    
+    await db.projects.update_one(
+        {"_id": ObjectId(job.payload["project_id"]), "deletion_job_id": str(job.id)},
+        {"$unset": {"deleting": "", "deletion_job_id": ""}}
+    )
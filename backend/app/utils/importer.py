@@ -0,0 +1,468 @@
+"""
+Bulk Import - Stream historical testimonials from CSV or NDJSON into MongoDB
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple, Union
+from bson import ObjectId
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import asyncio
+import codecs
+import csv
+import json
+import re
+import socket
+import os
+
+from app.core.events import broker
+from app.schemas.schemas import ImportFormat, ProjectCreate, TestimonialImport
+
+# Configuration from Environment Variables
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", 1000))
+IMPORT_MAX_RECORD_CHARS = int(os.environ.get("IMPORT_MAX_RECORD_CHARS", 1024 * 1024))
+IMPORT_LEASE_SECONDS = int(os.environ.get("IMPORT_LEASE_SECONDS", 300))
+IMPORT_ERROR_SAMPLE = int(os.environ.get("IMPORT_ERROR_SAMPLE", 50))
+
+DUPLICATE_KEY = 11000
+READ_CHUNK_BYTES = 1024 * 1024
+COUNTERS = ("rows_read", "inserted", "duplicates", "failed", "projects_created")
+
+# Columns describing a row's project, mapped to ProjectCreate fields;
+# the first row naming a new project decides its details
+PROJECT_COLUMNS = {
+    "project_name": "name",
+    "project_description": "description",
+    "project_client_name": "client_name",
+    "project_client_email": "client_email",
+    "project_client_company": "client_company",
+    "project_url": "project_url",
+    "project_image": "project_image",
+    "project_tags": "tags",
+    "project_status": "status"
+}
+REQUIRED_COLUMNS = ["project_name", "client_name", "rating", "title", "content"]
+
+class ImportFailed(Exception):
+    """The input can't be read any further: bad encoding, header or an oversized record"""
+
+class ImportInProgress(Exception):
+    """Another run holds the import's lease"""
+
+# ============== PARSING ==============
+
+async def read_file(path: str) -> AsyncIterator[bytes]:
+    """Read a file in chunks without blocking the event loop"""
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, READ_CHUNK_BYTES)
+            if not chunk:
+                return
+            yield chunk
+
+def file_import_id(path: str) -> str:
+    """Stable id for a file, so re-running the same command resumes it"""
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", os.path.basename(path))
+    return f"{name}-{os.path.getsize(path)}"
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines, keeping their endings"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line + "\n"
+            if len(pending) > IMPORT_MAX_RECORD_CHARS:
+                raise ImportFailed(f"A line is longer than {IMPORT_MAX_RECORD_CHARS} characters")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        raise ImportFailed(f"Input is not valid UTF-8: {e}")
+    
+    if pending:
+        yield pending
+
+_CSV_SPECIALS = re.compile(r'[",]')
+
+def _still_quoted(line: str, quoted: bool) -> bool:
+    """Whether a CSV record is inside a quoted field at the end of `line`
+
+    As in RFC 4180 and the csv module, a quote opens a quoted field only at
+    the start of a field; elsewhere (`Great 5" screen`) it is a literal.
+    """
+    field_start = None if quoted else 0
+    escaped = -1
+    
+    for match in _CSV_SPECIALS.finditer(line):
+        position = match.start()
+        if position == escaped:
+            continue
+        if quoted:
+            if match.group() == '"':
+                if line.startswith('"', position + 1):
+                    escaped = position + 1
+                else:
+                    quoted = False
+                    field_start = None
+        elif match.group() == ",":
+            field_start = position + 1
+        elif position == field_start:
+            quoted = True
+    
+    return quoted
+
+async def _csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Union[dict, str]]]:
+    """Numbered rows keyed by the header, or an error message; quoted fields may span lines"""
+    header = None
+    record = ""
+    quoted = False
+    row = 0
+    
+    async for line in lines:
+        record += line
+        # The record continues on the next line while a quoted field is open
+        quoted = _still_quoted(line, quoted)
+        if quoted:
+            if len(record) > IMPORT_MAX_RECORD_CHARS:
+                raise ImportFailed(f"Row {row + 1} is longer than {IMPORT_MAX_RECORD_CHARS} characters")
+            continue
+        
+        fields = next(csv.reader([record]), [])
+        record = ""
+        if not any(field.strip() for field in fields):
+            continue
+        
+        if header is None:
+            header = [field.strip() for field in fields]
+            missing = [column for column in REQUIRED_COLUMNS if column not in header]
+            if missing:
+                raise ImportFailed(f"CSV header is missing columns: {', '.join(missing)}")
+            continue
+        
+        row += 1
+        if len(fields) != len(header):
+            yield row, f"expected {len(header)} columns, found {len(fields)}"
+        else:
+            yield row, dict(zip(header, fields))
+    
+    if record:
+        yield row + 1, "unterminated quoted field"
+
+async def _ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Union[dict, str]]]:
+    """Numbered JSON objects, one per non-blank line, or an error message"""
+    row = 0
+    
+    async for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, f"invalid JSON: {e}"
+            continue
+        yield row, record if isinstance(record, dict) else "expected a JSON object"
+
+def _error_messages(e: ValidationError, columns: Dict[str, str], skip: Set[str] = frozenset()) -> List[str]:
+    messages = []
+    for error in e.errors():
+        field = str(error["loc"][0]) if error["loc"] else ""
+        if field not in skip:
+            messages.append(f"{columns.get(field, field)}: {error['msg']}")
+    return messages
+
+_PROJECT_FIELD_COLUMNS = {field: column for column, field in PROJECT_COLUMNS.items()}
+
+def _validate(record: dict) -> Tuple[Optional[Tuple[ProjectCreate, TestimonialImport]], List[str]]:
+    """Validate a row's project and testimonial parts; empty cells count as absent"""
+    values = {key: value for key, value in record.items() if value not in ("", None)}
+    
+    project = {field: values[column] for column, field in PROJECT_COLUMNS.items() if column in values}
+    inherited = set()
+    for field in ("client_name", "client_company"):
+        if field not in project and field in values:
+            project[field] = values[field]
+            inherited.add(field)
+    if isinstance(project.get("tags"), str):
+        project["tags"] = [tag.strip() for tag in project["tags"].split(",") if tag.strip()]
+    
+    errors = []
+    try:
+        project_data = ProjectCreate(**project)
+    except ValidationError as e:
+        # Problems with values borrowed from the testimonial are reported once, below
+        errors += _error_messages(e, _PROJECT_FIELD_COLUMNS, inherited)
+    try:
+        testimonial_data = TestimonialImport(**values)
+    except ValidationError as e:
+        errors += _error_messages(e, {})
+    
+    if errors:
+        return None, errors
+    
+    created_at = testimonial_data.created_at
+    if created_at and created_at.tzinfo:
+        testimonial_data.created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return (project_data, testimonial_data), []
+
+# ============== WRITING ==============
+
+class ImportRun:
+    """One pass over an import's input, continuing after its last checkpoint"""
+    
+    def __init__(self, db, doc: dict, owner: str):
+        self.db = db
+        self.import_id: str = doc["_id"]
+        self.created_by: Optional[str] = doc.get("created_by")
+        self.checkpoint: int = doc.get("checkpoint", 0)
+        self.counts = {counter: doc.get(counter, 0) for counter in COUNTERS}
+        self.owner = owner
+        self._projects: Dict[str, ObjectId] = {}
+    
+    async def save(self, checkpoint: int, status: str = "running", error: Optional[str] = None):
+        """Persist the checkpoint and counters, renewing this run's lease"""
+        now = datetime.utcnow()
+        
+        result = await self.db.imports.update_one(
+            {"_id": self.import_id, "owner": self.owner},
+            {"$set": {
+                **self.counts,
+                "checkpoint": checkpoint,
+                "status": status,
+                "error": error,
+                "lease_until": now + timedelta(seconds=IMPORT_LEASE_SECONDS) if status == "running" else None,
+                "updated_at": now
+            }}
+        )
+        if result.matched_count == 0:
+            raise ImportInProgress(f"Import {self.import_id} is now run by another process")
+        self.checkpoint = checkpoint
+    
+    async def write_batch(self, batch: List[Tuple[int, ProjectCreate, TestimonialImport]], errors: List[dict], last_row: int):
+        """Insert a validated batch, record its row errors and move the checkpoint past it"""
+        self.counts["rows_read"] += len(batch) + len(errors)
+        
+        if batch:
+            project_ids = await self._resolve_projects([(project, testimonial) for _, project, testimonial in batch])
+            now = datetime.utcnow()
+            docs = [
+                {
+                    "project_id": project_ids[project.name],
+                    "token_id": None,
+                    "client_name": testimonial.client_name,
+                    "client_role": testimonial.client_role,
+                    "client_company": testimonial.client_company,
+                    "client_avatar": testimonial.client_avatar,
+                    "rating": testimonial.rating,
+                    "title": testimonial.title,
+                    "content": testimonial.content,
+                    "is_featured": testimonial.is_featured,
+                    "is_published": testimonial.is_published,
+                    "created_at": testimonial.created_at or now,
+                    "updated_at": now,
+                    "import_ref": {"id": self.import_id, "row": row}
+                }
+                for row, project, testimonial in batch
+            ]
+            await self._insert(batch, docs, errors)
+        
+        if errors:
+            await self._record_errors(errors)
+            self.counts["failed"] += len(errors)
+        
+        await self.save(last_row)
+        broker.publish({"type": "invalidate", "collection": "testimonials"})
+    
+    async def _insert(self, batch: list, docs: List[dict], errors: List[dict]):
+        try:
+            result = await self.db.testimonials.insert_many(docs, ordered=False)
+            self.counts["inserted"] += len(result.inserted_ids)
+        except BulkWriteError as e:
+            self.counts["inserted"] += e.details["nInserted"]
+            for error in e.details["writeErrors"]:
+                if error["code"] == DUPLICATE_KEY:
+                    # Written by an earlier run that stopped before its checkpoint
+                    self.counts["duplicates"] += 1
+                else:
+                    errors.append({"row": batch[error["index"]][0], "errors": [error["errmsg"]]})
+    
+    async def _resolve_projects(self, rows: List[Tuple[ProjectCreate, TestimonialImport]]) -> Dict[str, ObjectId]:
+        """Map project names to ids, creating the projects not seen before"""
+        missing: Dict[str, Tuple[ProjectCreate, TestimonialImport]] = {}
+        for project, testimonial in rows:
+            if project.name not in self._projects:
+                missing.setdefault(project.name, (project, testimonial))
+        
+        if missing:
+            cursor = self.db.projects.find(
+                {"name": {"$in": list(missing)}, "deleting": {"$ne": True}},
+                {"name": 1}
+            ).sort("created_at", 1)
+            async for doc in cursor:
+                if doc["name"] in missing:
+                    self._projects[doc["name"]] = doc["_id"]
+                    del missing[doc["name"]]
+        
+        if missing:
+            now = datetime.utcnow()
+            docs = [
+                {
+                    "name": project.name,
+                    "description": project.description,
+                    "client_name": project.client_name,
+                    "client_email": project.client_email,
+                    "client_company": project.client_company,
+                    "project_url": project.project_url,
+                    "project_image": project.project_image,
+                    "tags": project.tags or [],
+                    "status": project.status.value,
+                    "admin_id": self.created_by,
+                    "import_id": self.import_id,
+                    "created_at": testimonial.created_at or now,
+                    "updated_at": now
+                }
+                for project, testimonial in missing.values()
+            ]
+            await self.db.projects.insert_many(docs, ordered=False)
+            self._projects.update((doc["name"], doc["_id"]) for doc in docs)
+            self.counts["projects_created"] += len(docs)
+        
+        return self._projects
+    
+    async def _record_errors(self, errors: List[dict]):
+        """Store row errors, keyed by row so a resumed run doesn't repeat them"""
+        docs = [{"_id": f"{self.import_id}:{error['row']}", "import_id": self.import_id, **error} for error in errors]
+        try:
+            await self.db.import_errors.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+                raise
+
+async def _require_import_index(db):
+    """Resuming relies on the unique import_ref index to skip rows written twice"""
+    async for index in db.testimonials.list_indexes():
+        if "import_ref.id" in index["key"] and index.get("unique"):
+            return
+    raise ImportFailed("The testimonials import index is missing - run `python manage.py indexes` first")
+
+async def _claim(db, import_id: str, fmt: ImportFormat, created_by: Optional[str], owner: str) -> dict:
+    """Take the import's lease, creating its record on the first run"""
+    now = datetime.utcnow()
+    
+    try:
+        return await db.imports.find_one_and_update(
+            {
+                "_id": import_id,
+                "status": {"$ne": "completed"},
+                "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "owner": owner,
+                    "lease_until": now + timedelta(seconds=IMPORT_LEASE_SECONDS),
+                    "error": None,
+                    "updated_at": now
+                },
+                "$setOnInsert": {
+                    "format": fmt.value,
+                    "checkpoint": 0,
+                    **{counter: 0 for counter in COUNTERS},
+                    "created_by": created_by,
+                    "created_at": now
+                }
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        existing = await db.imports.find_one({"_id": import_id})
+        if existing and existing["status"] == "completed":
+            return existing
+        raise ImportInProgress(f"Import {import_id} is being run elsewhere")
+
+async def run_import(
+    db,
+    chunks: AsyncIterator[bytes],
+    fmt: ImportFormat,
+    import_id: str,
+    created_by: Optional[str] = None,
+    on_batch: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """Stream, validate and insert an import in batches; running an import_id again resumes it"""
+    await _require_import_index(db)
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    
+    doc = await _claim(db, import_id, fmt, created_by, owner)
+    if doc["status"] == "completed":
+        return await import_summary(db, import_id)
+    
+    run = ImportRun(db, doc, owner)
+    lines = _lines(chunks)
+    records = _csv_records(lines) if fmt == ImportFormat.CSV else _ndjson_records(lines)
+    batch, errors = [], []
+    last_row = run.checkpoint
+    
+    try:
+        async for row, record in records:
+            # Rows up to the checkpoint were handled by an earlier run
+            if row <= run.checkpoint:
+                continue
+            last_row = row
+            
+            if isinstance(record, str):
+                errors.append({"row": row, "errors": [record]})
+            else:
+                parsed, messages = _validate(record)
+                if parsed:
+                    batch.append((row, *parsed))
+                else:
+                    errors.append({"row": row, "errors": messages})
+            
+            if len(batch) + len(errors) >= IMPORT_BATCH_SIZE:
+                await run.write_batch(batch, errors, last_row)
+                batch, errors = [], []
+                if on_batch:
+                    on_batch(run.counts)
+        
+        if batch or errors:
+            await run.write_batch(batch, errors, last_row)
+        await run.save(last_row, "completed")
+    except ImportInProgress:
+        raise
+    except BaseException as e:
+        # Release the lease; the next run continues from the last checkpoint
+        try:
+            await run.save(run.checkpoint, "failed", str(e) or type(e).__name__)
+        except Exception:
+            pass
+        raise
+    
+    return await import_summary(db, import_id)
+
+async def import_summary(db, import_id: str, skip: int = 0, limit: int = IMPORT_ERROR_SAMPLE) -> Optional[dict]:
+    """An import's counters with a page of its row errors, in row order"""
+    doc = await db.imports.find_one({"_id": import_id})
+    if not doc:
+        return None
+    
+    errors = await db.import_errors.find(
+        {"import_id": import_id},
+        {"_id": 0, "row": 1, "errors": 1}
+    ).sort("row", 1).skip(skip).limit(limit).to_list(None)
+    
+    return {
+        "import_id": import_id,
+        "format": doc["format"],
+        "status": doc["status"],
+        **{counter: doc.get(counter, 0) for counter in COUNTERS},
+        "checkpoint": doc.get("checkpoint", 0),
+        "error": doc.get("error"),
+        "errors": errors,
+        "created_at": doc["created_at"],
+        "updated_at": doc["updated_at"]
+    }
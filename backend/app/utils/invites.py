@@ -0,0 +1,54 @@
+"""
+Invite Utilities - Signed Token Checks, Spent-Token Set & Cached Projects
+"""
+
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.core.cache import project_cache
+from app.core.events import broker
+from app.utils.lookups import project_ref
+
+def _invalidate_project_cache(event: dict):
+    """Drop cached projects whenever projects change"""
+    if event["type"] == "invalidate" and event.get("collection") in ("projects", None):
+        project_cache.invalidate()
+
+broker.add_listener(_invalidate_project_cache)
+
+async def get_active_project(db, project_id: str) -> Optional[dict]:
+    """A project that accepts testimonials, served from cache when possible"""
+    project = project_cache.get(project_id)
+    if project is not None:
+        return project or None
+    
+    generation = project_cache.generation
+    try:
+        project = await db.projects.find_one({"_id": ObjectId(project_id), "deleting": {"$ne": True}})
+    except:
+        return None
+    
+    # Cache misses too, so bogus project ids don't reach the database twice
+    project_cache.set(project_id, project or {}, generation)
+    return project
+
+async def spent_reason(db, token: str) -> Optional[str]:
+    """'used' or 'revoked' if a signed token was already spent, else None"""
+    spent = await db.spent_tokens.find_one({"_id": token}, {"reason": 1})
+    return spent["reason"] if spent else None
+
+async def spend_token(db, token: str, reason: str, project_id: str, expires_at: datetime) -> bool:
+    """Atomically mark a signed token spent; False if it already was"""
+    try:
+        await db.spent_tokens.insert_one({
+            "_id": token,
+            "reason": reason,
+            "project_id": project_ref(project_id),
+            "expires_at": expires_at,
+            "spent_at": datetime.utcnow()
+        })
+        return True
+    except DuplicateKeyError:
+        return False
@@ -0,0 +1,68 @@
+"""
+Lookup Utilities - Project References & Batched Project Lookups for List Endpoints
+"""
+
+from typing import Dict, Iterable, List, Optional, Union
+from bson import ObjectId
+
+# Older documents store `project_id` as a string; migration 0001 backfills ObjectIds
+ProjectRef = Union[ObjectId, str]
+
+def project_ref(project_id: ProjectRef) -> ProjectRef:
+    """The form new documents store a project reference in"""
+    if isinstance(project_id, str) and ObjectId.is_valid(project_id):
+        return ObjectId(project_id)
+    return project_id
+
+def project_ref_query(project_ids: Iterable[ProjectRef]) -> dict:
+    """Match project references stored either as ObjectId or as string"""
+    refs = set()
+    for project_id in project_ids:
+        refs.add(str(project_id))
+        if ObjectId.is_valid(project_id):
+            refs.add(ObjectId(project_id))
+    return {"$in": list(refs)}
+
+async def find_projects(db, project_ids: Iterable[ProjectRef], projection: Optional[dict] = None) -> Dict[str, dict]:
+    """Fetch every referenced project in one query, keyed by string id"""
+    object_ids = {ObjectId(project_id) for project_id in set(project_ids) if ObjectId.is_valid(project_id)}
+    if not object_ids:
+        return {}
+    
+    cursor = db.projects.find({"_id": {"$in": list(object_ids)}}, projection)
+    return {str(project["_id"]): project async for project in cursor}
+
+async def deleting_project_refs(db) -> List[ProjectRef]:
+    """References, in both stored forms, of projects whose deletion is in progress"""
+    project_ids = [project["_id"] async for project in db.projects.find({"deleting": True}, {"_id": 1})]
+    return project_ref_query(project_ids)["$in"] if project_ids else []
+
+def exclude_projects(query: dict, refs: List[ProjectRef]) -> dict:
+    """Restrict a query to documents that reference none of `refs`"""
+    if not refs:
+        return query
+    condition = {"project_id": {"$nin": refs}}
+    if "project_id" in query:
+        return {"$and": [query, condition]}
+    return {**query, **condition}
+
+def project_name(projects: Dict[str, dict], project_id: ProjectRef, missing: str = "Deleted Project") -> str:
+    """Name of a batched project, or a placeholder for dangling references"""
+    project = projects.get(str(project_id))
+    if project:
+        return project["name"]
+    return missing if ObjectId.is_valid(project_id) else "Unknown Project"
+
+async def count_by_project(collection, project_ids: Iterable[ProjectRef], query: Optional[dict] = None) -> Dict[str, int]:
+    """Count documents per project with a single aggregation, keyed by string id"""
+    pipeline = [
+        {"$match": {**(query or {}), "project_id": project_ref_query(project_ids)}},
+        {"$group": {"_id": "$project_id", "count": {"$sum": 1}}}
+    ]
+    
+    counts: Dict[str, int] = {}
+    async for doc in collection.aggregate(pipeline):
+        # Both stored forms of one project land in separate groups until the backfill finishes
+        key = str(doc["_id"])
+        counts[key] = counts.get(key, 0) + doc["count"]
+    return counts
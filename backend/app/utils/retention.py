@@ -0,0 +1,108 @@
+"""
+Token Retention - Move long-expired invite tokens to a cold archive collection
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo.errors import BulkWriteError
+import asyncio
+import os
+
+from app.core.database import get_database, TOKEN_RETENTION_DAYS, TOKEN_RETENTION_MODE
+from app.core.jobs import Job, enqueue_job, job_handler
+
+# Configuration from Environment Variables
+TOKEN_ARCHIVE_BATCH_SIZE = int(os.environ.get("TOKEN_ARCHIVE_BATCH_SIZE", 1000))
+TOKEN_ARCHIVE_BATCH_PAUSE_SECONDS = float(os.environ.get("TOKEN_ARCHIVE_BATCH_PAUSE_SECONDS", 0.1))
+TOKEN_ARCHIVE_INTERVAL_SECONDS = float(os.environ.get("TOKEN_ARCHIVE_INTERVAL_SECONDS", 86400))
+
+DUPLICATE_KEY = 11000
+
+def archive_cutoff() -> datetime:
+    """Tokens that expired before this are past any use and can leave `tokens`"""
+    return datetime.utcnow() - timedelta(days=TOKEN_RETENTION_DAYS)
+
+async def _copy_to_archive(db, docs: list):
+    """Insert a batch into the archive, tolerating copies left by an interrupted run"""
+    try:
+        await db.tokens_archive.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+            raise
+
+@job_handler("token_archive")
+async def archive_tokens(job: Job) -> dict:
+    """Copy tokens expired for longer than the retention period to the archive, then delete them"""
+    db = get_database()
+    cutoff = archive_cutoff()
+    
+    # Continue the count from an earlier, interrupted attempt
+    archived = job.progress.get("tokens_archived", 0)
+    
+    while True:
+        # Every token expires within 30 days of issue, so expiry alone marks
+        # used, revoked and expired tokens alike - and it is already indexed
+        docs = await db.tokens.find(
+            {"expires_at": {"$lt": cutoff}}
+        ).sort("expires_at", 1).limit(TOKEN_ARCHIVE_BATCH_SIZE).to_list(None)
+        if not docs:
+            break
+        
+        now = datetime.utcnow()
+        for doc in docs:
+            if doc["status"] == "active":
+                doc["status"] = "expired"
+            doc["archived_at"] = now
+        
+        # Copy before deleting, so a crash in between only leaves duplicates
+        await _copy_to_archive(db, docs)
+        result = await db.tokens.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        archived += result.deleted_count
+        await job.report_progress(tokens_archived=archived)
+        
+        # Give other traffic room on the primary
+        await asyncio.sleep(TOKEN_ARCHIVE_BATCH_PAUSE_SECONDS)
+    
+    return {"cutoff": cutoff, "tokens_archived": archived}
+
+async def enqueue_token_archive(created_by: Optional[str] = None):
+    """Queue an archive run unless one is already waiting or running"""
+    db = get_database()
+    
+    pending = await db.jobs.find_one(
+        {"type": "token_archive", "status": {"$in": ["queued", "running"]}},
+        {"_id": 1}
+    )
+    if pending:
+        return pending["_id"]
+    
+    return await enqueue_job("token_archive", {}, created_by=created_by)
+
+class ArchiveScheduler:
+    """Queue a token archive run at a fixed interval alongside the job workers"""
+    
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        if TOKEN_RETENTION_MODE == "archive" and self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        while True:
+            try:
+                await enqueue_token_archive()
+            except Exception as e:
+                print(f"⚠️ Could not queue token archive: {e}")
+            await asyncio.sleep(TOKEN_ARCHIVE_INTERVAL_SECONDS)
+
+archive_scheduler = ArchiveScheduler()
@@ -0,0 +1,3 @@
+"""
+Benchmarks - Synthetic data seeder and load-test scenario runner
+"""
@@ -0,0 +1,269 @@
+"""
+Benchmark Runner - Drive the FastAPI app through load-test scenarios
+Run with: python -m benchmarks.run --scenarios all --duration 10 --concurrency 32 --output results.json
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import time
+
+import httpx
+
+from app.core.database import get_database
+from app.core.security import create_access_token
+from benchmarks.seed import BENCH_ADMIN_USERNAME, BENCH_ADMIN_PASSWORD, TAGS
+
+class ScenarioContext:
+    """Data sampled from the seeded database that scenarios draw requests from"""
+    
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.tokens: List[str] = []
+        self.submit_tokens: List[str] = []
+        self.project_ids: List[str] = []
+        self.admin_headers: Dict[str, str] = {}
+    
+    async def load(self, sample_size: int):
+        db = get_database()
+        self.tokens = [
+            doc["token"] async for doc in db.tokens.aggregate([
+                {"$sample": {"size": sample_size}},
+                {"$project": {"token": 1}}
+            ])
+        ]
+        self.submit_tokens = [
+            doc["token"] async for doc in db.tokens.find(
+                {"status": "active", "expires_at": {"$gt": datetime.utcnow()}},
+                {"token": 1}
+            ).limit(sample_size)
+        ]
+        self.project_ids = [
+            str(doc["_id"]) async for doc in db.projects.aggregate([
+                {"$sample": {"size": min(sample_size, 1000)}},
+                {"$project": {"_id": 1}}
+            ])
+        ]
+        
+        admin = await db.admins.find_one({"username": BENCH_ADMIN_USERNAME})
+        admin_id = str(admin["_id"]) if admin else None
+        token = create_access_token({"sub": BENCH_ADMIN_USERNAME, "admin_id": admin_id})
+        self.admin_headers = {"Authorization": f"Bearer {token}"}
+
+Scenario = Callable[[httpx.AsyncClient, ScenarioContext], Awaitable[httpx.Response]]
+
+async def public_testimonials(client: httpx.AsyncClient, ctx: ScenarioContext) -> httpx.Response:
+    return await client.get("/api/public/testimonials", params={"limit": ctx.rng.choice([10, 20, 50])})
+
+async def public_testimonials_filtered(client: httpx.AsyncClient, ctx: ScenarioContext) -> httpx.Response:
+    return await client.get("/api/public/testimonials", params={
+        "tag": ctx.rng.sample(TAGS, ctx.rng.choice([1, 2])),
+        "min_rating": ctx.rng.choice([3, 4, 5]),
+        "sort": ctx.rng.choice(["newest", "highest_rated"]),
+        "limit": 20
+    })
+
+async def public_featured(client: httpx.AsyncClient, ctx: ScenarioContext) -> httpx.Response:
+    return await client.get("/api/public/testimonials/featured")
+
+async def public_stats(client: httpx.AsyncClient, ctx: ScenarioContext) -> httpx.Response:
+    return await client.get("/api/public/stats")
+
+async def validate_token(client: httpx.AsyncClient, ctx: ScenarioContext) -> httpx.Response:
+    return await client.get(f"/api/tokens/validate/{ctx.rng.choice(ctx.tokens)}")
+
+async def submit_testimonial(client: httpx.AsyncClient, ctx: ScenarioContext) -> httpx.Response:
+    # Each active token can be used once; invalid ones still exercise the rejection path
+    token = ctx.submit_tokens.pop() if ctx.submit_tokens else "bench-exhausted"
+    return await client.post("/api/testimonials/submit", json={
+        "token": token,
+        "client_name": "Benchmark Client",
+        "client_role": "CTO",
+        "rating": ctx.rng.choice([4, 5]),
+        "title": "Benchmark testimonial",
+        "content": "Submitted by the benchmark runner to measure the submit path."
+    })
+
+async def admin_login(client: httpx.AsyncClient, ctx: ScenarioContext) -> httpx.Response:
+    return await client.post("/api/admin/login", json={
+        "username": BENCH_ADMIN_USERNAME,
+        "password": BENCH_ADMIN_PASSWORD
+    })
+
+async def admin_projects(client: httpx.AsyncClient, ctx: ScenarioContext) -> httpx.Response:
+    return await client.get("/api/admin/projects", headers=ctx.admin_headers)
+
+async def admin_testimonials(client: httpx.AsyncClient, ctx: ScenarioContext) -> httpx.Response:
+    project_id = ctx.rng.choice(ctx.project_ids)
+    return await client.get("/api/testimonials/", params={"project_id": project_id}, headers=ctx.admin_headers)
+
+async def admin_project_tokens(client: httpx.AsyncClient, ctx: ScenarioContext) -> httpx.Response:
+    return await client.get(f"/api/tokens/project/{ctx.rng.choice(ctx.project_ids)}", headers=ctx.admin_headers)
+
+async def admin_dashboard(client: httpx.AsyncClient, ctx: ScenarioContext) -> httpx.Response:
+    return await client.get("/api/admin/dashboard", headers=ctx.admin_headers)
+
+SCENARIOS: Dict[str, Scenario] = {
+    "public_testimonials": public_testimonials,
+    "public_testimonials_filtered": public_testimonials_filtered,
+    "public_featured": public_featured,
+    "public_stats": public_stats,
+    "validate_token": validate_token,
+    "submit_testimonial": submit_testimonial,
+    "admin_login": admin_login,
+    "admin_projects": admin_projects,
+    "admin_testimonials": admin_testimonials,
+    "admin_project_tokens": admin_project_tokens,
+    "admin_dashboard": admin_dashboard
+}
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    ctx: ScenarioContext,
+    scenario: Scenario,
+    duration: float,
+    concurrency: int,
+    max_requests: Optional[int]
+) -> dict:
+    """Drive one scenario with `concurrency` workers until time or request count runs out"""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    issued = 0
+    deadline = time.perf_counter() + duration
+    
+    async def worker():
+        nonlocal errors, issued
+        while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+            issued += 1
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, ctx)
+                key = str(response.status_code)
+            except Exception as e:
+                key = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[key] = statuses.get(key, 0) + 1
+            if not key.startswith(("2", "3")):
+                errors += 1
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status_counts": statuses,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0
+    }
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+@asynccontextmanager
+async def _client(base_url: Optional[str]):
+    """HTTP client against a running server, or the app in-process with its lifespan"""
+    if base_url:
+        from app.core.database import connect_to_mongo, close_mongo_connection
+        await connect_to_mongo()  # only used to sample scenario data
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            yield client
+        await close_mongo_connection()
+        return
+    
+    # Every in-process request comes from one client address, so per-IP rate limits
+    # would turn validate/submit into a 429 benchmark; set ADMISSION_ENABLED=true to measure them
+    os.environ.setdefault("ADMISSION_ENABLED", "false")
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            yield client
+
+async def run(args) -> dict:
+    names = list(SCENARIOS) if args.scenarios == "all" else args.scenarios.split(",")
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+    
+    rng = random.Random(args.seed)
+    results = {}
+    
+    async with _client(args.base_url) as client:
+        ctx = ScenarioContext(rng)
+        await ctx.load(args.sample_size)
+        
+        for name in names:
+            if args.warmup:
+                await run_scenario(client, ctx, SCENARIOS[name], args.warmup, args.concurrency, None)
+            results[name] = await run_scenario(
+                client, ctx, SCENARIOS[name], args.duration, args.concurrency, args.requests
+            )
+            print(
+                f"⚙️ {name}: {results[name]['throughput_rps']} req/s, "
+                f"p50 {results[name]['p50_ms']}ms, p95 {results[name]['p95_ms']}ms, p99 {results[name]['p99_ms']}ms"
+            )
+    
+    return {
+        "revision": _git_revision(),
+        "started_at": datetime.utcnow().isoformat() + "Z",
+        "target": args.base_url or "in-process",
+        "config": {
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "concurrency": args.concurrency,
+            "max_requests": args.requests,
+            "seed": args.seed
+        },
+        "scenarios": results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run load-test scenarios against the testimonial API")
+    parser.add_argument("--scenarios", default="all", help="comma-separated names or 'all': " + ", ".join(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2, help="unmeasured seconds before each scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=None, help="stop a scenario after this many requests")
+    parser.add_argument("--sample-size", type=int, default=10_000, help="tokens/projects sampled for request data")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-url", default=None, help="benchmark a running server instead of the app in-process")
+    parser.add_argument("--output", default=None, help="write the JSON report to this file")
+    args = parser.parse_args()
+    
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+if __name__ == "__main__":
+    main()
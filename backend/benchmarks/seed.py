@@ -0,0 +1,207 @@
+"""
+Benchmark Seeder - Generate realistic, skewed data into a local MongoDB
+Run with: python -m benchmarks.seed --projects 10000 --tokens 1000000 --testimonials 500000
+"""
+
+from datetime import datetime, timedelta
+from bson import ObjectId
+import argparse
+import asyncio
+import itertools
+import random
+import time
+
+from app.core import database
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.core.indexes import ensure_indexes
+from app.core.security import get_password_hash
+
+# Credentials of the admin account the scenario runner logs in with
+BENCH_ADMIN_USERNAME = "bench"
+BENCH_ADMIN_PASSWORD = "benchmark-password"
+
+TAGS = ["web", "mobile", "branding", "ecommerce", "saas", "design", "api", "seo", "cloud", "ai", "data", "marketing"]
+WORDS = (
+    "great team delivered project on time quality communication design fast support "
+    "excellent professional recommend results website app launch smooth process clear "
+    "helpful responsive creative reliable budget experience again business growth"
+).split()
+ROLES = ["CEO", "CTO", "Founder", "Product Manager", "Marketing Lead", "Engineer", None]
+
+# Skews observed in production data
+RATING_WEIGHTS = [2, 3, 8, 27, 60]           # 1..5 stars, mostly positive
+TOKEN_STATUS_WEIGHTS = {"expired": 60, "active": 30, "revoked": 10}  # for tokens without a testimonial
+PROJECT_STATUS_WEIGHTS = {"active": 80, "completed": 15, "archived": 5}
+
+def _zipf_weights(n: int, exponent: float) -> list:
+    """Cumulative weights giving a few projects most of the tokens and testimonials"""
+    return list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(n)))
+
+def _recent_datetime(rng: random.Random, now: datetime, days: int) -> datetime:
+    """A timestamp within `days`, biased towards the recent past"""
+    return now - timedelta(seconds=int(days * 86400 * rng.random() ** 2))
+
+def _text(rng: random.Random, min_words: int, mean_words: float) -> str:
+    count = max(min_words, int(rng.lognormvariate(0, 0.8) * mean_words))
+    return " ".join(rng.choice(WORDS) for _ in range(count)).capitalize()
+
+def _weighted(rng: random.Random, weights: dict) -> str:
+    return rng.choices(list(weights), list(weights.values()))[0]
+
+def _object_id(rng: random.Random) -> ObjectId:
+    """An id drawn from the seeded generator, so the same --seed gives the same data set"""
+    return ObjectId(rng.randbytes(12))
+
+def _project_doc(rng: random.Random, now: datetime, n: int) -> dict:
+    created_at = _recent_datetime(rng, now, 730)
+    return {
+        "_id": _object_id(rng),
+        "name": f"Project {n:06d}",
+        "description": _text(rng, 8, 25),
+        "client_name": f"Client {rng.randrange(1, 5000):04d}",
+        "client_email": None,
+        "client_company": f"Company {rng.randrange(1, 2000):04d}",
+        "project_url": f"https://example.com/projects/{n}",
+        "project_image": None,
+        "tags": rng.sample(TAGS, rng.choices([0, 1, 2, 3, 4], [5, 30, 35, 20, 10])[0]),
+        "status": _weighted(rng, PROJECT_STATUS_WEIGHTS),
+        "created_at": created_at,
+        "updated_at": created_at
+    }
+
+def _token_doc(rng: random.Random, now: datetime, project_id: ObjectId, n: int, used: bool) -> dict:
+    status = "used" if used else _weighted(rng, TOKEN_STATUS_WEIGHTS)
+    created_at = _recent_datetime(rng, now, 365)
+    expires_at = created_at + timedelta(hours=rng.choice([24, 72, 168, 720]))
+    if status == "active":
+        expires_at = now + timedelta(hours=rng.randrange(1, 720))
+    
+    return {
+        "_id": _object_id(rng),
+        "token": f"bench-{n:08d}-{rng.getrandbits(64):016x}",
+        "project_id": project_id,
+        "status": status,
+        "created_at": created_at,
+        "expires_at": expires_at,
+        "used_at": created_at + timedelta(hours=rng.randrange(1, 24)) if used else None,
+        "note": None,
+        "created_by": BENCH_ADMIN_USERNAME
+    }
+
+def _testimonial_doc(rng: random.Random, token: dict) -> dict:
+    return {
+        "_id": _object_id(rng),
+        "project_id": token["project_id"],
+        "token_id": str(token["_id"]),
+        "client_name": f"Reviewer {rng.randrange(1, 100000):05d}",
+        "client_role": rng.choice(ROLES),
+        "client_company": f"Company {rng.randrange(1, 2000):04d}",
+        "client_avatar": None,
+        "rating": rng.choices([1, 2, 3, 4, 5], RATING_WEIGHTS)[0],
+        "title": _text(rng, 2, 5),
+        "content": _text(rng, 5, 40),
+        "is_featured": rng.random() < 0.03,
+        "is_published": rng.random() < 0.9,
+        "created_at": token["used_at"],
+        "updated_at": token["used_at"]
+    }
+
+async def _insert_chunks(collection, docs, chunk_size: int, total: int):
+    """Insert an iterable of documents with unordered insert_many batches"""
+    started = time.perf_counter()
+    inserted = 0
+    
+    while True:
+        chunk = list(itertools.islice(docs, chunk_size))
+        if not chunk:
+            break
+        await collection.insert_many(chunk, ordered=False)
+        inserted += len(chunk)
+        rate = inserted / max(time.perf_counter() - started, 1e-9)
+        print(f"   {collection.name}: {inserted}/{total} ({rate:,.0f} docs/s)", end="\r")
+    
+    print(f"✅ {collection.name}: {inserted} documents in {time.perf_counter() - started:.1f}s" + " " * 20)
+
+async def seed(projects: int, tokens: int, testimonials: int, chunk_size: int, seed_value: int, skew: float, drop: bool):
+    if testimonials > tokens:
+        raise ValueError("Every testimonial needs its own token: --testimonials must not exceed --tokens")
+    
+    await connect_to_mongo()
+    db = get_database()
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    
+    if drop:
+        for name in ("projects", "tokens", "testimonials", "admins"):
+            await db[name].drop()
+        print("🗑️ Dropped existing benchmark collections")
+    
+    # The application indexes must exist before inserting
+    await ensure_indexes(db)
+    
+    await db.admins.update_one(
+        {"username": BENCH_ADMIN_USERNAME},
+        {"$setOnInsert": {
+            "username": BENCH_ADMIN_USERNAME,
+            "email": "bench@example.com",
+            "password_hash": get_password_hash(BENCH_ADMIN_PASSWORD),
+            "full_name": "Benchmark Admin",
+            "created_at": now,
+            "updated_at": now
+        }},
+        upsert=True
+    )
+    
+    project_docs = [_project_doc(rng, now, n) for n in range(projects)]
+    await _insert_chunks(db.projects, iter(project_docs), chunk_size, projects)
+    
+    # Assign tokens to projects with a Zipf-like skew
+    project_ids = [project["_id"] for project in project_docs]
+    rng.shuffle(project_ids)
+    cum_weights = _zipf_weights(len(project_ids), skew)
+    
+    # Testimonials come from the first `testimonials` tokens, which are marked used
+    pending_testimonials = []
+    
+    def token_docs():
+        for n in range(tokens):
+            project_id = rng.choices(project_ids, cum_weights=cum_weights)[0]
+            token = _token_doc(rng, now, project_id, n, used=n < testimonials)
+            if n < testimonials:
+                pending_testimonials.append(_testimonial_doc(rng, token))
+            yield token
+    
+    # Interleave so pending testimonials never hold more than one chunk in memory
+    token_iter = token_docs()
+    started = time.perf_counter()
+    inserted = 0
+    while True:
+        chunk = list(itertools.islice(token_iter, chunk_size))
+        if not chunk:
+            break
+        await db.tokens.insert_many(chunk, ordered=False)
+        if pending_testimonials:
+            await db.testimonials.insert_many(pending_testimonials, ordered=False)
+            pending_testimonials.clear()
+        inserted += len(chunk)
+        print(f"   tokens: {inserted}/{tokens}, testimonials: {min(inserted, testimonials)}/{testimonials}", end="\r")
+    
+    print(f"✅ tokens: {tokens}, testimonials: {testimonials} in {time.perf_counter() - started:.1f}s" + " " * 20)
+    print(f"✅ Seeded {database.DATABASE_NAME} (admin: {BENCH_ADMIN_USERNAME} / {BENCH_ADMIN_PASSWORD})")
+    await close_mongo_connection()
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a local MongoDB with synthetic benchmark data")
+    parser.add_argument("--projects", type=int, default=10_000)
+    parser.add_argument("--tokens", type=int, default=1_000_000)
+    parser.add_argument("--testimonials", type=int, default=500_000)
+    parser.add_argument("--chunk-size", type=int, default=5_000, help="documents per insert_many")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for reproducible data")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for tokens per project")
+    parser.add_argument("--drop", action="store_true", help="clear projects, tokens, testimonials and admins first")
+    args = parser.parse_args()
+    
+    asyncio.run(seed(args.projects, args.tokens, args.testimonials, args.chunk_size, args.seed, args.skew, args.drop))
+
+if __name__ == "__main__":
+    main()
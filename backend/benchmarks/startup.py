@@ -0,0 +1,110 @@
+"""
+Startup Benchmark - Cold import time and time until a fresh server answers /health
+Run with: python -m benchmarks.startup --runs 5 --output startup.json
+"""
+
+from datetime import datetime
+from typing import List
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.run import _git_revision
+
+IMPORT_PROBE = "import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)"
+
+def _summary(samples: List[float]) -> dict:
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples) * 1000, 1),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1)
+    }
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_import() -> float:
+    """Seconds to import the application in a fresh interpreter"""
+    result = subprocess.run([sys.executable, "-c", IMPORT_PROBE], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(top: int) -> List[dict]:
+    """Modules with the largest cumulative import time, from -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append({"module": name.strip(), "cumulative_ms": round(int(cumulative) / 1000, 1)})
+    return sorted(modules, key=lambda module: module["cumulative_ms"], reverse=True)[:top]
+
+def measure_first_health(timeout: float) -> float:
+    """Seconds from launching uvicorn until /health first answers 200"""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            while time.perf_counter() - started < timeout:
+                if server.poll() is not None:
+                    raise RuntimeError(f"Server exited with code {server.returncode} before becoming healthy")
+                try:
+                    if client.get("/health").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+        raise RuntimeError(f"/health did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time and time to first healthy response")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for /health per run")
+    parser.add_argument("--skip-server", action="store_true", help="only measure imports (no MongoDB needed)")
+    parser.add_argument("--output", default=None, help="write the JSON report to this file")
+    args = parser.parse_args()
+    
+    import_times = [measure_import() for _ in range(args.runs)]
+    print(f"⚙️ import app.main: median {statistics.median(import_times) * 1000:.0f}ms")
+    
+    health_times = []
+    if not args.skip_server:
+        for _ in range(args.runs):
+            health_times.append(measure_first_health(args.timeout))
+        print(f"⚙️ first /health: median {statistics.median(health_times) * 1000:.0f}ms")
+    
+    report = {
+        "revision": _git_revision(),
+        "started_at": datetime.utcnow().isoformat() + "Z",
+        "config": {"runs": args.runs, "index_boot_mode": os.environ.get("INDEX_BOOT_MODE", "check")},
+        "import": _summary(import_times),
+        "first_health": _summary(health_times) if health_times else None,
+        "slowest_imports": slowest_imports(args.top)
+    }
+    
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+if __name__ == "__main__":
+    main()
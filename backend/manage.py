@@ -0,0 +1,102 @@
+"""
+Management Commands - Maintenance tasks run outside the web process
+Run with: python manage.py indexes [--check]
+          python manage.py migrate [--status] [--target VERSION]
+          python manage.py import FILE [--format csv|ndjson] [--import-id ID]
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.core.indexes import diff_indexes, ensure_indexes, index_manifest, manifest_version
+from app.core.migrations import migration_status, run_migrations
+from app.schemas.schemas import ImportFormat
+from app.utils.importer import ImportFailed, ImportInProgress, file_import_id, read_file, run_import
+import app.migrations  # registers the versioned migrations
+
+async def indexes(args: argparse.Namespace):
+    db = get_database()
+    
+    if args.check:
+        report = await diff_indexes(db)
+        for kind, names in report.items():
+            for name in names:
+                print(f"{kind:<12}{name}")
+        if report["missing"] or report["conflicting"]:
+            sys.exit(1)
+        print(f"✅ All {len(index_manifest())} manifest indexes present")
+        return
+    
+    conflicts = await ensure_indexes(db)
+    if conflicts:
+        sys.exit(1)
+    print(f"✅ Index manifest {manifest_version(index_manifest())} applied")
+
+async def migrate(args: argparse.Namespace):
+    db = get_database()
+    
+    if args.status:
+        for item in await migration_status(db):
+            print(f"{item['version']}  {item['status']:<8}  {item['description']}  {item['progress'] or ''}")
+        return
+    
+    completed = await run_migrations(db, target=args.target)
+    if not completed:
+        print("Nothing to migrate")
+
+async def import_file(args: argparse.Namespace):
+    db = get_database()
+    import_format = ImportFormat(args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv"))
+    import_id = args.import_id or file_import_id(args.path)
+    print(f"📥 Importing {args.path} as {import_format.value} (import id {import_id})")
+    
+    def progress(counts: dict):
+        print(f"   rows: {counts['rows_read']}, inserted: {counts['inserted']}, failed: {counts['failed']}", end="\r")
+    
+    try:
+        summary = await run_import(db, read_file(args.path), import_format, import_id, on_batch=progress)
+    except (ImportFailed, ImportInProgress) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    
+    for error in summary["errors"]:
+        print(f"   row {error['row']}: {'; '.join(error['errors'])}")
+    if summary["failed"] > len(summary["errors"]):
+        print(f"   ... see GET /api/admin/imports/{import_id} for all {summary['failed']} row errors")
+    print(
+        f"✅ Import {import_id} {summary['status']}: {summary['rows_read']} rows, {summary['inserted']} inserted, "
+        f"{summary['duplicates']} already present, {summary['failed']} failed, {summary['projects_created']} projects created"
+    )
+
+async def main(args: argparse.Namespace):
+    await connect_to_mongo()
+    try:
+        await args.command(args)
+    finally:
+        await close_mongo_connection()
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(required=True)
+    
+    indexes_parser = commands.add_parser("indexes", help="create the indexes in the manifest (idempotent; run on deploy)")
+    indexes_parser.add_argument("--check", action="store_true", help="only compare live indexes with the manifest")
+    indexes_parser.set_defaults(command=indexes)
+    
+    migrate_parser = commands.add_parser("migrate", help="apply pending data migrations (safe to re-run or interrupt)")
+    migrate_parser.add_argument("--status", action="store_true", help="list migrations and their progress instead")
+    migrate_parser.add_argument("--target", help="stop after this version")
+    migrate_parser.set_defaults(command=migrate)
+    
+    import_parser = commands.add_parser("import", help="import historical testimonials from CSV or NDJSON (resumable)")
+    import_parser.add_argument("path", help="CSV with a header row, or one JSON object per line")
+    import_parser.add_argument("--format", choices=[f.value for f in ImportFormat], help="default: from the file extension")
+    import_parser.add_argument("--import-id", help="resume key; defaults to the file name and size")
+    import_parser.set_defaults(command=import_file)
+    
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,96 @@
+"""
+Test Fixtures - The App Against an In-Memory MongoDB (mongomock-motor)
+"""
+
+import os
+
+# Over-budget routes fail the request under test instead of logging a warning
+os.environ["QUERY_BUDGET_MODE"] = "raise"
+
+from types import SimpleNamespace
+import functools
+import itertools
+
+import httpx
+import pytest
+from mongomock_motor import AsyncMongoMockClient, AsyncMongoMockCollection
+
+from app.core import database
+from app.core.cache import project_cache, public_cache
+from app.core.monitoring import command_monitor
+from app.main import app
+
+# Collection methods and the server command each one sends (count_documents runs an aggregate)
+COLLECTION_COMMANDS = {
+    "find": "find",
+    "find_one": "find",
+    "aggregate": "aggregate",
+    "count_documents": "aggregate",
+    "estimated_document_count": "count",
+    "distinct": "distinct",
+    "insert_one": "insert",
+    "insert_many": "insert",
+    "update_one": "update",
+    "update_many": "update",
+    "replace_one": "update",
+    "bulk_write": "update",
+    "delete_one": "delete",
+    "delete_many": "delete",
+    "find_one_and_update": "findAndModify",
+    "find_one_and_replace": "findAndModify",
+    "find_one_and_delete": "findAndModify"
+}
+
+_request_ids = itertools.count()
+
+def _monitored(method, command_name: str):
+    """Report each call to the command monitor the way the driver reports a command"""
+    @functools.wraps(method)
+    def wrapper(collection, *args, **kwargs):
+        request_id = next(_request_ids)
+        command_monitor.started(SimpleNamespace(
+            command_name=command_name,
+            command={command_name: collection.name},
+            database_name=collection.database.name,
+            connection_id=("mongomock", 0),
+            request_id=request_id
+        ))
+        command_monitor.succeeded(SimpleNamespace(
+            command_name=command_name,
+            connection_id=("mongomock", 0),
+            request_id=request_id,
+            duration_micros=0
+        ))
+        return method(collection, *args, **kwargs)
+    return wrapper
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Fresh in-memory database whose commands count towards `count_queries()`"""
+    # mongomock never talks to a server, so no command events would fire otherwise
+    for method_name, command_name in COLLECTION_COMMANDS.items():
+        method = getattr(AsyncMongoMockCollection, method_name)
+        monkeypatch.setattr(AsyncMongoMockCollection, method_name, _monitored(method, command_name))
+    
+    def reset():
+        client = AsyncMongoMockClient()
+        monkeypatch.setattr(database.db, "client", client)
+        monkeypatch.setattr(database.db, "db", client[database.DATABASE_NAME])
+        public_cache.invalidate()
+        project_cache.invalidate()
+        return database.db.db
+    
+    reset()
+    yield SimpleNamespace(db=lambda: database.db.db, reset=reset)
+    public_cache.invalidate()
+    project_cache.invalidate()
+
+@pytest.fixture
+async def client():
+    """HTTP client calling the app in-process (the lifespan's background services stay off)"""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
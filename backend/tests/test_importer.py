@@ -0,0 +1,73 @@
+"""
+Import Tests - CSV Record Splitting and the Resumable Import Endpoint
+"""
+
+import pytest
+
+from app.core.indexes import ensure_indexes
+from app.core.security import create_access_token
+from app.utils.importer import _csv_records
+
+pytestmark = pytest.mark.anyio
+
+HEADER = "project_name,client_name,rating,title,content\n"
+CONTENT = "Delivered on time and communicated clearly."
+
+async def _lines(text: str):
+    for line in text.splitlines(keepends=True):
+        yield line
+
+async def records(text: str) -> list:
+    return [record async for record in _csv_records(_lines(HEADER + text))]
+
+async def test_stray_quote_in_unquoted_field_is_literal():
+    rows = await records(
+        f'Portal,Ann Lee,5,Great 5" screen,{CONTENT}\n'
+        f"Portal,Bob Ray,4,Solid work,{CONTENT}\n"
+    )
+    
+    assert [row for row, _ in rows] == [1, 2]
+    assert rows[0][1]["title"] == 'Great 5" screen'
+    assert rows[1][1]["client_name"] == "Bob Ray"
+
+async def test_quoted_field_may_span_lines():
+    rows = await records(
+        f'Portal,Ann Lee,5,"Two\nlines, ""quoted""",{CONTENT}\n'
+        f"Portal,Bob Ray,4,Solid work,{CONTENT}\n"
+    )
+    
+    assert rows[0][1]["title"] == 'Two\nlines, "quoted"'
+    assert rows[1] == (2, {"project_name": "Portal", "client_name": "Bob Ray", "rating": "4", "title": "Solid work", "content": CONTENT})
+
+async def test_unterminated_quoted_field_is_reported():
+    rows = await records(f'Portal,Ann Lee,5,"Never closed,{CONTENT}\n')
+    
+    assert rows == [(1, "unterminated quoted field")]
+
+def admin_headers() -> dict:
+    return {"Authorization": "Bearer " + create_access_token({"sub": "admin", "admin_id": "admin-1"})}
+
+async def test_import_requires_a_client_chosen_id(mongo, client):
+    response = await client.post(
+        "/api/admin/import?format=csv",
+        content=HEADER + f"Portal,Ann Lee,5,Great work,{CONTENT}\n",
+        headers=admin_headers()
+    )
+    
+    assert response.status_code == 422
+
+async def test_import_with_stray_quote_keeps_every_row(mongo, client):
+    db = mongo.db()
+    await ensure_indexes(db)
+    body = (
+        HEADER
+        + f'Portal,Ann Lee,5,Great 5" screen,{CONTENT}\n'
+        + f"Portal,Bob Ray,4,Solid work,{CONTENT}\n"
+    )
+    
+    response = await client.post("/api/admin/import?format=csv&import_id=history.csv", content=body, headers=admin_headers())
+    
+    assert response.status_code == 200, response.text
+    summary = response.json()
+    assert (summary["status"], summary["inserted"], summary["failed"]) == ("completed", 2, 0)
+    assert await db.testimonials.count_documents({"import_ref.id": "history.csv"}) == 2
@@ -0,0 +1,116 @@
+"""
+Query Budget Tests - Public Routes Issue the Same Number of MongoDB Queries Whatever the Data Size
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.monitoring import QueryBudgetExceeded, count_queries, route_query_budget
+from app.core.cache import public_cache
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+SIZES = [1, 50, 500]
+PUBLIC_ROUTES = [
+    "/api/public/testimonials",
+    "/api/public/testimonials/featured",
+    "/api/public/projects",
+    "/api/public/stats"
+]
+
+async def seed(db, testimonials: int):
+    """Published testimonials spread over one project per five, every third one featured"""
+    now = datetime.utcnow()
+    projects = [
+        {
+            "name": f"Project {n}",
+            "client_name": "Client",
+            "tags": ["web", f"tag-{n % 3}"],
+            "status": "active",
+            "created_at": now - timedelta(days=n),
+            "updated_at": now
+        }
+        for n in range(max(1, testimonials // 5))
+    ]
+    project_ids = (await db.projects.insert_many(projects)).inserted_ids
+    
+    await db.testimonials.insert_many([
+        {
+            "project_id": project_ids[n % len(project_ids)],
+            "client_name": f"Client {n}",
+            "rating": 5 - n % 5,
+            "title": "Great collaboration",
+            "content": "Delivered on time and communicated clearly throughout.",
+            "is_featured": n % 3 == 0,
+            "is_published": True,
+            "created_at": now - timedelta(minutes=n),
+            "updated_at": now
+        }
+        for n in range(testimonials)
+    ])
+
+def budget_of(path: str) -> int:
+    route = next(route for route in app.routes if getattr(route, "path", None) == path)
+    return route_query_budget(route)
+
+async def queries_for(client, path: str):
+    public_cache.invalidate()
+    with count_queries() as stats:
+        response = await client.get(path)
+    assert response.status_code == 200, response.text
+    return stats
+
+@pytest.mark.parametrize("path", PUBLIC_ROUTES)
+async def test_query_count_does_not_grow_with_data(path, mongo, client):
+    counts = {}
+    summaries = {}
+    for size in SIZES:
+        await seed(mongo.reset(), size)
+        stats = await queries_for(client, path)
+        counts[size] = stats.queries
+        summaries[size] = stats.summary()
+    
+    assert len(set(counts.values())) == 1, f"{path} query count depends on data size: {summaries}"
+    assert counts[SIZES[0]] <= budget_of(path), summaries[SIZES[0]]
+
+@pytest.mark.parametrize("query", ["?tag=web", "?tag=tag-0&status=active&sort=highest_rated", "?min_rating=4"])
+async def test_filtered_testimonials_stay_within_budget(query, mongo, client):
+    # Every size has matches, so no size takes the empty-result shortcut
+    counts = set()
+    for size in SIZES:
+        await seed(mongo.reset(), size)
+        counts.add((await queries_for(client, "/api/public/testimonials" + query)).queries)
+    
+    assert len(counts) == 1
+    assert counts.pop() <= budget_of("/api/public/testimonials")
+
+async def test_cached_response_issues_no_queries(mongo, client):
+    await seed(mongo.db(), 50)
+    await client.get("/api/public/testimonials")
+    
+    with count_queries() as stats:
+        response = await client.get("/api/public/testimonials")
+    
+    assert response.status_code == 200
+    assert stats.queries == 0, stats.summary()
+
+async def test_per_row_query_fails_the_request(mongo, client, monkeypatch):
+    """A lookup per testimonial (an N+1) must break the suite, not just log a warning"""
+    from app.routes import public
+    
+    async def project_per_row(db, project_ids, projection=None):
+        projects = {}
+        for project_id in project_ids:
+            project = await db.projects.find_one({"_id": project_id}, projection)
+            if project:
+                projects[str(project_id)] = project
+        return projects
+    
+    monkeypatch.setattr(public, "find_projects", project_per_row)
+    await seed(mongo.db(), 50)
+    public_cache.invalidate()
+    
+    with pytest.raises(QueryBudgetExceeded):
+        await client.get("/api/public/testimonials")
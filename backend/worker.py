@@ -0,0 +1,35 @@
+"""
+Job Worker Entry Point - Run background jobs outside the web process
+Run with: python worker.py  (set JOB_WORKERS_IN_PROCESS=false on the web service)
+"""
+
+import asyncio
+import signal
+
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.core.indexes import check_index_manifest
+from app.core.jobs import worker_pool, JOB_WORKERS
+from app.core.tracing import exporter as span_exporter
+from app.utils.retention import archive_scheduler
+import app.routes  # registers the job handlers used by the routes
+
+async def main():
+    span_exporter.start()
+    await connect_to_mongo()
+    await check_index_manifest(get_database())
+    worker_pool.start(JOB_WORKERS)
+    archive_scheduler.start()
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    
+    await stop.wait()
+    await archive_scheduler.stop()
+    await worker_pool.stop()
+    await close_mongo_connection()
+    await span_exporter.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())